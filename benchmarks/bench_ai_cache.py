@@ -0,0 +1,87 @@
+"""
+Benchmark for lib/ai/result_cache.py.
+
+Runs AI requests through the fake-latency backend (as a model would take)
+and repeats each through the result cache, the way AiActionsControls does:
+key, lookup and, on a miss, generate and store. Also fills the cache past
+its bounds to check that LRU eviction keeps it within them.
+
+Exits with status 1 if a repeated request takes 10ms or more at the p95 or
+the cache grows past `max_entries`.
+
+    python benchmarks/bench_ai_cache.py [--requests 200] [--latency 0.05]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.ai.backends import FakeLatencyBackend, GenerationRequest
+from lib.ai.result_cache import AiResultCache, cache_key
+
+TARGET_MS = 10.0
+MODES = ["Serious", "Casual", "Formal"]
+ACTIONS = ["Summarize", "Expand", "Rephrase"]
+
+
+def run(cache, backend, request):
+    key = cache_key(backend.id, request.mode, request.action, request.text)
+    result = cache.get(key)
+    if result is None:
+        result = backend.generate(request, lambda: False)
+        cache.put(key, result)
+    return result
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake backend takes")
+    parser.add_argument("--selection-chars", type=int, default=5000)
+    args = parser.parse_args()
+
+    backend = FakeLatencyBackend(args.latency)
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory(prefix="ai_cache_") as directory:
+        cache = AiResultCache(os.path.join(directory, "ai_cache.db"), max_entries=args.requests)
+        requests = [
+            GenerationRequest(
+                rng.choice(MODES),
+                rng.choice(ACTIONS),
+                f"Selection {i}: " + "lorem ipsum " * (args.selection_chars // 12),
+            )
+            for i in range(args.requests)
+        ]
+        first = [timed_ms(lambda r=request: run(cache, backend, r)) for request in requests]
+        repeat = [timed_ms(lambda r=request: run(cache, backend, r)) for request in requests]
+        p95 = statistics.quantiles(repeat, n=20)[18]
+        print(f"first run: median {statistics.median(first):.2f} ms")
+        print(f"repeated:  median {statistics.median(repeat):.3f} ms, p95 {p95:.3f} ms "
+              f"({cache.stats['hits']} hits)")
+
+        # Twice as many distinct results as the cache may hold.
+        for i in range(args.requests * 2):
+            cache.put(cache_key("bench", "m", "a", str(i)), "x" * 200)
+        print(f"after overfilling: {len(cache)} entries (max {cache.max_entries}), "
+              f"{cache.stats['evicted']} evicted")
+        failed = p95 >= TARGET_MS or len(cache) > cache.max_entries
+        cache.close()
+
+    if failed:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
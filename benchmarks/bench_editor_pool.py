@@ -0,0 +1,92 @@
+"""
+Benchmark for lib/screens/components/editor_pool.py: the Python side of
+opening a note in the note editor screen.
+
+Fills an in-memory NoteStore with N notes of realistic size and builds a
+pool of MarkdownEditorControllers (not mounted, so nothing is sent to a
+page), then times EditorPool.activate for:
+
+- "hit": the note is already in a slot (the usual case after a hover
+  prefetch), so opening only switches the active slot;
+- "miss": the note is read from the store and loaded into the least
+  recently used slot;
+- "prefetch": EditorPool.prefetch, which runs on hover, before the click.
+
+The 50ms click-to-editable target also covers one reconcile of the screen
+and the page switching which editor is visible; those need a running
+window and are not measured here. Exits with status 1 if a hit or a miss
+takes 50ms or more at the p95.
+
+    python benchmarks/bench_editor_pool.py [--notes 2000] [--opens 500] [--pool 3]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.data.note_store import NoteStore
+from lib.screens.components.editor_pool import EditorPool
+from plugins.markdown.controller import MarkdownEditorController
+
+TARGET_MS = 50.0
+
+
+def make_body(rng, paragraphs):
+    words = ["note", "editor", "pool", "block", "prefetch", "open", "click", "render", "page", "text"]
+    return "".join(
+        f"<p>{' '.join(rng.choice(words) for _ in range(rng.randint(20, 80)))}</p>" for _ in range(paragraphs)
+    )
+
+
+def percentile_95(values):
+    return statistics.quantiles(values, n=20)[18]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--opens", type=int, default=500)
+    parser.add_argument("--pool", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    store = NoteStore(":memory:")
+    store.create_notes(
+        {"title": f"Note {i}", "snippet": "Snippet", "body": make_body(rng, rng.randint(5, 60))}
+        for i in range(args.notes)
+    )
+    note_ids = [note.id for note in store.list_notes(args.notes, 0)]
+    pool = EditorPool(args.pool, lambda index: (MarkdownEditorController(), None))
+
+    hits, misses, prefetches = [], [], []
+    for _ in range(args.opens):
+        # A cold open, then a hover prefetch followed by the click.
+        note_id = rng.choice(note_ids)
+        if pool.find(note_id) is None:
+            misses.append(timed(lambda: pool.activate(note_id, store.get_note)))
+        note_id = rng.choice(note_ids)
+        if pool.find(note_id) is None:
+            prefetches.append(timed(lambda: pool.prefetch(note_id, store.get_note)))
+        hits.append(timed(lambda: pool.activate(note_id, store.get_note)))
+
+    for name, values in (("hit", hits), ("miss", misses), ("prefetch", prefetches)):
+        print(f"{name}: median {statistics.median(values):.2f} ms, p95 {percentile_95(values):.2f} ms ({len(values)} opens)")
+    print(f"pool stats: {pool.stats}")
+
+    if max(percentile_95(hits), percentile_95(misses)) >= TARGET_MS:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
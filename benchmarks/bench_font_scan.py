@@ -0,0 +1,115 @@
+"""
+Benchmark for plugins/markdown/utils/font_scanner.py.
+
+Fills a temporary directory with N font files (copies of the fonts found in
+--source, or the system font directories), then reads their family names:
+
+- "matplotlib": the previous implementation (font_manager.findSystemFonts +
+  FontProperties.get_name), including the matplotlib import. Skipped when
+  matplotlib is not installed.
+- "name table, serial" / "name table, N processes": font_scanner reading the
+  sfnt name tables through mmap, in this process and in a process pool
+  (forced, whatever PARALLEL_THRESHOLD says).
+
+The serial scan and the pool are also timed on 250, 500, 1000, ... files up
+to N, and the smallest size at which the pool wins is printed next to
+PARALLEL_THRESHOLD. The workers spawned here re-import this script; in the
+app they re-import lib/main.py, which makes each one slower to start, so
+the crossover in the app is higher than the one measured here.
+
+When matplotlib is available the family names must match; exits with
+status 1 if they differ or the name table scan is not faster.
+
+    python benchmarks/bench_font_scan.py [--fonts 2000] [--source DIR ...] [--workers N]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plugins.markdown.utils import font_scanner
+from plugins.markdown.utils.sys_font_loader import font_directories
+
+
+def matplotlib_font_names(directory):
+    """The family names as the previous get_system_fonts_as_json read them."""
+    from matplotlib import font_manager
+
+    font_paths = font_manager.findSystemFonts(fontpaths=[directory], fontext='ttf')
+    return sorted({font_manager.FontProperties(fname=fname).get_name() for fname in font_paths})
+
+
+def populate(target, sources, count):
+    """Copies the source fonts round-robin until `target` holds `count` files."""
+    os.makedirs(target, exist_ok=True)
+    for i in range(count):
+        source = sources[i % len(sources)]
+        base, ext = os.path.splitext(os.path.basename(source))
+        shutil.copyfile(source, os.path.join(target, f"{base}-{i:05d}{ext}"))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fonts", type=int, default=2000)
+    parser.add_argument("--source", nargs="+", help="directories to take font files from (default: system fonts)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    sources = font_scanner.find_font_files(args.source or font_directories())
+    if not sources:
+        parser.error("no font files found; pass --source with a directory of .ttf/.otf files")
+
+    workers = args.workers or os.cpu_count()
+    sizes = [size for size in (250, 500, 1000, 2000, 4000, 8000) if size < args.fonts] + [args.fonts]
+    with tempfile.TemporaryDirectory(prefix="font_scan_") as root:
+        crossover = None
+        print(f"{'files':>6} {'serial ms':>10} {f'{workers} processes ms':>16}")
+        for size in sizes:
+            target = os.path.join(root, str(size))
+            populate(target, sources, size)
+            serial, serial_time = timed(lambda: font_scanner.scan_font_names([target], max_workers=1))
+            pooled, pooled_time = timed(
+                lambda: font_scanner.scan_font_names([target], max_workers=args.workers, parallel_threshold=0)
+            )
+            print(f"{size:>6} {serial_time * 1000:>10.1f} {pooled_time * 1000:>16.1f}")
+            if crossover is None and pooled_time < serial_time:
+                crossover = size
+        if crossover is None:
+            print(f"crossover: the pool is slower up to {args.fonts} files (PARALLEL_THRESHOLD = {font_scanner.PARALLEL_THRESHOLD})")
+        else:
+            print(f"crossover: the pool wins from {crossover} files (PARALLEL_THRESHOLD = {font_scanner.PARALLEL_THRESHOLD})")
+        print(f"{args.fonts} font files from {len(sources)} sources")
+        print(f"name table, serial: {serial_time * 1000:.1f} ms, {len(serial)} families")
+        print(f"name table, {workers} processes: {pooled_time * 1000:.1f} ms, {len(pooled)} families")
+
+        failed = serial != pooled
+        try:
+            reference, reference_time = timed(lambda: matplotlib_font_names(target))
+        except ImportError:
+            print("matplotlib: not installed, skipped")
+        else:
+            print(f"matplotlib: {reference_time * 1000:.1f} ms, {len(reference)} families")
+            if reference != serial:
+                print(f"  only matplotlib: {sorted(set(reference) - set(serial))}")
+                print(f"  only name table: {sorted(set(serial) - set(reference))}")
+                failed = True
+            if min(serial_time, pooled_time) >= reference_time:
+                failed = True
+
+    if failed:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
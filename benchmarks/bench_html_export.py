@@ -0,0 +1,161 @@
+"""
+Fidelity checks and benchmark for plugins/markdown/html_export.py.
+
+1. Round trip: every Markdown sample is rendered to HTML with the editor's
+   converter, exported with the fast path, and rendered again. Both HTML
+   renderings must match (after whitespace normalization).
+2. Editor markup: HTML as produced by `execCommand` (divs, b/i/u/strike,
+   font, br) must render the same as markdownify's export of it.
+3. Fallback: markup outside the editor's tag set must go to markdownify.
+4. Block cache: exporting block by block through `BlockMarkdownCache` must
+   render the same as exporting the whole document.
+5. Speed: exports a ~1MB document with the fast path and with markdownify,
+   then re-exports it through the block cache after editing one block.
+
+Exits with status 1 if a fidelity check fails or the fast path is not
+faster than markdownify.
+
+    python benchmarks/bench_html_export.py [--size-kb 1024] [--runs 3]
+"""
+import os
+import re
+import sys
+import html
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from markdownify import markdownify
+
+from plugins.markdown.conversion import MarkdownConverter
+from plugins.markdown.html_export import BlockMarkdownCache, fast_html_to_markdown, html_to_markdown
+
+MARKDOWN_SAMPLES = [
+    "# Title\n\nSome *emphasis*, **strong** and `code`.",
+    "## Second\n\nA paragraph with a [link](https://example.com \"Example\") and ![alt](img.png).",
+    "* one\n* two\n    * nested **bold**\n    * nested two\n* three",
+    "1. first\n2. second\n3. third\n\nAfter the list.",
+    "* first paragraph\n\n    second paragraph\n\n* next item",
+    "> quoted *text*\n>\n> second paragraph",
+    "```python\ndef f(x):\n    return x * 2  # <b>not markup</b>\n```",
+    "| Name | Value |\n| --- | --- |\n| a | 1 |\n| b *x* | 2 |",
+    "Text with special chars: 5 * 3 = 15, snake_case, [brackets], a < b & c.",
+    "1\\. not a list\n\n\\# not a heading\n\n\\- not a bullet",
+    "Line one  \nline two  \nline three",
+    "---\n\n### After rule\n\nEnd.",
+    "Inline ``code with ` backtick`` here.",
+]
+
+EDITOR_SAMPLES = [
+    "<div>First line</div><div><b>bold</b> and <i>italic</i></div><div><br></div><div>after blank</div>",
+    "<h1>Heading</h1><div><font face=\"Verdana\">font text</font> <u>underlined</u></div>",
+    "<p>para <span style=\"color: red\">red</span> text<br>second line</p>",
+    "<ul><li>item <b>one</b></li><li>item two</li></ul><ol><li>a</li><li>b</li></ol>",
+    "<div><b>bold </b>next</div><div><img src=\"food.png\" alt=\"food\"></div>",
+]
+
+FALLBACK_SAMPLES = [
+    "<p>x<sup>2</sup></p>",
+    "<section><p>unknown container</p></section>",
+]
+
+_BETWEEN_TAGS_RE = re.compile(r">\s+<")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(markup):
+    markup = html.unescape(markup)
+    return _SPACE_RE.sub(" ", _BETWEEN_TAGS_RE.sub("><", markup)).strip()
+
+
+def check_fidelity(to_html):
+    failures = []
+    for sample in MARKDOWN_SAMPLES:
+        first = to_html(sample)
+        ok, exported = fast_html_to_markdown(first)
+        if not ok:
+            failures.append(("round trip fell back", sample, first))
+            continue
+        second = to_html(exported)
+        if normalize(first) != normalize(second):
+            failures.append(("round trip", sample, exported, first, second))
+    for sample in EDITOR_SAMPLES:
+        ok, exported = fast_html_to_markdown(sample)
+        if not ok:
+            failures.append(("editor markup fell back", sample))
+            continue
+        expected = to_html(markdownify(sample, heading_style="ATX"))
+        actual = to_html(exported)
+        if normalize(expected) != normalize(actual):
+            failures.append(("editor markup", sample, exported, expected, actual))
+    for sample in FALLBACK_SAMPLES:
+        ok, _ = fast_html_to_markdown(sample)
+        if ok or html_to_markdown(sample) != markdownify(sample, heading_style="ATX"):
+            failures.append(("fallback", sample))
+    blocks = [to_html(sample) for sample in MARKDOWN_SAMPLES] + EDITOR_SAMPLES
+    whole = to_html(html_to_markdown("".join(blocks)))
+    blockwise = to_html(BlockMarkdownCache().export(blocks))
+    if normalize(whole) != normalize(blockwise):
+        failures.append(("block cache", whole, blockwise))
+    return failures
+
+
+def make_blocks(to_html, size_kb):
+    chunk = [to_html(sample) for sample in MARKDOWN_SAMPLES] + EDITOR_SAMPLES[:-1]
+    repeats = max(1, size_kb * 1024 // len("".join(chunk)))
+    return [f'<p>Block {i}</p>' for i in range(repeats)] + chunk * repeats
+
+
+def make_document(to_html, size_kb):
+    chunk = "".join(to_html(sample) for sample in MARKDOWN_SAMPLES) + "".join(EDITOR_SAMPLES[:-1])
+    repeats = max(1, size_kb * 1024 // len(chunk))
+    return chunk * repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    to_html = MarkdownConverter().to_html
+    failures = check_fidelity(to_html)
+    total = len(MARKDOWN_SAMPLES) + len(EDITOR_SAMPLES) + len(FALLBACK_SAMPLES) + 1
+    print(f"fidelity: {total - len(failures)}/{total} samples passed")
+    for failure in failures:
+        print("  FAIL", *(repr(part) for part in failure), sep="\n    ")
+
+    document = make_document(to_html, args.size_kb)
+    timings = {}
+    for name, export in (
+        ("fast path", lambda: fast_html_to_markdown(document)),
+        ("markdownify", lambda: markdownify(document, heading_style="ATX")),
+    ):
+        best = float("inf")
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            export()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name}: {len(document) / 1024:.0f}KB in {best * 1000:.0f}ms")
+    print(f"speedup: {timings['markdownify'] / timings['fast path']:.1f}x")
+
+    blocks = make_blocks(to_html, args.size_kb)
+    cache = BlockMarkdownCache()
+    cache.export(blocks)
+    best = float("inf")
+    for run in range(args.runs):
+        blocks[run] = f"<p>Edited block {run}</p>"
+        start = time.perf_counter()
+        cache.export(blocks)
+        best = min(best, time.perf_counter() - start)
+    print(f"block cache: {len(blocks)} blocks, one edited, re-exported in {best * 1000:.1f}ms")
+
+    if failures or timings["fast path"] >= timings["markdownify"]:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Reconciler patch counts for NoteCard lists (lib/screens/components/note_card.py).
+
+Fills an in-memory NoteStore with N notes, renders a column of the cards
+built by a DashboardScreenState, creates one note at the top (the
+dashboard's "create note" path) and reconciles again, counting patches and
+NoteCard subtree builds:
+
+- "id keys": the dashboard's own item builder (build_note_card), which keys
+  cards by note id and reuses them while their props are unchanged.
+  Creating a note must cost the same number of patches and exactly one card
+  build whatever N is, and every other card must be the same object as
+  before.
+- "index keys": the previous scheme (Key(f"note_{i}")), for comparison;
+  every card after the insertion point changes identity and is patched.
+
+Exits with status 1 if the id-keyed patch count grows with N, more than
+one card is rebuilt or an unchanged card is not reused.
+
+    python benchmarks/bench_note_card_patches.py [--sizes 100 1000]
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pythra import Colors, Column, Key, StatefulWidget, StatelessWidget
+from pythra.reconciler import Reconciler
+
+from lib.data.note_store import NoteStore
+from lib.screens.components.note_card import NoteCard, NoteCardState
+from lib.screens.dashboard_screen import DashboardScreenState
+
+# Upper bound on patches for creating one note, independent of N.
+MAX_PATCHES = 10
+
+card_builds = 0
+_build_card = NoteCardState._build_card
+
+
+def _counting_build_card(self):
+    global card_builds
+    card_builds += 1
+    return _build_card(self)
+
+
+NoteCardState._build_card = _counting_build_card
+
+
+def expand(widget):
+    """Expands stateful/stateless widgets the way Framework._build_widget_tree does."""
+    if isinstance(widget, StatefulWidget):
+        state = widget.get_state()
+        if state is None:
+            state = widget.createState()
+            widget._state = state
+            state._set_widget(widget)
+            state.initState()
+        child = expand(state.build())
+        widget._children = [child] if child else []
+        return widget
+    if isinstance(widget, StatelessWidget):
+        child = expand(widget.build())
+        widget._children = [child] if child else []
+        return widget
+    if hasattr(widget, "get_children"):
+        widget._children = [expand(child) for child in widget.get_children() if child]
+    return widget
+
+
+def make_state(size):
+    """A dashboard state over a fresh in-memory store holding `size` notes."""
+    NoteStore._instance = NoteStore(":memory:")
+    NoteStore._instance.create_notes(
+        {"title": f"Note {note_id}", "snippet": "Snippet", "color": "#FFAB91", "updated_at": float(note_id)}
+        for note_id in range(1, size + 1)
+    )
+    return DashboardScreenState(navigator=None)
+
+
+def id_keyed_cards(state):
+    return [state.build_note_card(i) for i in range(state.note_count)]
+
+
+def index_keyed_cards(state):
+    cards = []
+    for i in range(state.note_count):
+        note = state._note_at(i)
+        cards.append(NoteCard(
+            key=Key(f"note_{i}"),
+            title=note.title,
+            note=note.snippet,
+            date=state._format_date(note.updated_at),
+            color=Colors.hex(note.color),
+        ))
+    return cards
+
+
+def measure(make_cards, size):
+    """
+    Returns (patches, card builds, reused) for creating one note in a list of
+    `size`; `reused` tells whether every old card object was kept.
+    """
+    global card_builds
+    reconciler = Reconciler()
+    state = make_state(size)
+
+    before = make_cards(state)
+    root = expand(Column(key=Key("notes_column"), children=before))
+    first = reconciler.reconcile(previous_map={}, new_widget_root=root, parent_html_id="root-container")
+
+    # What create_note does, minus the JS call to the grid engine.
+    state.store.create_note("New note", "Snippet", "#FFAB91")
+    state._reload_notes()
+    card_builds = 0
+    after = make_cards(state)
+    root = expand(Column(key=Key("notes_column"), children=after))
+    second = reconciler.reconcile(
+        previous_map=first.new_rendered_map,
+        new_widget_root=root,
+        parent_html_id="root-container",
+        is_partial_reconciliation=True,
+    )
+    reused = len(after) == len(before) + 1 and all(old is new for old, new in zip(before, after[1:]))
+    return len(second.patches), card_builds, reused
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+
+    results = {}
+    for name, make_cards in (("id keys", id_keyed_cards), ("index keys", index_keyed_cards)):
+        for size in args.sizes:
+            patches, builds, reused = measure(make_cards, size)
+            results[name, size] = (patches, builds, reused)
+            print(f"{name}: {size} notes + 1 -> {patches} patches, {builds} card builds, "
+                  f"{'cards reused' if reused else 'cards replaced'}")
+
+    id_results = [results["id keys", size] for size in args.sizes]
+    failed = (
+        len({patches for patches, _, _ in id_results}) != 1
+        or any(patches > MAX_PATCHES or builds != 1 or not reused for patches, builds, reused in id_results)
+    )
+    if failed:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark for the dashboard's note metadata: memory per note and the cost of
+sorting, filtering and grouping.
+
+Builds N synthetic notes in three forms and measures, with tracemalloc, the
+bytes each holds per note:
+
+- "card dicts": the dicts the dashboard used to cache per note (id, title,
+  snippet, formatted date, color);
+- "Note records": lib.data.note_store.Note, the slotted record;
+- "NoteTable": lib.data.note_table.NoteTable, the NumPy columns (no snippet).
+
+Then times the dashboard's queries (newest first by creation date, one
+color only, count per color, count per day) in Python over the Note
+records and vectorized over the NoteTable. Exits with status 1 if the table
+uses more memory than the dicts or its queries are not faster.
+
+    python benchmarks/bench_note_memory.py [--notes 1000000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.data.note_store import Note
+from lib.data.note_table import NoteTable, DEFAULT_PALETTE
+
+WORDS = (
+    "meeting notes project plan design review weekly sync roadmap budget "
+    "draft ideas research report summary retro sprint goals travel recipe"
+).split()
+COLORS = DEFAULT_PALETTE + ("#FFFFFF",)
+START = 1.6e9
+
+
+def make_rows(count, seed=7):
+    """`(id, title, snippet, color, created_at, updated_at)` with fresh strings, like rows from SQLite."""
+    rng = random.Random(seed)
+    for note_id in range(1, count + 1):
+        created = START + rng.random() * 1e8
+        title = " ".join(rng.sample(WORDS, rng.randint(1, 4))).capitalize()
+        snippet = f"{title} and some more text about note {note_id}"
+        yield note_id, title, snippet, rng.choice(COLORS), created, created + rng.random() * 1e6
+
+
+def card_dict(row):
+    note_id, title, snippet, color, _, updated_at = row
+    return {
+        "id": note_id,
+        "title": title,
+        "note": snippet,
+        "date": time.strftime("%d %b", time.localtime(updated_at)),
+        "color": color,
+    }
+
+
+def measure(build):
+    """Bytes retained by `build()`'s result."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def python_queries(notes, color):
+    by_created = [note.id for note in sorted(notes, key=lambda note: (note.created_at, note.id), reverse=True)]
+    filtered = [note.id for note in sorted(
+        (note for note in notes if note.color == color), key=lambda note: (note.updated_at, note.id), reverse=True
+    )]
+    per_color = Counter(note.color for note in notes)
+    per_day = Counter(int(note.updated_at // 86400) for note in notes)
+    return by_created, filtered, per_color, per_day
+
+
+def table_queries(table, color):
+    by_created = table.select(by="created_at")
+    mask = table.mask(color=color)
+    filtered = table.ids[table.order(mask=mask)]
+    return by_created, filtered, table.count_by_color(), table.count_by_day()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.notes
+
+    cards, dict_bytes = measure(lambda: [card_dict(row) for row in make_rows(n)])
+    print(f"card dicts:   {dict_bytes / n:7.1f} bytes/note")
+    del cards
+    notes, note_bytes = measure(lambda: [Note(*row) for row in make_rows(n)])
+    print(f"Note records: {note_bytes / n:7.1f} bytes/note")
+    table, table_bytes = measure(lambda: NoteTable((row[0], row[1], row[3], row[4], row[5]) for row in make_rows(n)))
+    print(f"NoteTable:    {table_bytes / n:7.1f} bytes/note ({table.nbytes() / n:.1f} in columns)")
+
+    color = DEFAULT_PALETTE[0]
+    expected, python_ms = timed(lambda: python_queries(notes, color), repeat=1)
+    result, table_ms = timed(lambda: table_queries(table, color))
+    print(f"sort + filter + group, {n} notes: python {python_ms:.1f} ms, NoteTable {table_ms:.1f} ms")
+
+    failed = False
+    if result[0].tolist() != expected[0] or result[1].tolist() != expected[1]:
+        print("query results differ")
+        failed = True
+    if result[2] != {c: expected[2].get(c, 0) for c in table.palette}:
+        print("color counts differ")
+        failed = True
+    if sorted(result[3].values()) != sorted(expected[3].values()):
+        print("day counts differ")
+        failed = True
+    if table_bytes >= dict_bytes or table_ms >= python_ms:
+        failed = True
+    if failed:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
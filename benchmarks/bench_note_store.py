@@ -0,0 +1,106 @@
+"""
+Benchmark for lib/data/note_store.py.
+
+Fills a fresh database with 100k notes (batched inserts) and times the
+dashboard page query and full-text search. Exits with status 1 if the
+median dashboard query misses 50ms or the median search misses 20ms.
+
+    python benchmarks/bench_note_store.py [--notes 100000] [--runs 50]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.data.note_store import NoteStore, DASHBOARD_PAGE_SIZE, SEARCH_LIMIT
+
+TARGET_MS = 50.0
+SEARCH_TARGET_MS = 20.0
+COLORS = ["#FFAB91", "#CE93D8", "#4DD0E1", "#FFF176", "#80CBC4"]
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+# A larger vocabulary with a skewed distribution, so search sees both rare
+# and very common terms.
+VOCABULARY = [f"{random.choice(WORDS)[:3]}{i:x}" for i in range(20_000)]
+VOCABULARY_WEIGHTS = [1.0 / (rank + 1) for rank in range(len(VOCABULARY))]
+SEARCH_QUERIES = ["lorem", "dolor sit", "tempor elit", "ips", "note 4242"]
+
+
+def make_notes(count, batch_size=5000):
+    now = time.time()
+    for start in range(0, count, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, count)):
+            text = " ".join(random.choices(WORDS, k=30) + random.choices(VOCABULARY, VOCABULARY_WEIGHTS, k=30))
+            ts = now - random.uniform(0, 365 * 86400)
+            batch.append({
+                "title": f"Note {i}",
+                "snippet": text[:120],
+                "color": random.choice(COLORS),
+                "body": f"<h1>Note {i}</h1><p>{text}</p>" * 8,
+                "created_at": ts,
+                "updated_at": ts,
+            })
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NoteStore(os.path.join(tmp, "bench.db"))
+
+        start = time.perf_counter()
+        for batch in make_notes(args.notes):
+            store.create_notes(batch)
+        insert_s = time.perf_counter() - start
+        print(f"insert: {args.notes} notes in {insert_s:.2f}s ({args.notes / insert_s:,.0f} notes/s)")
+
+        timings = []
+        for run in range(args.runs):
+            offset = 0 if run % 2 == 0 else random.randrange(0, max(1, args.notes - DASHBOARD_PAGE_SIZE))
+            start = time.perf_counter()
+            rows = store.list_notes(limit=DASHBOARD_PAGE_SIZE, offset=offset)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert len(rows) == min(DASHBOARD_PAGE_SIZE, args.notes)
+
+        search_timings = []
+        queries = SEARCH_QUERIES + random.sample(VOCABULARY[:2000], 20)
+        for run in range(args.runs):
+            query = queries[run % len(queries)]
+            start = time.perf_counter()
+            store.search(query)
+            search_timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        store.update_bodies((note_id, "<p>edited</p>") for note_id in range(1, 1001))
+        update_ms = (time.perf_counter() - start) * 1000
+        store.close()
+
+    median = statistics.median(timings)
+    p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+    print(f"dashboard query ({DASHBOARD_PAGE_SIZE} rows): median {median:.2f}ms, p95 {p95:.2f}ms (target < {TARGET_MS:.0f}ms)")
+    search_median = statistics.median(search_timings)
+    search_p95 = sorted(search_timings)[int(len(search_timings) * 0.95) - 1]
+    print(f"search (top {SEARCH_LIMIT}): median {search_median:.2f}ms, p95 {search_p95:.2f}ms (target < {SEARCH_TARGET_MS:.0f}ms)")
+    print(f"batched update: 1000 bodies in {update_ms:.2f}ms")
+    failed = False
+    if median >= TARGET_MS:
+        print("FAIL: dashboard query is over budget")
+        failed = True
+    if search_median >= SEARCH_TARGET_MS:
+        print("FAIL: search is over budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
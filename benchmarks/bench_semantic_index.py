@@ -0,0 +1,103 @@
+"""
+Benchmark for lib/ai/semantic_index.py.
+
+Builds the memory-mapped index over synthetic notes (each drawn mostly from
+one of a few hundred topic vocabularies, so related notes exist), then
+times "related notes" and free-text queries and a single-note update.
+
+Exits with status 1 if a query takes 30ms or more at the p95.
+
+    python benchmarks/bench_semantic_index.py [--notes 100000] [--queries 200]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.ai.semantic_index import SemanticIndex
+
+TARGET_MS = 30.0
+TOPICS = 300
+
+
+class _Note:
+    __slots__ = ("id", "title", "body", "updated_at")
+
+    def __init__(self, note_id, title, body):
+        self.id = note_id
+        self.title = title
+        self.body = body
+        self.updated_at = float(note_id)
+
+
+def make_notes(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    common = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 8))) for _ in range(3000)]
+    topics = [[
+        "".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(40)
+    ] for _ in range(TOPICS)]
+    for note_id in range(1, count + 1):
+        topic = topics[rng.randrange(TOPICS)]
+        words = [rng.choice(topic) if rng.random() < 0.4 else rng.choice(common) for _ in range(rng.randint(30, 150))]
+        yield _Note(note_id, " ".join(words[:3]), "<p>" + " ".join(words) + "</p>")
+
+
+def percentile_95(values):
+    return statistics.quantiles(values, n=20)[18]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(4)
+    with tempfile.TemporaryDirectory(prefix="semantic_") as directory:
+        index = SemanticIndex(os.path.join(directory, "semantic"))
+        start = time.perf_counter()
+        batch = []
+        for note in make_notes(args.notes):
+            batch.append(note)
+            if len(batch) == 5000:
+                index.upsert_notes(batch)
+                batch = []
+        index.upsert_notes(batch)
+        index.flush()
+        print(f"built {len(index)} vectors in {time.perf_counter() - start:.1f} s, "
+              f"{index.nbytes() / 1e6:.1f} MB on disk")
+
+        related, searches = [], []
+        for _ in range(args.queries):
+            note_id = rng.randint(1, args.notes)
+            start = time.perf_counter()
+            index.related(note_id)
+            related.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            index.search("meeting notes about the project plan")
+            searches.append((time.perf_counter() - start) * 1000)
+
+        note = next(make_notes(1, seed=99))
+        note.id = rng.randint(1, args.notes)
+        start = time.perf_counter()
+        index.upsert_notes([note])
+        update_ms = (time.perf_counter() - start) * 1000
+
+        print(f"related: median {statistics.median(related):.1f} ms, p95 {percentile_95(related):.1f} ms")
+        print(f"search:  median {statistics.median(searches):.1f} ms, p95 {percentile_95(searches):.1f} ms")
+        print(f"update one note: {update_ms:.1f} ms")
+        index.close()
+
+    if max(percentile_95(related), percentile_95(searches)) >= TARGET_MS:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Startup benchmark: time to the dashboard's first paint.
+
+Each run starts a fresh interpreter that does what `python lib/main.py` does
+up to the window opening: imports lib/main.py, sets the theme and root
+widget, and performs the framework's initial render (build, reconcile and
+HTML/CSS/JS generation of the dashboard). That render is what the window
+paints first, so its end is taken as "first paint".
+
+Also checks that the modules deferred to first use (the Markdown converter,
+markdownify/BeautifulSoup, matplotlib, the editor screen and editor state)
+are not imported by then.
+
+Exits with status 1 if a deferred module was imported, the median exceeds
+--budget-ms, or it regresses more than --tolerance against --baseline.
+
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 1500]
+                                       [--baseline FILE] [--save-baseline FILE]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be loaded before the dashboard is painted.
+DEFERRED_MODULES = [
+    "markdown",
+    "markdownify",
+    "bs4",
+    "matplotlib",
+    "screens.note_editor_screen",
+    "lib.screens.note_editor_screen",
+    "plugins.markdown.editor_state",
+    "lib.ai.semantic_index",
+]
+
+CHILD = r"""
+import os, sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, os.path.join(ROOT, "lib"))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main
+from pythra import Framework, Key
+
+imported = time.perf_counter()
+app = Framework.instance()
+app.set_theme(main.initial_theme)
+app.set_root(main.Main(key=Key("home_page_wrapper")))
+app._perform_initial_render(app.root_widget, "startup benchmark")
+painted = time.perf_counter()
+
+print("@@" + json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_paint_ms": (painted - start) * 1000,
+    "deferred_loaded": [name for name in DEFERRED if name in sys.modules],
+}))
+"""
+
+
+def run_once():
+    code = f"ROOT = {ROOT!r}\nDEFERRED = {DEFERRED_MODULES!r}\n" + CHILD
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+    wall_ms = (time.perf_counter() - start) * 1000
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@"):
+            result = json.loads(line[2:])
+            result["process_ms"] = wall_ms
+            return result
+    sys.stderr.write(proc.stdout[-2000:] + proc.stderr[-4000:])
+    raise SystemExit("startup run failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--baseline", help="JSON file from --save-baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline")
+    parser.add_argument("--save-baseline", help="write the median first-paint time to this file")
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    paint_ms = statistics.median(r["first_paint_ms"] for r in results)
+    process_ms = statistics.median(r["process_ms"] for r in results)
+    print(f"imports: {import_ms:.1f} ms, first paint: {paint_ms:.1f} ms, "
+          f"with interpreter start: {process_ms:.1f} ms (median of {args.runs})")
+
+    failed = False
+    loaded = sorted({name for r in results for name in r["deferred_loaded"]})
+    if loaded:
+        print(f"deferred modules imported before first paint: {', '.join(loaded)}")
+        failed = True
+    if paint_ms > args.budget_ms:
+        print(f"first paint over budget ({args.budget_ms:.0f} ms)")
+        failed = True
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_ms = json.load(f)["first_paint_ms"]
+        limit = baseline_ms * (1 + args.tolerance)
+        print(f"baseline: {baseline_ms:.1f} ms, limit {limit:.1f} ms")
+        if paint_ms > limit:
+            failed = True
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"first_paint_ms": paint_ms, "import_ms": import_ms}, f, indent=2)
+
+    if failed:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark for lib/ai/summarizer.py.
+
+Summarizes a synthetic note (words drawn from a Zipf-like vocabulary, 8 to
+30 words per sentence) through the local backend's Summarize action, with
+BLAS limited to one thread.
+
+Exits with status 1 if the median run over a 50k-word note takes 500ms or
+more.
+
+    python benchmarks/bench_summarizer.py [--words 50000] [--runs 5]
+"""
+import os
+
+# One core: set before NumPy loads its BLAS.
+for _variable in ("OPENBLAS_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_variable, "1")
+
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.ai.backends import LocalBackend, GenerationRequest, split_sentences
+
+TARGET_MS = 500.0
+
+
+def make_note(words: int, seed: int = 5) -> str:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(8000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    drawn = rng.choices(vocabulary, weights, k=words)
+    sentences, i = [], 0
+    while i < len(drawn):
+        length = rng.randint(8, 30)
+        sentences.append(" ".join(drawn[i:i + length]).capitalize() + ".")
+        i += length
+    return " ".join(sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    note = make_note(args.words)
+    request = GenerationRequest("Serious", "Summarize", note)
+    backend = LocalBackend()
+
+    timings, summary = [], ""
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        summary = backend.generate(request, lambda: False)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    median = statistics.median(timings)
+    print(f"{args.words} words, {len(split_sentences(note))} sentences -> "
+          f"{len(split_sentences(summary))} sentences")
+    print(f"summarize: median {median:.1f} ms, best {min(timings):.1f} ms (target < {TARGET_MS:.0f} ms)")
+    if median >= TARGET_MS:
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
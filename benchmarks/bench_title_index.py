@@ -0,0 +1,73 @@
+"""
+Benchmark for lib/data/title_index.py.
+
+Indexes 200k synthetic note titles and replays quick-open sessions: every
+prefix of a query is looked up as if typed key by key, including queries
+with typos. Exits with status 1 if the median or p95 lookup misses the 5ms
+per-keystroke target.
+
+    python benchmarks/bench_title_index.py [--titles 200000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.data.title_index import TitleIndex
+
+TARGET_MS = 5.0
+WORDS = (
+    "meeting notes project plan design review weekly sync roadmap budget "
+    "draft ideas research report summary retro sprint goals travel recipe "
+    "grocery list journal reading book lecture homework invoice contract "
+    "interview feedback release launch marketing sales hiring onboarding"
+).split()
+QUERIES = ["meeting notes", "weekly retro", "design reveiw", "prjoect plan", "invoice 2024", "onboarding"]
+
+
+def make_titles(count):
+    for note_id in range(1, count + 1):
+        words = random.sample(WORDS, random.randint(1, 4))
+        if random.random() < 0.3:
+            words.append(str(random.randint(2000, 2030)))
+        yield note_id, " ".join(words).capitalize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=200_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = TitleIndex(make_titles(args.titles))
+    build_s = time.perf_counter() - start
+    print(f"build: {args.titles} titles in {build_s:.2f}s")
+
+    timings = []
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            start = time.perf_counter()
+            index.search(query[:end])
+            timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for note_id in random.sample(range(1, args.titles + 1), 1000):
+        index.add(note_id, f"Renamed note {note_id}")
+    rename_ms = (time.perf_counter() - start) * 1000
+
+    median = statistics.median(timings)
+    p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+    print(f"keystroke lookup: median {median:.2f}ms, p95 {p95:.2f}ms, max {max(timings):.2f}ms (target < {TARGET_MS:.0f}ms)")
+    print(f"rename: 1000 titles in {rename_ms:.2f}ms")
+    print(f"sample: {index.search('design reveiw', limit=3)}")
+    if median >= TARGET_MS or p95 >= TARGET_MS:
+        print("FAIL: lookup is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
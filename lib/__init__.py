@@ -4,5 +4,3 @@ import sys
 # Add the project root directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 print("dir: ", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from plugins.markdown import widget
\ No newline at end of file
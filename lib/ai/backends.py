@@ -0,0 +1,215 @@
+# lib/ai/backends.py
+"""
+Generation backends for the editor's AI actions.
+
+A backend turns a `GenerationRequest` (the selected text, the tone "mode"
+and the action, e.g. "Summarize") into Markdown. `generate()` returns it
+whole; `stream()` yields it in pieces as they are produced (by default the
+whole result at once). Both are blocking and always run on an AiEngine
+worker thread (see engine.py); they should call `is_cancelled()` between
+units of work and raise `GenerationCancelled` once it returns True.
+
+Bundled backends (pick one with `ai_backend` in config.yaml):
+- "local": an offline, rule-based stand-in for a model. It summarizes by
+  extracting the most central sentences (TextRank, see summarizer.py),
+  expands a passage into one bullet point per sentence, and rewrites by
+  adjusting contractions and a few words to the tone. It cannot translate.
+- "fake": waits a fixed latency and returns a placeholder, for exercising
+  the UI (spinner, cancellation, concurrent requests).
+"""
+import re
+import time
+from typing import Callable, Dict, Iterator, List, Type
+
+from lib.ai import summarizer
+
+DEFAULT_BACKEND = "local"
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=\S)")
+
+# Tones that prefer spelled-out forms vs. contractions.
+_FORMAL_MODES = {"Serious", "Professional", "Formal"}
+_CASUAL_MODES = {"Casual", "Friendly", "Informal", "Playful"}
+
+_CONTRACTIONS = {
+    "do not": "don't",
+    "does not": "doesn't",
+    "did not": "didn't",
+    "is not": "isn't",
+    "are not": "aren't",
+    "was not": "wasn't",
+    "cannot": "can't",
+    "will not": "won't",
+    "would not": "wouldn't",
+    "should not": "shouldn't",
+    "it is": "it's",
+    "that is": "that's",
+    "we are": "we're",
+    "they are": "they're",
+    "I am": "I'm",
+    "I will": "I'll",
+    "we will": "we'll",
+}
+
+_REPHRASINGS = {
+    "a lot of": "many",
+    "get": "obtain",
+    "big": "large",
+    "start": "begin",
+    "show": "demonstrate",
+    "need": "require",
+    "try": "attempt",
+    "about": "approximately",
+    "enough": "sufficient",
+}
+
+
+class GenerationCancelled(Exception):
+    """Raised by a backend that noticed its request was cancelled."""
+
+
+class GenerationError(Exception):
+    """Raised by a backend that cannot handle a request."""
+
+
+class GenerationRequest:
+    """What to generate: `action` (e.g. "Summarize") applied to `text` in the tone `mode`."""
+
+    __slots__ = ("mode", "action", "text")
+
+    def __init__(self, mode: str, action: str, text: str):
+        self.mode = mode
+        self.action = action
+        self.text = text
+
+    def __repr__(self):
+        return f"GenerationRequest(mode={self.mode!r}, action={self.action!r}, text={len(self.text)} chars)"
+
+
+class GenerationBackend:
+    """Interface of a generation backend. `id` names it in config.yaml and in cache keys."""
+
+    id = ""
+
+    def generate(self, request: GenerationRequest, is_cancelled: Callable[[], bool]) -> str:
+        """Returns the Markdown that replaces the selection. Runs on a worker thread."""
+        raise NotImplementedError
+
+    def stream(self, request: GenerationRequest, is_cancelled: Callable[[], bool]) -> Iterator[str]:
+        """Yields the Markdown in pieces. Backends that can produce partial output override this."""
+        yield self.generate(request, is_cancelled)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_RE.split(text.strip()) if sentence.strip()]
+
+
+def _replace_words(text: str, table: Dict[str, str]) -> str:
+    for source, target in table.items():
+        pattern = re.compile(rf"\b{re.escape(source)}\b", re.IGNORECASE)
+        text = pattern.sub(lambda m, t=target: t[0].upper() + t[1:] if m.group(0)[0].isupper() else t, text)
+    return text
+
+
+class LocalBackend(GenerationBackend):
+    """Offline rule-based stand-in; see the module docstring."""
+
+    id = "local"
+
+    def generate(self, request: GenerationRequest, is_cancelled: Callable[[], bool]) -> str:
+        sentences = split_sentences(request.text)
+        if not sentences:
+            return ""
+        action = request.action
+        if action == "Summarize":
+            result = self._summarize(sentences, is_cancelled)
+        elif action == "Expand":
+            result = self._expand(sentences, is_cancelled)
+        elif action in ("Rewrite", "Paraphrase", "Rephrase"):
+            result = self._rewrite(sentences, request.mode, action != "Rewrite", is_cancelled)
+        else:
+            raise GenerationError(f"The local backend cannot {action.lower()} text.")
+        return result
+
+    def stream(self, request: GenerationRequest, is_cancelled: Callable[[], bool]) -> Iterator[str]:
+        # The rules are cheap; the result is produced whole and handed out by line.
+        yield from self.generate(request, is_cancelled).splitlines(keepends=True)
+
+    @staticmethod
+    def _check(is_cancelled: Callable[[], bool]):
+        if is_cancelled():
+            raise GenerationCancelled()
+
+    def _summarize(self, sentences: List[str], is_cancelled) -> str:
+        # One vectorized pass; a 50k-word note takes well under a second.
+        self._check(is_cancelled)
+        return summarizer.summarize(sentences)
+
+    def _expand(self, sentences: List[str], is_cancelled) -> str:
+        lines = [" ".join(sentences), ""]
+        for sentence in sentences:
+            self._check(is_cancelled)
+            lines.append(f"- {sentence}")
+        return "\n".join(lines)
+
+    def _rewrite(self, sentences: List[str], mode: str, rephrase: bool, is_cancelled) -> str:
+        rewritten = []
+        for sentence in sentences:
+            self._check(is_cancelled)
+            if mode in _FORMAL_MODES:
+                sentence = _replace_words(sentence, {v: k for k, v in _CONTRACTIONS.items()})
+            elif mode in _CASUAL_MODES:
+                sentence = _replace_words(sentence, _CONTRACTIONS)
+            if rephrase:
+                sentence = _replace_words(sentence, _REPHRASINGS)
+            rewritten.append(sentence)
+        return " ".join(rewritten)
+
+
+class FakeLatencyBackend(GenerationBackend):
+    """Sleeps `latency` seconds (in small, cancellable steps) and returns a placeholder."""
+
+    id = "fake"
+
+    def __init__(self, latency: float = 3.0):
+        self.latency = latency
+
+    def generate(self, request: GenerationRequest, is_cancelled: Callable[[], bool]) -> str:
+        deadline = time.monotonic() + self.latency
+        while time.monotonic() < deadline:
+            if is_cancelled():
+                raise GenerationCancelled()
+            time.sleep(min(0.05, max(0.0, deadline - time.monotonic())))
+        return self._placeholder(request)
+
+    @staticmethod
+    def _placeholder(request: GenerationRequest) -> str:
+        return f"Generated: {request.mode or 'None'} mode: {request.action or 'None'} action."
+
+    def stream(self, request: GenerationRequest, is_cancelled: Callable[[], bool]) -> Iterator[str]:
+        # The placeholder word by word, spread over the latency.
+        words = self._placeholder(request).split(" ")
+        for i, word in enumerate(words):
+            if is_cancelled():
+                raise GenerationCancelled()
+            time.sleep(self.latency / len(words))
+            yield word if i == 0 else " " + word
+
+
+BACKENDS: Dict[str, Type[GenerationBackend]] = {
+    LocalBackend.id: LocalBackend,
+    FakeLatencyBackend.id: FakeLatencyBackend,
+}
+
+_instances: Dict[str, GenerationBackend] = {}
+
+
+def get_backend(name: str = DEFAULT_BACKEND) -> GenerationBackend:
+    """Returns the shared instance of backend `name` (the default one if `name` is unknown)."""
+    if name not in BACKENDS:
+        print(f"Warning: unknown AI backend {name!r}; using {DEFAULT_BACKEND!r}.")
+        name = DEFAULT_BACKEND
+    backend = _instances.get(name)
+    if backend is None:
+        backend = _instances[name] = BACKENDS[name]()
+    return backend
@@ -0,0 +1,205 @@
+# lib/ai/chunking.py
+"""
+Map-reduce processing of AI actions on long selections.
+
+A long selection is not sent to the backend in one call. It is split into
+chunks of at most `max_words` words (a longer single paragraph stays whole),
+and a new chunk starts at every heading. The selected text is plain text,
+one line per block of the note, so the editor HTML tells us which lines
+are headings and at what level.
+
+Map: every chunk is submitted to the shared `AiEngine`, so chunks run at
+most `ai_workers` at a time, alongside other editors' requests.
+
+Reduce, once all chunks are back:
+- Summarize: the partial summaries are summarized again in one more call.
+- Anything else (Rewrite, Translate, ...): the results are joined in order,
+  each under its chunk's heading, as Markdown.
+"""
+import re
+import html as html_lib
+from typing import Callable, Dict, List, Optional
+
+from lib.ai.backends import GenerationBackend, GenerationRequest
+from lib.ai.engine import AiEngine, AiJob
+
+DEFAULT_CHUNK_WORDS = 800
+# Actions whose partial results are combined by running the action again.
+RESUMMARIZE_ACTIONS = {"Summarize"}
+
+_HEADING_RE = re.compile(r"<h([1-6])\b[^>]*>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+class Chunk:
+    """Consecutive paragraphs of the selection, under the heading that opened them (if any)."""
+
+    __slots__ = ("heading", "level", "paragraphs", "words")
+
+    def __init__(self, heading: Optional[str] = None, level: int = 0):
+        self.heading = heading
+        self.level = level
+        self.paragraphs: List[str] = []
+        self.words = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.paragraphs)
+
+    def __repr__(self):
+        return f"Chunk(heading={self.heading!r}, paragraphs={len(self.paragraphs)}, words={self.words})"
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def heading_levels(note_html: str) -> Dict[str, int]:
+    """Maps the text of every heading in the editor HTML to its level."""
+    levels: Dict[str, int] = {}
+    for match in _HEADING_RE.finditer(note_html):
+        text = _normalize(html_lib.unescape(_TAG_RE.sub("", match.group(2))))
+        if text:
+            levels.setdefault(text, int(match.group(1)))
+    return levels
+
+
+def split_selection(text: str, headings: Dict[str, int], max_words: int = DEFAULT_CHUNK_WORDS) -> List[Chunk]:
+    """
+    Splits the selected text into chunks at headings and, past `max_words`,
+    at paragraph boundaries. Lines matching a key of `headings` are headings.
+    """
+    chunks: List[Chunk] = []
+    current = Chunk()
+    for line in text.splitlines():
+        paragraph = _normalize(line)
+        if not paragraph:
+            continue
+        level = headings.get(paragraph)
+        if level is not None:
+            if current.paragraphs or current.heading:
+                chunks.append(current)
+            current = Chunk(paragraph, level)
+            continue
+        words = len(paragraph.split())
+        if current.paragraphs and current.words + words > max_words:
+            chunks.append(current)
+            current = Chunk()
+        current.paragraphs.append(paragraph)
+        current.words += words
+    if current.paragraphs or current.heading:
+        chunks.append(current)
+    return chunks
+
+
+class ChunkedJob:
+    """
+    One action over several chunks; see the module docstring. Same handle
+    interface as `AiJob` (`cancel()`, `cancelled`, `text()`).
+
+    All callbacks run on the UI thread: `on_progress(done, total)` after each
+    finished step, then either `on_done(markdown)` or, for the first failure,
+    `on_error(exception)`.
+    """
+
+    def __init__(
+        self,
+        engine: AiEngine,
+        backend: GenerationBackend,
+        request: GenerationRequest,
+        chunks: List[Chunk],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        on_done: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        self.engine = engine
+        self.backend = backend
+        self.request = request
+        self.chunks = chunks
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.resummarize = request.action in RESUMMARIZE_ACTIONS and len(chunks) > 1
+        # One step per chunk, plus the final summary of the summaries.
+        self.total = len(chunks) + (1 if self.resummarize else 0)
+        self.done = 0
+        self.results: List[Optional[str]] = [None] * len(chunks)
+        self.result: Optional[str] = None
+        self._jobs: List[AiJob] = []
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+        for job in self._jobs:
+            job.cancel()
+
+    def text(self) -> str:
+        """The reduced result ('' until it is ready)."""
+        return self.result or ""
+
+    def start(self) -> "ChunkedJob":
+        """Map: submits every chunk to the engine."""
+        empty = []
+        for index, chunk in enumerate(self.chunks):
+            if not chunk.paragraphs:
+                # A heading with nothing under it: kept as is.
+                empty.append(index)
+                continue
+            request = GenerationRequest(self.request.mode, self.request.action, chunk.text)
+            self._jobs.append(self.engine.submit(
+                self.backend,
+                request,
+                on_done=lambda result, index=index: self._chunk_done(index, result),
+                on_error=self._failed,
+            ))
+        for index in empty:
+            self._chunk_done(index, "")
+        return self
+
+    def _step(self):
+        self.done += 1
+        if self.on_progress:
+            self.on_progress(self.done, self.total)
+
+    def _chunk_done(self, index: int, result: str):
+        if self._cancelled:
+            return
+        self.results[index] = result.strip()
+        self._step()
+        if any(part is None for part in self.results):
+            return
+        if self.resummarize:
+            request = GenerationRequest(self.request.mode, self.request.action, "\n".join(self.results))
+            self._jobs.append(self.engine.submit(self.backend, request, on_done=self._reduced, on_error=self._failed))
+        else:
+            self._reduced(self._join())
+
+    def _join(self) -> str:
+        parts = []
+        for chunk, result in zip(self.chunks, self.results):
+            if chunk.heading:
+                parts.append(f"{'#' * chunk.level} {chunk.heading}")
+            if result:
+                parts.append(result)
+        return "\n\n".join(parts)
+
+    def _reduced(self, result: str):
+        if self._cancelled:
+            return
+        if self.resummarize:
+            self._step()
+        self.result = result
+        if self.on_done:
+            self.on_done(result)
+
+    def _failed(self, error: Exception):
+        if self._cancelled:
+            return
+        # The other chunks are useless without this one.
+        self.cancel()
+        if self.on_error:
+            self.on_error(error)
@@ -0,0 +1,188 @@
+# lib/ai/engine.py
+"""
+Runs AI generation requests off the UI thread.
+
+All editors share one `AiEngine` with a small, fixed number of worker
+threads (`ai_workers` in config.yaml), so several requests can be in flight
+at once (one per editor, say) without a long generation starving the
+Pythra thread pool the rest of the app uses. Requests beyond the worker
+count wait in the executor's queue.
+
+`submit()` returns an `AiJob`. The result (or error) is handed to the
+callbacks on the Qt main thread; a job cancelled before that point never
+calls them, and the backend sees the cancellation through `is_cancelled`.
+
+`submit_stream()` runs the backend's `stream()` instead; the job's
+`chunks()` iterator yields the pieces as the worker produces them, for a
+consumer on another thread (e.g. `stream_markdown_into_selection`).
+"""
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from lib.ai.backends import GenerationBackend, GenerationCancelled, GenerationRequest
+
+DEFAULT_WORKERS = 2
+
+# Ends the chunk queue of a streaming job.
+_END = object()
+
+
+class AiJob:
+    """Handle to one submitted request."""
+
+    def __init__(self, backend: GenerationBackend, request: GenerationRequest):
+        self.backend = backend
+        self.request = request
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+        # Streaming jobs only: the pieces produced so far, and the queue
+        # `chunks()` reads them from (an exception object ends it with an error).
+        self.parts: List[str] = []
+        self._queue: "queue.Queue" = queue.Queue()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stops the job: drops it from the queue, or tells the running backend to stop."""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def text(self) -> str:
+        """Everything a streaming job has produced so far."""
+        return "".join(self.parts)
+
+    def chunks(self, poll_interval: float = 0.1) -> Iterator[str]:
+        """
+        Yields a streaming job's pieces until the backend is done. Raises the
+        backend's error, if any; stops early once the job is cancelled.
+        """
+        while not self.cancelled:
+            try:
+                item = self._queue.get(timeout=poll_interval)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+class AiEngine:
+    """Bounded worker pool for generation backends; see the module docstring."""
+
+    _instance: Optional["AiEngine"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "AiEngine":
+        """The app-wide engine, sized by `ai_workers` in config.yaml."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                from pythra import Framework
+                workers = Framework.instance().config.get("ai_workers", DEFAULT_WORKERS)
+                cls._instance = cls(max_workers=workers)
+            return cls._instance
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, dispatch: Optional[Callable[[Callable[[], None]], None]] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ai")
+        # How callbacks reach the UI thread; defaults to Pythra's dispatch_to_main.
+        self._dispatch = dispatch
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "running": 0}
+
+    def submit(
+        self,
+        backend: GenerationBackend,
+        request: GenerationRequest,
+        on_done: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> AiJob:
+        job = AiJob(backend, request)
+        self._count("submitted")
+        job.future = self._executor.submit(self._run, job, on_done, on_error)
+        job.future.add_done_callback(lambda future: self._on_future_done(job))
+        return job
+
+    def submit_stream(self, backend: GenerationBackend, request: GenerationRequest) -> AiJob:
+        """Starts `backend.stream(request)`; read the output from `job.chunks()`."""
+        job = AiJob(backend, request)
+        self._count("submitted")
+        job.future = self._executor.submit(self._run_stream, job)
+        job.future.add_done_callback(lambda future: self._on_future_done(job))
+        return job
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_future_done(self, job: AiJob):
+        # Cancelled while still queued (or dropped by shutdown): the run
+        # method never saw the job, so account for it and end its stream.
+        if job.future.cancelled():
+            self._count("cancelled")
+            job._queue.put(_END)
+
+    def _count(self, name: str, delta: int = 1):
+        with self._lock:
+            self.stats[name] += delta
+
+    def _run(self, job: AiJob, on_done, on_error):
+        if job.cancelled:
+            self._count("cancelled")
+            return None
+        self._count("running")
+        try:
+            result = job.backend.generate(job.request, lambda: job.cancelled)
+        except GenerationCancelled:
+            self._count("cancelled")
+            return None
+        except Exception as e:
+            self._count("failed")
+            self._deliver(job, on_error, e)
+            return None
+        finally:
+            self._count("running", -1)
+        self._count("completed")
+        self._deliver(job, on_done, result)
+        return result
+
+    def _run_stream(self, job: AiJob):
+        if job.cancelled:
+            self._count("cancelled")
+            return
+        self._count("running")
+        try:
+            for piece in job.backend.stream(job.request, lambda: job.cancelled):
+                if job.cancelled:
+                    raise GenerationCancelled()
+                job.parts.append(piece)
+                job._queue.put(piece)
+        except GenerationCancelled:
+            self._count("cancelled")
+        except Exception as e:
+            self._count("failed")
+            job._queue.put(e)
+        else:
+            self._count("completed")
+        finally:
+            self._count("running", -1)
+            job._queue.put(_END)
+
+    def _deliver(self, job: AiJob, callback: Optional[Callable[[Any], None]], value: Any):
+        if callback is None or job.cancelled:
+            return
+        dispatch = self._dispatch
+        if dispatch is None:
+            from pythra import dispatch_to_main as dispatch
+
+        def deliver():
+            # The job may have been cancelled while this call was queued.
+            if not job.cancelled:
+                callback(value)
+
+        dispatch(deliver)
@@ -0,0 +1,163 @@
+# lib/ai/result_cache.py
+"""
+Persistent cache of AI action results.
+
+Re-running an action (say "Summarize" in the "Formal" mode) on text that
+has not changed returns the stored result instead of generating it again.
+Entries are keyed by the backend id, the mode, the action and a SHA-256 of
+the selected text, and live in a small SQLite database next to the notes.
+
+Bounds:
+- TTL: an entry older than `ttl` seconds is never returned and is deleted
+  when met (and at startup).
+- LRU: every hit refreshes the entry's `used` time. Once the cache holds
+  more than `max_entries` results or `max_bytes` of text, the least
+  recently used entries are dropped.
+
+A lookup is one primary-key query and an update of `used`, well under the
+10ms a repeated request may take; `benchmarks/bench_ai_cache.py` checks it.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Optional
+
+from lib.data.note_store import PROJECT_ROOT
+
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, "data", "ai_cache.db")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ai_results_used ON ai_results(used_at);
+"""
+
+_SQL_GET = "SELECT value, created_at FROM ai_results WHERE key = ?"
+_SQL_CREATED = "SELECT created_at FROM ai_results WHERE key = ?"
+_SQL_TOUCH = "UPDATE ai_results SET used_at = ? WHERE key = ?"
+_SQL_PUT = "INSERT OR REPLACE INTO ai_results (key, value, size, created_at, used_at) VALUES (?, ?, ?, ?, ?)"
+_SQL_DELETE = "DELETE FROM ai_results WHERE key = ?"
+_SQL_EXPIRE = "DELETE FROM ai_results WHERE created_at < ?"
+_SQL_TOTALS = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_results"
+_SQL_OLDEST = "SELECT key, size FROM ai_results ORDER BY used_at LIMIT ?"
+_SQL_CLEAR = "DELETE FROM ai_results"
+
+
+def cache_key(backend_id: str, mode: str, action: str, text: str) -> str:
+    """The cache key of one request."""
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{backend_id}\0{mode}\0{action}\0{text_hash}".encode("utf-8")).hexdigest()
+
+
+class AiResultCache:
+    """
+    Thread-safe TTL + LRU cache of generated results; see the module docstring.
+    Results are stored from the AI worker threads and looked up on the UI thread.
+    """
+
+    _instance: Optional["AiResultCache"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "AiResultCache":
+        """The app-wide cache, bounded by the `ai_cache_*` settings in config.yaml."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                from pythra import Framework
+                config = Framework.instance().config
+                cls._instance = cls(
+                    ttl=config.get("ai_cache_ttl_days", DEFAULT_TTL / 86400) * 86400,
+                    max_entries=config.get("ai_cache_max_entries", DEFAULT_MAX_ENTRIES),
+                )
+            return cls._instance
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "expired": 0, "evicted": 0}
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_EXPIRE, (time.time() - self.ttl,))
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the stored result and marks it recently used, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(_SQL_GET, (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value, created_at = row
+            with self._conn:
+                if created_at < now - self.ttl:
+                    self._conn.execute(_SQL_DELETE, (key,))
+                    self.stats["expired"] += 1
+                    self.stats["misses"] += 1
+                    return None
+                self._conn.execute(_SQL_TOUCH, (now, key))
+            self.stats["hits"] += 1
+            return value
+
+    def contains(self, key: str) -> bool:
+        """True if `get(key)` would hit. Does not count as a use."""
+        with self._lock:
+            row = self._conn.execute(_SQL_CREATED, (key,)).fetchone()
+        return row is not None and row[0] >= time.time() - self.ttl
+
+    def put(self, key: str, value: str):
+        """Stores a result, then evicts least recently used entries past the bounds."""
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_PUT, (key, value, size, now, now))
+            self.stats["stores"] += 1
+            count, total = self._conn.execute(_SQL_TOTALS).fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            # Over a bound: walk the LRU end until both hold again.
+            doomed = []
+            for old_key, old_size in self._conn.execute(_SQL_OLDEST, (count,)).fetchall():
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                doomed.append((old_key,))
+                count -= 1
+                total -= old_size
+            self._conn.executemany(_SQL_DELETE, doomed)
+            self.stats["evicted"] += len(doomed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(_SQL_TOTALS).fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_CLEAR)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,367 @@
+# lib/ai/semantic_index.py
+"""
+Offline semantic index over the notes: "related notes" and semantic search.
+
+Every note (title and plain-text body) becomes one `DIMENSIONS`-wide
+float32 vector:
+- features are the note's words and word bigrams (stop words dropped),
+  title words counted `_TITLE_WEIGHT` times. Most bigrams occur once and
+  only add hashing noise, so they weigh `_BIGRAM_WEIGHT` of a word;
+- each feature is hashed (CRC-32, stable across runs) to a column and a
+  sign, so there is no vocabulary to store or grow;
+- column sums are damped to sign(x) * log(1 + |x|) and the row is
+  L2-normalized, so a dot product is a cosine similarity.
+
+Storage: the vectors live in a memory-mapped `.npy` matrix under data/
+(`semantic_vectors.npy`), next to `semantic_rows.npy` holding each row's
+note id (0 = free row) and the `updated_at` it was computed from. Only the
+pages a query touches are read, and the index survives restarts: on
+startup only notes whose `updated_at` changed are embedded again.
+
+Queries are one matrix-vector product over all rows plus an
+`np.argpartition` for the top k; a deleted note's row is zeroed and reused.
+
+The index follows the NoteStore through `NoteStore.add_listener()`.
+Changed notes are queued and re-embedded in one batch before the next
+query, like NoteTable.
+
+Throughput target: a query over 100k notes in under 30ms.
+`benchmarks/bench_semantic_index.py` measures it.
+"""
+import os
+import re
+import zlib
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from lib.ai.summarizer import STOP_WORDS
+from lib.data.note_store import PROJECT_ROOT, text_from_html
+
+DEFAULT_INDEX_PATH = os.path.join(PROJECT_ROOT, "data", "semantic")
+DIMENSIONS = 256
+# Results a query returns by default, and the similarity they must reach.
+RELATED_LIMIT = 8
+MIN_SCORE = 0.15
+
+_ROW_DTYPE = np.dtype([("id", "<i8"), ("updated_at", "<f8")])
+_INITIAL_CAPACITY = 1024
+_TITLE_WEIGHT = 3
+_BIGRAM_WEIGHT = 0.25
+# Hashed features remembered between notes; cleared when it grows past this.
+_FEATURE_CACHE_SIZE = 500_000
+
+_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+
+
+class SemanticIndex:
+    """
+    Thread-safe, persistent vector index of the notes; see the module
+    docstring. Queries may run on a worker thread while store changes
+    arrive on other threads; both sides serialize on an internal lock.
+    """
+
+    _instance: Optional["SemanticIndex"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "SemanticIndex":
+        """
+        Returns the process-wide index over `NoteStore.instance()`. The first
+        call embeds every note changed since the last run (all of them the
+        very first time), so make it from a worker thread.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                from lib.data.note_store import NoteStore
+                cls._instance = cls.for_store(NoteStore.instance())
+            return cls._instance
+
+    @classmethod
+    def for_store(cls, store, path: str = DEFAULT_INDEX_PATH) -> "SemanticIndex":
+        """Opens the index at `path`, catches it up with `store` and follows later changes."""
+        index = cls(path)
+        index._store = store
+        # Subscribe before scanning: notes changed meanwhile are queued and
+        # re-embedded by the next query. Neither the scan nor the embedding
+        # runs under our lock, so writers notifying us do not wait for them.
+        store.add_listener(index._on_store_change)
+        ids, updated = [], []
+        for rows in store.iter_columns():
+            ids.extend(row[0] for row in rows)
+            updated.extend(row[4] for row in rows)
+        index._catch_up(np.asarray(ids, dtype=np.int64), np.asarray(updated, dtype=np.float64))
+        return index
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, dimensions: int = DIMENSIONS):
+        self.path = path
+        self.dimensions = dimensions
+        self._lock = threading.RLock()
+        self._store = None
+        self._pending: Set[int] = set()
+        # Stale notes a catch-up pass is embedding; a store change drops the
+        # note, so the pass does not store a vector of an older version.
+        self._catching_up: Set[int] = set()
+        self._features: Dict[str, int] = {}
+        self._open()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return int(np.count_nonzero(self.rows["id"][:self._size]))
+
+    # --- Embedding ---
+
+    def _feature(self, feature: str) -> int:
+        """Column of `feature`, negated (as ~column) when its sign is negative."""
+        code = self._features.get(feature)
+        if code is None:
+            if len(self._features) >= _FEATURE_CACHE_SIZE:
+                self._features.clear()
+            digest = zlib.crc32(feature.encode("utf-8"))
+            column = digest % self.dimensions
+            code = self._features[feature] = column if digest & 0x80000000 else ~column
+        return code
+
+    def embed(self, text: str, title: str = "") -> np.ndarray:
+        """The unit-length feature vector of a text (zeros if it has no words)."""
+        words = [word for word in _WORD_RE.findall((f"{title} " * _TITLE_WEIGHT + text).lower())
+                 if word not in STOP_WORDS]
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if not words:
+            return vector
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        codes = np.fromiter((self._feature(feature) for feature in features), dtype=np.int64, count=len(features))
+        weights = np.full(len(features), _BIGRAM_WEIGHT)
+        weights[:len(words)] = 1.0
+        negative = codes < 0
+        columns = np.where(negative, ~codes, codes)
+        sums = np.bincount(columns, weights=np.where(negative, -weights, weights), minlength=self.dimensions)
+        vector[:] = np.sign(sums) * np.log1p(np.abs(sums))
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+    def embed_note(self, note) -> np.ndarray:
+        return self.embed(text_from_html(note.body or ""), note.title)
+
+    # --- Updates ---
+
+    def upsert(self, entries: Iterable[Tuple[int, float, np.ndarray]]):
+        """Stores `(note_id, updated_at, vector)` entries, replacing earlier vectors of those notes."""
+        with self._lock:
+            # The last entry of a note wins.
+            entries = list({entry[0]: entry for entry in entries}.values())
+            if not entries:
+                return
+            ids = np.fromiter((entry[0] for entry in entries), dtype=np.int64, count=len(entries))
+            rows = self._rows_of(ids)
+            for i in np.flatnonzero(rows < 0).tolist():
+                rows[i] = self._free.pop() if self._free else self._append()
+            self.vectors[rows] = np.stack([entry[2] for entry in entries])
+            self.rows["id"][rows] = ids
+            self.rows["updated_at"][rows] = [entry[1] for entry in entries]
+
+    def upsert_notes(self, notes: Iterable):
+        """Embeds and stores `Note`s (with bodies)."""
+        self.upsert([(note.id, note.updated_at, self.embed_note(note)) for note in notes])
+
+    def remove(self, note_id: int):
+        with self._lock:
+            self._pending.discard(note_id)
+            row = self._row_of(note_id)
+            if row is not None:
+                self._clear([row])
+
+    def flush(self):
+        """Writes changed pages of the memory maps back to disk."""
+        with self._lock:
+            if self.path == ":memory:":
+                return
+            self.vectors.flush()
+            self.rows.flush()
+
+    def close(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.remove_listener(self._on_store_change)
+                self._store = None
+            self.flush()
+            self.vectors = self.rows = None
+
+    def _on_store_change(self, change: str, note_id: int, title: Optional[str] = None):
+        with self._lock:
+            self._catching_up.discard(note_id)
+            if change == "deleted":
+                self.remove(note_id)
+            else:
+                self._pending.add(note_id)
+
+    # --- Queries ---
+
+    def related(self, note_id: int, k: int = RELATED_LIMIT, min_score: float = MIN_SCORE) -> List[Tuple[int, float]]:
+        """`(note_id, similarity)` of the notes most similar to `note_id`, best first."""
+        with self._lock:
+            self._sync()
+            row = self._row_of(note_id)
+            if row is None:
+                return []
+            return self._top(np.array(self.vectors[row]), k, min_score, exclude=row)
+
+    def search(self, text: str, k: int = RELATED_LIMIT, min_score: float = MIN_SCORE) -> List[Tuple[int, float]]:
+        """`(note_id, similarity)` of the notes most similar to a free-text query, best first."""
+        vector = self.embed(text.lower())
+        with self._lock:
+            self._sync()
+            return self._top(vector, k, min_score)
+
+    def nbytes(self) -> int:
+        """Size of the vector and row files."""
+        with self._lock:
+            return self.vectors.nbytes + self.rows.nbytes
+
+    # --- Internals (callers hold self._lock) ---
+
+    def _files(self) -> Tuple[str, str]:
+        return f"{self.path}_vectors.npy", f"{self.path}_rows.npy"
+
+    def _open(self):
+        vectors_path, rows_path = self._files()
+        if self.path != ":memory:" and os.path.exists(vectors_path) and os.path.exists(rows_path):
+            try:
+                vectors = np.load(vectors_path, mmap_mode="r+")
+                rows = np.load(rows_path, mmap_mode="r+")
+                if vectors.shape[1:] == (self.dimensions,) and rows.dtype == _ROW_DTYPE and len(rows) == len(vectors):
+                    self.vectors, self.rows = vectors, rows
+                    used = np.flatnonzero(rows["id"])
+                    self._size = int(used[-1]) + 1 if len(used) else 0
+                    self._free = np.flatnonzero(rows["id"][:self._size] == 0).tolist()
+                    return
+            except (OSError, ValueError) as e:
+                print(f"Warning: rebuilding the semantic index. Error: {e}")
+        self._allocate(_INITIAL_CAPACITY)
+        self._size = 0
+        self._free: List[int] = []
+
+    def _allocate(self, capacity: int):
+        """(Re)creates the memory maps with `capacity` rows, keeping the first `_size`."""
+        if self.path == ":memory:":
+            vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            rows = np.zeros(capacity, dtype=_ROW_DTYPE)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            vectors_path, rows_path = self._files()
+            vectors = np.lib.format.open_memmap(vectors_path + ".tmp", mode="w+", dtype=np.float32,
+                                                shape=(capacity, self.dimensions))
+            rows = np.lib.format.open_memmap(rows_path + ".tmp", mode="w+", dtype=_ROW_DTYPE, shape=(capacity,))
+        size = getattr(self, "_size", 0)
+        if size:
+            vectors[:size] = self.vectors[:size]
+            rows[:size] = self.rows[:size]
+        if self.path != ":memory:":
+            vectors.flush()
+            rows.flush()
+            # Drop the old maps before replacing their files (required on Windows).
+            self.vectors = self.rows = None
+            os.replace(vectors_path + ".tmp", vectors_path)
+            os.replace(rows_path + ".tmp", rows_path)
+            vectors = np.load(vectors_path, mmap_mode="r+")
+            rows = np.load(rows_path, mmap_mode="r+")
+        self.vectors, self.rows = vectors, rows
+
+    def _append(self) -> int:
+        if self._size == len(self.rows):
+            self._allocate(2 * len(self.rows))
+        self._size += 1
+        return self._size - 1
+
+    def _row_of(self, note_id: int) -> Optional[int]:
+        rows = np.flatnonzero(self.rows["id"][:self._size] == note_id)
+        return int(rows[0]) if len(rows) else None
+
+    def _rows_of(self, note_ids: np.ndarray) -> np.ndarray:
+        """Rows of `note_ids` (-1 where absent); one sort instead of a scan per id."""
+        stored = self.rows["id"][:self._size]
+        order = np.argsort(stored, kind="stable")
+        position = np.searchsorted(stored[order], note_ids)
+        position = np.minimum(position, max(len(order) - 1, 0))
+        rows = np.full(len(note_ids), -1, dtype=np.int64)
+        if len(order):
+            found = stored[order][position] == note_ids
+            rows[found] = order[position[found]]
+        return rows
+
+    def _clear(self, rows: List[int]):
+        self.vectors[rows] = 0.0
+        self.rows[rows] = (0, 0.0)
+        self._free.extend(rows)
+
+    def _top(self, vector: np.ndarray, k: int, min_score: float, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        n = self._size
+        if not n or not vector.any():
+            return []
+        scores = self.vectors[:n] @ vector
+        # Free rows are zero vectors and score 0; `min_score` keeps them out.
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        ids = self.rows["id"][top]
+        return [
+            (int(note_id), float(score))
+            for note_id, score in zip(ids.tolist(), scores[top].tolist())
+            if note_id and score >= min_score
+        ]
+
+    def _catch_up(self, ids: np.ndarray, updated: np.ndarray):
+        """
+        Drops rows of deleted notes and re-embeds notes changed since they
+        were stored. Unlike the other internals it takes the lock itself,
+        and only to compare rows and to store each embedded batch.
+        """
+        with self._lock:
+            stale = self._stale(ids, updated)
+            self._catching_up = set(stale)
+        if stale:
+            print(f"Semantic index: embedding {len(stale)} notes...")
+        for start in range(0, len(stale), 1000):
+            notes = self._store.get_notes(stale[start:start + 1000])
+            entries = [(note.id, note.updated_at, self.embed_note(note)) for note in notes]
+            with self._lock:
+                self.upsert([entry for entry in entries if entry[0] in self._catching_up])
+                self._catching_up.difference_update(entry[0] for entry in entries)
+        with self._lock:
+            self._catching_up.clear()
+        self.flush()
+
+    def _stale(self, ids: np.ndarray, updated: np.ndarray) -> List[int]:
+        """Clears the rows of notes not in `ids`; returns the ids whose stored vector is out of date."""
+        stored = self.rows[:self._size]
+        live = np.flatnonzero(stored["id"])
+        gone = live[~np.isin(stored["id"][live], ids)]
+        if len(gone):
+            self._clear(gone.tolist())
+
+        order = np.argsort(stored["id"][live])
+        known_ids = stored["id"][live][order]
+        known_updated = stored["updated_at"][live][order]
+        position = np.minimum(np.searchsorted(known_ids, ids), max(len(known_ids) - 1, 0))
+        fresh = np.zeros(len(ids), dtype=np.bool_)
+        if len(known_ids):
+            fresh = (known_ids[position] == ids) & (known_updated[position] == updated)
+        return ids[~fresh].tolist()
+
+    def _sync(self):
+        """Re-embeds the notes changed since the last query."""
+        if not self._pending or self._store is None:
+            return
+        pending, self._pending = list(self._pending), set()
+        notes = self._store.get_notes(pending)
+        self.upsert_notes(notes)
+        found = {note.id for note in notes}
+        for note_id in pending:
+            if note_id not in found:
+                self.remove(note_id)
@@ -0,0 +1,131 @@
+# lib/ai/summarizer.py
+"""
+Extractive summarizer: TextRank over TF-IDF sentence vectors, in NumPy.
+
+1. Each sentence is split into lowercase words; stop words and one-letter
+   tokens are dropped.
+2. Terms that occur in a single sentence cannot make two sentences similar,
+   and terms in most sentences carry no information, so both are dropped
+   and the vocabulary is capped at the `MAX_TERMS` most widespread terms.
+3. Sentence vectors are TF-IDF weighted and L2-normalized into one dense
+   float32 matrix `X`; `X @ X.T` is the cosine similarity of every pair.
+4. TextRank: with the similarities as edge weights (no self-loops), the
+   sentence scores are the stationary distribution of a random walk with
+   damping `DAMPING`, found by power iteration.
+5. The `k` best sentences are returned in their original order.
+
+Throughput target: a 50k-word note in under 500ms on one core.
+`benchmarks/bench_summarizer.py` measures it.
+"""
+import re
+from typing import List, Optional
+
+import numpy as np
+
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+# Vocabulary cap; keeps the similarity product small for very long notes.
+MAX_TERMS = 2048
+# Terms in more than this share of the sentences are ignored.
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Share of the sentences a summary keeps when `k` is not given.
+DEFAULT_RATIO = 0.2
+MAX_DEFAULT_SENTENCES = 10
+
+_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you
+your yours yourself yourselves also may might must shall us
+""".split())
+
+
+def _tokenize(sentences: List[str]) -> List[List[str]]:
+    return [
+        [word for word in _WORD_RE.findall(sentence.lower()) if word not in STOP_WORDS]
+        for sentence in sentences
+    ]
+
+
+def sentence_matrix(tokens: List[List[str]]) -> np.ndarray:
+    """L2-normalized TF-IDF vectors of the sentences, one row each (float32)."""
+    n = len(tokens)
+    vocabulary = {}
+    rows, cols = [], []
+    for row, words in enumerate(tokens):
+        for word in words:
+            col = vocabulary.setdefault(word, len(vocabulary))
+            rows.append(row)
+            cols.append(col)
+    if not rows:
+        return np.zeros((n, 0), dtype=np.float32)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+
+    # Term frequency per (sentence, term) and document frequency per term.
+    pairs, tf = np.unique(rows * len(vocabulary) + cols, return_counts=True)
+    pair_rows, pair_cols = np.divmod(pairs, len(vocabulary))
+    df = np.bincount(pair_cols, minlength=len(vocabulary))
+
+    useful = (df >= 2) & (df <= max(2, MAX_DOCUMENT_FREQUENCY * n))
+    terms = np.flatnonzero(useful)
+    if len(terms) > MAX_TERMS:
+        terms = terms[np.argsort(-df[terms], kind="stable")[:MAX_TERMS]]
+    column_of = np.full(len(vocabulary), -1, dtype=np.int64)
+    column_of[terms] = np.arange(len(terms))
+
+    keep = column_of[pair_cols] >= 0
+    pair_rows, pair_cols, tf = pair_rows[keep], column_of[pair_cols[keep]], tf[keep]
+    idf = np.log(n / df[terms]).astype(np.float32) + 1.0
+
+    matrix = np.zeros((n, len(terms)), dtype=np.float32)
+    matrix[pair_rows, pair_cols] = (1.0 + np.log(tf)).astype(np.float32) * idf[pair_cols]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def textrank(similarity: np.ndarray, damping: float = DAMPING) -> np.ndarray:
+    """Stationary TextRank scores for a symmetric, non-negative similarity matrix."""
+    n = len(similarity)
+    weights = similarity.astype(np.float64, copy=True)
+    np.fill_diagonal(weights, 0.0)
+    out_weight = weights.sum(axis=1)
+    # Sentences with no similar sentence spread their score evenly.
+    dangling = out_weight == 0
+    np.divide(weights, out_weight[:, None], out=weights, where=~dangling[:, None])
+    transition = weights.T  # column j: where sentence j sends its score
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        spread = scores[dangling].sum() / n
+        updated = (1.0 - damping) / n + damping * (transition @ scores + spread)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def summarize(sentences: List[str], k: Optional[int] = None) -> str:
+    """
+    Returns the `k` most central of `sentences` in their original order, as
+    one Markdown paragraph. By default `k` is a fifth of the sentences (at
+    least one, at most `MAX_DEFAULT_SENTENCES`).
+    """
+    if k is None:
+        k = min(MAX_DEFAULT_SENTENCES, max(1, round(len(sentences) * DEFAULT_RATIO)))
+    if len(sentences) <= k:
+        return " ".join(sentences)
+
+    matrix = sentence_matrix(_tokenize(sentences))
+    similarity = matrix @ matrix.T
+    scores = textrank(similarity)
+    # Best first; ties keep the earlier sentence.
+    best = np.argsort(-scores, kind="stable")[:k]
+    return " ".join(sentences[i] for i in np.sort(best).tolist())
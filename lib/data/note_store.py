@@ -0,0 +1,477 @@
+# lib/data/note_store.py
+"""
+SQLite-backed persistence for notes.
+
+The dashboard and the note editor read and write notes through a single
+`NoteStore` instance (see `NoteStore.instance()`).
+
+Design notes:
+- The database runs in WAL mode with `synchronous=NORMAL`, so readers never
+  block on the writer and a commit costs one fsync of the WAL, not the DB.
+- Every query is a module-level SQL constant. `sqlite3` keeps a cache of
+  prepared statements keyed by SQL text, so the hot queries are compiled once.
+- Bulk writes (`create_notes`, `update_bodies`) run in a single transaction.
+- `body` is the last column of the table. Large bodies spill into overflow
+  pages, and keeping them last means the dashboard query never touches them.
+- Full-text search uses an FTS5 table (`notes_fts`) in the same database: an
+  inverted index over the title and the plain text of the body, ranked with
+  BM25. Every write that touches a note re-indexes just that note, inside the
+  same transaction, so the index never drifts from the notes table.
+
+Throughput target: with 100k notes, `list_notes(limit=DASHBOARD_PAGE_SIZE)`
+(the query the dashboard runs) must answer in under 50ms.
+`search()` must answer in under 20ms on the same corpus.
+`benchmarks/bench_note_store.py` measures both.
+"""
+import os
+import re
+import html
+import time
+import sqlite3
+import threading
+from typing import Optional, List, Dict, Any, Iterable, Tuple, Callable
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "notes.db")
+
+# Number of notes the dashboard asks for in one query.
+DASHBOARD_PAGE_SIZE = 500
+
+# Snippets shown on note cards are derived from the start of the body only.
+SNIPPET_LENGTH = 120
+_SNIPPET_SOURCE_CHARS = 4096
+
+# Maximum number of hits `search()` returns.
+SEARCH_LIMIT = 50
+# BM25 column weights for (title, body): a match in the title counts more.
+_SEARCH_WEIGHTS = (8.0, 1.0)
+# Scoring is linear in the number of matching notes. For unselective queries
+# ("the", "no*") only the SEARCH_CANDIDATES most recently modified matches are
+# scored, which keeps every search within budget: their results are
+# approximate (the best match overall may be an old, untouched note). IDF
+# still comes from the whole corpus.
+SEARCH_CANDIDATES = 1000
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_SPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    snippet TEXT NOT NULL DEFAULT '',
+    color TEXT NOT NULL DEFAULT '#FFFFFF',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    body TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_notes_updated ON notes(updated_at DESC, id DESC);
+"""
+
+# The FTS rowid is a search key from notes_search_keys, not the note id: every
+# write moves the note to a new, highest key, so key order is modification
+# order and the SEARCH_CANDIDATES cap can walk the doclist newest first. (Notes
+# imported with explicit timestamps get keys in import order until they are
+# next modified or the index is rebuilt.) The prefix indexes keep type-ahead
+# queries ("desi*") fast; without them FTS5 merges the doclists of every
+# expansion on each query.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5 6'
+);
+CREATE TABLE IF NOT EXISTS notes_search_keys (
+    key INTEGER PRIMARY KEY,
+    note_id INTEGER NOT NULL UNIQUE
+);
+"""
+
+_SQL_COUNT = "SELECT COUNT(*) FROM notes"
+_SQL_TITLES = "SELECT id, title FROM notes"
+_SQL_COLUMNS = "SELECT id, title, color, created_at, updated_at FROM notes WHERE id > ? ORDER BY id LIMIT ?"
+_SQL_NOTES = "SELECT id, title, snippet, color, created_at, updated_at, body FROM notes WHERE id IN (%s)"
+_SQL_METADATA = "SELECT id, title, snippet, color, created_at, updated_at FROM notes WHERE id IN (%s)"
+_SQL_LIST = (
+    "SELECT id, title, snippet, color, created_at, updated_at FROM notes "
+    "ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?"
+)
+_SQL_GET = (
+    "SELECT id, title, snippet, color, created_at, updated_at, body FROM notes WHERE id = ?"
+)
+_SQL_INSERT = (
+    "INSERT INTO notes (title, snippet, color, created_at, updated_at, body) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_UPDATE_BODY = "UPDATE notes SET body = ?, snippet = ?, updated_at = ? WHERE id = ?"
+_SQL_UPDATE_TITLE = "UPDATE notes SET title = ?, updated_at = ? WHERE id = ?"
+_SQL_DELETE = "DELETE FROM notes WHERE id = ?"
+
+_SQL_FTS_IS_EMPTY = "SELECT NOT EXISTS (SELECT 1 FROM notes_fts)"
+_SQL_FTS_INSERT = "INSERT INTO notes_fts (rowid, title, body) VALUES (?, ?, ?)"
+_SQL_FTS_UPDATE_BODY = "UPDATE notes_fts SET rowid = ?, body = ? WHERE rowid = ?"
+_SQL_FTS_UPDATE_TITLE = "UPDATE notes_fts SET rowid = ?, title = ? WHERE rowid = ?"
+_SQL_FTS_DELETE = "DELETE FROM notes_fts WHERE rowid = ?"
+_SQL_FTS_CLEAR = "DELETE FROM notes_fts"
+_SQL_FTS_SOURCE = "SELECT id, title, body FROM notes ORDER BY updated_at, id"
+_SQL_KEYS_IS_EMPTY = "SELECT NOT EXISTS (SELECT 1 FROM notes_search_keys)"
+# Indexes built before search keys existed used the note id as rowid.
+_SQL_KEYS_FROM_ROWIDS = "INSERT INTO notes_search_keys (key, note_id) SELECT rowid, rowid FROM notes_fts"
+_SQL_KEY_OF = "SELECT key FROM notes_search_keys WHERE note_id = ?"
+_SQL_KEY_NEW = "INSERT INTO notes_search_keys (note_id) VALUES (?)"
+_SQL_KEY_INSERT = "INSERT INTO notes_search_keys (key, note_id) VALUES (?, ?)"
+_SQL_KEY_DELETE = "DELETE FROM notes_search_keys WHERE key = ?"
+_SQL_KEYS_CLEAR = "DELETE FROM notes_search_keys"
+# Key of the SEARCH_CANDIDATES-th most recently modified match; only walks the doclist.
+_SQL_SEARCH_FLOOR = (
+    "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?"
+)
+_SQL_SEARCH = (
+    "SELECT n.id, n.title, n.snippet, n.color, n.created_at, n.updated_at FROM ("
+    "  SELECT rowid AS key, bm25(notes_fts, %.1f, %.1f) AS score FROM notes_fts"
+    "  WHERE notes_fts MATCH ? AND rowid >= ? ORDER BY score LIMIT ?"
+    ") AS hits JOIN notes_search_keys k ON k.key = hits.key JOIN notes n ON n.id = k.note_id "
+    "ORDER BY hits.score" % _SEARCH_WEIGHTS
+)
+_SQL_SEARCH_LIKE = (
+    "SELECT id, title, snippet, color, created_at, updated_at FROM notes "
+    "WHERE title LIKE ? OR snippet LIKE ? ORDER BY updated_at DESC, id DESC LIMIT ?"
+)
+
+# Host parameters per `WHERE id IN (...)` query; old SQLite builds allow 999.
+_MAX_QUERY_IDS = 900
+
+
+def snippet_from_html(body: str, length: int = SNIPPET_LENGTH) -> str:
+    """Returns a short plain-text preview of an HTML note body."""
+    text = _TAG_RE.sub(" ", body[:_SNIPPET_SOURCE_CHARS])
+    text = _SPACE_RE.sub(" ", html.unescape(text)).strip()
+    return text[:length]
+
+
+def text_from_html(body: str) -> str:
+    """
+    Returns the plain text of an HTML note body, as fed to the search index.
+    Whitespace is left as is; the FTS5 tokenizer skips it anyway.
+    """
+    return html.unescape(_TAG_RE.sub(" ", body))
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turns what the user typed into an FTS5 MATCH expression.
+
+    Every word must match; the last one is treated as a prefix (from its
+    second character on) so results show up while typing. Words are quoted,
+    so FTS5 operators in the input are searched for literally. Returns None
+    if there is nothing to search.
+    """
+    words = _WORD_RE.findall(query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) > 1:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class Note:
+    """
+    One note as read from the store: `id`, `title`, `snippet`, `color` (a hex
+    string), `created_at` and `updated_at` (UNIX timestamps), and `body`, the
+    HTML, which only `get_note()` loads (None otherwise).
+
+    A slotted record rather than a dict: no per-instance `__dict__`, so the
+    dashboard can hold many of them cheaply.
+    """
+
+    __slots__ = ("id", "title", "snippet", "color", "created_at", "updated_at", "body")
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        snippet: str = "",
+        color: str = "#FFFFFF",
+        created_at: float = 0.0,
+        updated_at: float = 0.0,
+        body: Optional[str] = None,
+    ):
+        self.id = id
+        self.title = title
+        self.snippet = snippet
+        self.color = color
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.body = body
+
+    def __repr__(self):
+        return f"Note(id={self.id!r}, title={self.title!r})"
+
+
+class NoteStore:
+    """
+    Thread-safe note repository backed by a single SQLite connection.
+
+    Reads return `Note` records.
+
+    Listeners registered with `add_listener()` are called after every
+    committed change as `listener(change, note_id, title)`, where `change` is
+    "created", "renamed", "modified" (new body) or "deleted" (`title` is None
+    for the last two). They run on the thread that made the change.
+
+    If the SQLite build lacks FTS5, `search_enabled` is False and `search()`
+    falls back to a (slow) substring scan of titles and snippets.
+    """
+
+    _instance: Optional["NoteStore"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "NoteStore":
+        """Returns the process-wide store, opening the default database on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(DEFAULT_DB_PATH)
+            return cls._instance
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[str, int, Optional[str]], None]] = []
+        # Autosave writes from a background thread, so the connection is shared
+        # and every access is serialized through `self._lock`.
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+        try:
+            with self._conn:
+                self._conn.executescript(_FTS_SCHEMA)
+            self.search_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"Warning: SQLite has no FTS5 support, search will be slow. Error: {e}")
+            self.search_enabled = False
+        if self.search_enabled and self.count():
+            if self._conn.execute(_SQL_FTS_IS_EMPTY).fetchone()[0]:
+                # Databases created before the search index existed.
+                self.rebuild_search_index()
+            elif self._conn.execute(_SQL_KEYS_IS_EMPTY).fetchone()[0]:
+                # Indexed before search keys existed: keys start in creation order.
+                with self._conn:
+                    self._conn.execute(_SQL_KEYS_FROM_ROWIDS)
+
+    def add_listener(self, listener: Callable[[str, int, Optional[str]], None]):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, int, Optional[str]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, change: str, note_id: int, title: Optional[str] = None):
+        for listener in list(self._listeners):
+            try:
+                listener(change, note_id, title)
+            except Exception as e:
+                print(f"Warning: NoteStore listener failed. Error: {e}")
+
+    # --- Reads ---
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(_SQL_COUNT).fetchone()[0]
+
+    def list_notes(self, limit: Optional[int] = DASHBOARD_PAGE_SIZE, offset: int = 0) -> List[Note]:
+        """Returns note metadata (no bodies), most recently modified first."""
+        with self._lock:
+            rows = self._conn.execute(_SQL_LIST, (-1 if limit is None else limit, offset)).fetchall()
+        return [Note(*row) for row in rows]
+
+    def get_note(self, note_id: int) -> Optional[Note]:
+        """Returns a single note including its HTML body, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(_SQL_GET, (note_id,)).fetchone()
+        return Note(*row) if row else None
+
+    def get_metadata(self, note_ids: Iterable[int]) -> List[Note]:
+        """Returns the metadata (no bodies) of `note_ids`, in that order; missing ids are skipped."""
+        note_ids = list(note_ids)
+        found: Dict[int, Note] = {}
+        with self._lock:
+            for start in range(0, len(note_ids), _MAX_QUERY_IDS):
+                chunk = note_ids[start:start + _MAX_QUERY_IDS]
+                sql = _SQL_METADATA % ",".join("?" * len(chunk))
+                for row in self._conn.execute(sql, chunk):
+                    found[row[0]] = Note(*row)
+        return [found[note_id] for note_id in note_ids if note_id in found]
+
+    def get_notes(self, note_ids: Iterable[int]) -> List[Note]:
+        """Like `get_metadata()`, but the notes carry their HTML bodies."""
+        note_ids = list(note_ids)
+        found: Dict[int, Note] = {}
+        with self._lock:
+            for start in range(0, len(note_ids), _MAX_QUERY_IDS):
+                chunk = note_ids[start:start + _MAX_QUERY_IDS]
+                sql = _SQL_NOTES % ",".join("?" * len(chunk))
+                for row in self._conn.execute(sql, chunk):
+                    found[row[0]] = Note(*row)
+        return [found[note_id] for note_id in note_ids if note_id in found]
+
+    def iter_columns(self, batch_size: int = 10000) -> Iterable[List[Tuple[int, str, str, float, float]]]:
+        """
+        Yields `(id, title, color, created_at, updated_at)` rows for every
+        note in batches of ascending ids, for building columnar views (see
+        note_table.py).
+
+        Each batch is read under the lock and yielded after releasing it, so
+        writes go ahead between batches and a generator dropped halfway
+        holds nothing. Notes changed during the scan may be seen old or new;
+        consumers catch up through the change listeners.
+        """
+        last_id = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(_SQL_COLUMNS, (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield rows
+
+    def list_titles(self) -> List[Tuple[int, str]]:
+        """Returns `(id, title)` for every note, in no particular order."""
+        with self._lock:
+            return self._conn.execute(_SQL_TITLES).fetchall()
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[Note]:
+        """
+        Returns the metadata rows of the notes matching `query`, best match
+        first (BM25 over title and body text). Queries matching more than
+        SEARCH_CANDIDATES notes only rank the most recently modified ones.
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+        if not self.search_enabled:
+            needle = f"%{query.strip()}%"
+            with self._lock:
+                rows = self._conn.execute(_SQL_SEARCH_LIKE, (needle, needle, limit)).fetchall()
+        else:
+            with self._lock:
+                floor = self._conn.execute(_SQL_SEARCH_FLOOR, (match, SEARCH_CANDIDATES - 1)).fetchone()
+                rows = self._conn.execute(_SQL_SEARCH, (match, floor[0] if floor else 0, limit)).fetchall()
+        return [Note(*row) for row in rows]
+
+    # --- Writes ---
+
+    def create_note(self, title: str, snippet: str = "", color: str = "#FFFFFF", body: Optional[str] = None) -> Note:
+        """Inserts a note and returns its metadata row."""
+        now = time.time()
+        if body is None:
+            body = f"<p>{html.escape(snippet)}</p>" if snippet else ""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(_SQL_INSERT, (title, snippet, color, now, now, body))
+            note_id = cursor.lastrowid
+            if self.search_enabled:
+                key = self._conn.execute(_SQL_KEY_NEW, (note_id,)).lastrowid
+                self._conn.execute(_SQL_FTS_INSERT, (key, title, text_from_html(body)))
+        self._notify("created", note_id, title)
+        return Note(note_id, title, snippet, color, now, now)
+
+    def create_notes(self, notes: Iterable[Dict[str, Any]]) -> None:
+        """
+        Inserts many notes in one transaction. Each dict needs `title` and may
+        carry `snippet`, `color`, `body`, `created_at` and `updated_at`.
+        """
+        now = time.time()
+        rows = (
+            (
+                note["title"],
+                note.get("snippet", ""),
+                note.get("color", "#FFFFFF"),
+                note.get("created_at", now),
+                note.get("updated_at", note.get("created_at", now)),
+                note.get("body", ""),
+            )
+            for note in notes
+        )
+        created = []
+        with self._lock, self._conn:
+            for row in rows:
+                note_id = self._conn.execute(_SQL_INSERT, row).lastrowid
+                if self.search_enabled:
+                    key = self._conn.execute(_SQL_KEY_NEW, (note_id,)).lastrowid
+                    self._conn.execute(_SQL_FTS_INSERT, (key, row[0], text_from_html(row[5])))
+                created.append((note_id, row[0]))
+        for note_id, title in created:
+            self._notify("created", note_id, title)
+
+    def update_body(self, note_id: int, body: str) -> None:
+        """Stores a new HTML body and refreshes the note's snippet and timestamp."""
+        self.update_bodies([(note_id, body)])
+
+    def update_bodies(self, items: Iterable[Tuple[int, str]]) -> None:
+        """Stores several `(note_id, body)` pairs in one transaction."""
+        now = time.time()
+        items = list(items)
+        if not items:
+            return
+        rows = [(body, snippet_from_html(body), now, note_id) for note_id, body in items]
+        with self._lock, self._conn:
+            self._conn.executemany(_SQL_UPDATE_BODY, rows)
+            if self.search_enabled:
+                for note_id, body in items:
+                    self._reindex(note_id, _SQL_FTS_UPDATE_BODY, text_from_html(body))
+        for note_id, _ in items:
+            self._notify("modified", note_id)
+
+    def update_title(self, note_id: int, title: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_UPDATE_TITLE, (title, time.time(), note_id))
+            if self.search_enabled:
+                self._reindex(note_id, _SQL_FTS_UPDATE_TITLE, title)
+        self._notify("renamed", note_id, title)
+
+    def delete_note(self, note_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_DELETE, (note_id,))
+            if self.search_enabled:
+                row = self._conn.execute(_SQL_KEY_OF, (note_id,)).fetchone()
+                if row is not None:
+                    self._conn.execute(_SQL_FTS_DELETE, row)
+                    self._conn.execute(_SQL_KEY_DELETE, row)
+        self._notify("deleted", note_id)
+
+    def _reindex(self, note_id: int, sql: str, value: str) -> None:
+        """
+        Runs one of the `_SQL_FTS_UPDATE_*` statements for a note, moving it to
+        the newest search key. Called inside the caller's transaction.
+        """
+        row = self._conn.execute(_SQL_KEY_OF, (note_id,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute(_SQL_KEY_DELETE, row)
+        key = self._conn.execute(_SQL_KEY_NEW, (note_id,)).lastrowid
+        self._conn.execute(sql, (key, value, row[0]))
+
+    def rebuild_search_index(self) -> None:
+        """
+        Re-indexes every note, assigning search keys in `updated_at` order.
+        Only needed when the index is missing or out of date.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_FTS_CLEAR)
+            self._conn.execute(_SQL_KEYS_CLEAR)
+            keys = []
+            source = self._conn.execute(_SQL_FTS_SOURCE)
+            for key, (note_id, title, body) in enumerate(source, 1):
+                keys.append((key, note_id))
+                self._conn.execute(_SQL_FTS_INSERT, (key, title, text_from_html(body)))
+            self._conn.executemany(_SQL_KEY_INSERT, keys)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
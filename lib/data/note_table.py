@@ -0,0 +1,304 @@
+# lib/data/note_table.py
+"""
+Columnar, in-memory copy of the note metadata the dashboard sorts, filters
+and groups by.
+
+Layout (one row per note, all NumPy arrays of the same capacity):
+- `ids` (int64), `created_at` / `updated_at` (float64, UNIX timestamps);
+- `color_index` (int16): an index into `palette`, the note colors the
+  dashboard offers first, followed by any other color found in the store;
+- `title_offsets` (int64) / `title_lengths` (int32): the title's UTF-8
+  bytes inside one shared `bytearray`, so titles cost no per-note object;
+- `alive` (bool). Deletes and changes only clear it (a changed note is
+  appended as a new row); once dead rows outnumber live ones the table is
+  compacted. There is no id -> row dict: changes are rare and batched, and
+  finding their rows is one `np.isin` pass.
+
+That is ~40 bytes plus the title per note, against several hundred for a
+dict of Python objects, and every query is a few vectorized passes:
+`mask()` filters, `order()` sorts with `np.lexsort`, `count_by_color()`
+and `count_by_day()` group with `np.bincount` / `np.unique`.
+
+The table follows the NoteStore through `NoteStore.add_listener()`. Changed
+ids are queued and re-read in one batch before the next query, so a bulk
+insert costs one metadata query, not one per note.
+
+`benchmarks/bench_note_memory.py` measures memory and query times.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# The colors offered for new notes, in picker order.
+DEFAULT_PALETTE = ("#FFAB91", "#CE93D8", "#4DD0E1", "#FFF176", "#80CBC4")
+
+# Sort keys accepted by `order()`.
+SORT_KEYS = ("updated_at", "created_at", "title")
+
+_INITIAL_CAPACITY = 1024
+# Compact once dead rows exceed this count and outnumber the live ones.
+_COMPACT_THRESHOLD = 1024
+
+_SECONDS_PER_DAY = 86400
+
+
+class NoteTable:
+    """
+    Thread-safe columnar note metadata.
+
+    Queries may run on a worker thread while store changes arrive on the UI
+    thread; both sides serialize on an internal lock. Query results are row
+    numbers (`mask()`, `order()`) or note ids (`select()`); row numbers are
+    only valid until the next change.
+    """
+
+    _instance: Optional["NoteTable"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "NoteTable":
+        """
+        Returns the process-wide table over `NoteStore.instance()`. The first
+        call reads the metadata of every note, so make it from a worker thread.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                from lib.data.note_store import NoteStore
+                cls._instance = cls.for_store(NoteStore.instance())
+            return cls._instance
+
+    @classmethod
+    def for_store(cls, store, palette: Sequence[str] = DEFAULT_PALETTE) -> "NoteTable":
+        """Builds a table over `store` and keeps it in sync with later changes."""
+        table = cls(palette=palette)
+        table._store = store
+        # Subscribe before loading: changes made meanwhile are re-read on top
+        # of the loaded rows. The lock is held per batch, around its read, so
+        # a note deleted after its batch was read is removed after it was
+        # added, and writers never wait for the whole scan.
+        store.add_listener(table._on_store_change)
+        batches = iter(store.iter_columns())
+        while True:
+            with table._lock:
+                rows = next(batches, None)
+                if rows is None:
+                    break
+                table._extend(rows)
+        return table
+
+    def __init__(self, rows: Iterable[Tuple[int, str, str, float, float]] = (), palette: Sequence[str] = DEFAULT_PALETTE):
+        self._lock = threading.RLock()
+        self._store = None
+        self._pending: Set[int] = set()
+        self.palette: List[str] = [color.upper() for color in palette]
+        self._palette_index: Dict[str, int] = {color: i for i, color in enumerate(self.palette)}
+        self._allocate(_INITIAL_CAPACITY)
+        self._extend(list(rows))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._size - self._dead
+
+    # --- Updates ---
+
+    def upsert(self, rows: Iterable[Tuple[int, str, str, float, float]]):
+        """Adds or replaces `(id, title, color, created_at, updated_at)` rows."""
+        with self._lock:
+            rows = list(rows)
+            self._kill([row[0] for row in rows])
+            self._extend(rows)
+            self._maybe_compact()
+
+    def remove(self, note_id: int):
+        with self._lock:
+            self._pending.discard(note_id)
+            self._kill([note_id])
+            self._maybe_compact()
+
+    def _on_store_change(self, change: str, note_id: int, title: Optional[str] = None):
+        if change == "deleted":
+            self.remove(note_id)
+        else:
+            with self._lock:
+                self._pending.add(note_id)
+
+    # --- Queries ---
+
+    def mask(
+        self,
+        color: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Boolean mask over the rows: live notes with `color` (a hex string),
+        modified in `[since, until)`.
+        """
+        with self._lock:
+            self._sync()
+            n = self._size
+            keep = self.alive[:n].copy()
+            if color is not None:
+                index = self._palette_index.get(color.upper())
+                if index is None:
+                    keep[:] = False
+                else:
+                    keep &= self.color_index[:n] == index
+            if since is not None:
+                keep &= self.updated_at[:n] >= since
+            if until is not None:
+                keep &= self.updated_at[:n] < until
+            return keep
+
+    def order(self, by: str = "updated_at", descending: bool = True, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Row numbers of the live (or `mask`ed) notes sorted by `by`, ties broken by id."""
+        if by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {by!r}")
+        with self._lock:
+            if mask is None:
+                mask = self.mask()
+            rows = np.flatnonzero(mask)
+            ids = self.ids[rows]
+            if by == "title":
+                keys = np.array([self._title(row).casefold() for row in rows.tolist()], dtype=object)
+                rows = rows[np.lexsort((ids, keys))]
+                return rows[::-1] if descending else rows
+            values = getattr(self, by)[rows]
+            if descending:
+                return rows[np.lexsort((-ids, -values))]
+            return rows[np.lexsort((ids, values))]
+
+    def select(
+        self,
+        by: str = "updated_at",
+        descending: bool = True,
+        color: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> np.ndarray:
+        """Ids of the notes matching the filters, in dashboard order."""
+        with self._lock:
+            rows = self.order(by, descending, self.mask(color, since, until))
+            return self.ids[rows]
+
+    def count_by_color(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Number of live (or `mask`ed) notes per palette color."""
+        with self._lock:
+            if mask is None:
+                mask = self.mask()
+            counts = np.bincount(self.color_index[:len(mask)][mask], minlength=len(self.palette))
+            return {color: int(count) for color, count in zip(self.palette, counts.tolist())}
+
+    def count_by_day(self, mask: Optional[np.ndarray] = None, utc_offset: float = 0.0) -> Dict[int, int]:
+        """
+        Number of live (or `mask`ed) notes per day of last modification, keyed
+        by the day's start as a UNIX timestamp (days begin at `utc_offset`
+        seconds east of UTC).
+        """
+        with self._lock:
+            if mask is None:
+                mask = self.mask()
+            stamps = self.updated_at[:len(mask)][mask] + utc_offset
+            days, counts = np.unique((stamps // _SECONDS_PER_DAY).astype(np.int64), return_counts=True)
+            starts = days * _SECONDS_PER_DAY - int(utc_offset)
+            return dict(zip(starts.tolist(), counts.tolist()))
+
+    def title(self, row: int) -> str:
+        with self._lock:
+            return self._title(row)
+
+    def nbytes(self) -> int:
+        """Memory held by the columns and the title buffer."""
+        with self._lock:
+            columns = (self.ids, self.created_at, self.updated_at, self.color_index,
+                       self.title_offsets, self.title_lengths, self.alive)
+            return sum(column.nbytes for column in columns) + len(self._titles)
+
+    # --- Internals (callers hold self._lock) ---
+
+    def _allocate(self, capacity: int):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.updated_at = np.zeros(capacity, dtype=np.float64)
+        self.color_index = np.zeros(capacity, dtype=np.int16)
+        self.title_offsets = np.zeros(capacity, dtype=np.int64)
+        self.title_lengths = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self._titles = bytearray()
+        self._size = 0
+        self._dead = 0
+
+    def _grow(self, needed: int):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("ids", "created_at", "updated_at", "color_index", "title_offsets", "title_lengths", "alive"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _color(self, color: str) -> int:
+        color = (color or "").upper()
+        index = self._palette_index.get(color)
+        if index is None:
+            index = self._palette_index[color] = len(self.palette)
+            self.palette.append(color)
+        return index
+
+    def _extend(self, rows: List[Tuple[int, str, str, float, float]]):
+        if not rows:
+            return
+        start = self._size
+        end = start + len(rows)
+        self._grow(end)
+        ids, titles, colors, created, updated = zip(*rows)
+        encoded = [title.encode("utf-8") for title in titles]
+        lengths = np.fromiter((len(title) for title in encoded), dtype=np.int32, count=len(encoded))
+        self.ids[start:end] = ids
+        self.created_at[start:end] = created
+        self.updated_at[start:end] = updated
+        self.color_index[start:end] = [self._color(color) for color in colors]
+        self.title_offsets[start:end] = len(self._titles) + np.concatenate(([0], np.cumsum(lengths[:-1])))
+        self.title_lengths[start:end] = lengths
+        self.alive[start:end] = True
+        self._titles += b"".join(encoded)
+        self._size = end
+
+    def _kill(self, note_ids: List[int]):
+        """Marks the live rows of `note_ids` dead."""
+        if not note_ids or not self._size:
+            return
+        n = self._size
+        rows = np.flatnonzero(self.alive[:n] & np.isin(self.ids[:n], note_ids))
+        self.alive[rows] = False
+        self._dead += len(rows)
+
+    def _title(self, row: int) -> str:
+        offset = int(self.title_offsets[row])
+        return self._titles[offset:offset + int(self.title_lengths[row])].decode("utf-8")
+
+    def _sync(self):
+        """Re-reads the notes changed since the last query."""
+        if not self._pending or self._store is None:
+            return
+        pending, self._pending = list(self._pending), set()
+        notes = self._store.get_metadata(pending)
+        self._kill(pending)
+        self._extend([(note.id, note.title, note.color, note.created_at, note.updated_at) for note in notes])
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._dead > _COMPACT_THRESHOLD and self._dead > self._size - self._dead:
+            rows = np.flatnonzero(self.alive[:self._size]).tolist()
+            live = [
+                (int(self.ids[row]), self._title(row), self.palette[self.color_index[row]],
+                 float(self.created_at[row]), float(self.updated_at[row]))
+                for row in rows
+            ]
+            self._allocate(max(_INITIAL_CAPACITY, len(live)))
+            self._extend(live)
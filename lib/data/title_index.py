@@ -0,0 +1,219 @@
+# lib/data/title_index.py
+"""
+In-memory trigram index over note titles, used by the quick-open palette.
+
+Every title is normalized (lowercased, punctuation folded to spaces) and
+split into words; each word is padded as "  word " and cut into trigrams,
+so "Meeting notes" yields "  m", " me", "mee", "eet", ... A lookup counts,
+for every title, how many of the query's trigrams it contains and ranks
+titles by that overlap, which tolerates typos and missing letters.
+
+Layout:
+- Titles live in dense "slots". `_slot_ids[slot]` is the note id and
+  `_slot_sizes[slot]` the number of distinct trigrams of its title.
+- `_postings[trigram]` is an `array('i')` of slots. Lookups view these
+  arrays through `numpy.frombuffer` (no copy) and scatter-add them into one
+  counter array, so the per-keystroke work is a handful of vectorized
+  passes instead of a Python loop over candidates.
+- Renames and deletes only clear the slot's `_alive` flag. Once dead slots
+  outnumber live ones the index is rebuilt from the live titles.
+
+The index follows the NoteStore through `NoteStore.add_listener()`, so
+created, renamed and deleted notes are reflected immediately.
+
+Throughput target: under 5ms per lookup with 200k titles.
+`benchmarks/bench_title_index.py` measures this.
+"""
+import re
+import threading
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Number of results a lookup returns by default.
+QUICK_OPEN_LIMIT = 20
+# A title must contain at least this share of the query's trigrams.
+MIN_OVERLAP = 0.4
+# Rebuild once dead slots exceed this count and outnumber the live ones.
+_COMPACT_THRESHOLD = 1024
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize_title(title: str) -> str:
+    return _NON_WORD_RE.sub(" ", title.lower()).strip()
+
+
+def title_trigrams(title: str, partial_last_word: bool = False) -> List[str]:
+    """
+    Returns the distinct trigrams of a title. With `partial_last_word` the
+    last word is not padded at the end, so a word that is still being typed
+    ("meet") matches its completions ("meeting").
+    """
+    words = normalize_title(title).split()
+    seen = {}
+    for i, word in enumerate(words):
+        padded = f"  {word}" if partial_last_word and i == len(words) - 1 else f"  {word} "
+        for j in range(len(padded) - 2):
+            seen[padded[j:j + 3]] = None
+    return list(seen)
+
+
+class TitleIndex:
+    """
+    Thread-safe trigram index mapping note titles to note ids.
+
+    `search()` may run on a worker thread while the UI thread applies
+    changes; both sides serialize on an internal lock. Pass `is_cancelled`
+    to `search()` so a lookup for an outdated query stops early and returns
+    None instead of results.
+    """
+
+    _instance: Optional["TitleIndex"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "TitleIndex":
+        """
+        Returns the process-wide index over `NoteStore.instance()`. The first
+        call loads all titles, so make it from a worker thread.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                from lib.data.note_store import NoteStore
+                cls._instance = cls.for_store(NoteStore.instance())
+            return cls._instance
+
+    @classmethod
+    def for_store(cls, store) -> "TitleIndex":
+        """Builds an index over `store` and keeps it in sync with later changes."""
+        index = cls()
+        with index._lock:
+            # Subscribe before loading: changes made meanwhile wait for the
+            # lock and are then applied on top of the loaded titles.
+            store.add_listener(index._on_store_change)
+            index._load(store.list_titles())
+        return index
+
+    def __init__(self, titles: Iterable[Tuple[int, str]] = ()):
+        self._lock = threading.RLock()
+        self._load(titles)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._slot_of)
+
+    # --- Updates ---
+
+    def add(self, note_id: int, title: str):
+        """Indexes a title. Replaces the previous title of `note_id`, if any."""
+        with self._lock:
+            self._remove(note_id)
+            self._append(note_id, title)
+            self._maybe_compact()
+
+    def remove(self, note_id: int):
+        with self._lock:
+            self._remove(note_id)
+            self._maybe_compact()
+
+    def _on_store_change(self, change: str, note_id: int, title: Optional[str]):
+        if change == "deleted":
+            self.remove(note_id)
+        elif change != "modified":
+            self.add(note_id, title)
+
+    # --- Lookups ---
+
+    def search(
+        self,
+        query: str,
+        limit: int = QUICK_OPEN_LIMIT,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Optional[List[Tuple[int, str]]]:
+        """
+        Returns up to `limit` `(note_id, title)` pairs, best match first, or
+        None if `is_cancelled()` turned true while the lookup was running.
+        """
+        grams = title_trigrams(query, partial_last_word=True)
+        if not grams:
+            return []
+        with self._lock:
+            postings = [self._postings[gram] for gram in grams if gram in self._postings]
+            needed = max(1, int(np.ceil(len(grams) * MIN_OVERLAP)))
+            if len(postings) < needed:
+                return []
+
+            counts = np.zeros(len(self._slot_ids), dtype=np.int16)
+            for posting in postings:
+                # Slots are unique within a posting list, so a plain
+                # fancy-index increment is a correct scatter-add.
+                counts[np.frombuffer(posting, dtype=np.int32)] += 1
+                if is_cancelled is not None and is_cancelled():
+                    return None
+            counts[~self._alive_view()] = 0
+
+            candidates = np.flatnonzero(counts >= needed)
+            if not len(candidates):
+                return []
+            matched = counts[candidates].astype(np.float32)
+            sizes = np.frombuffer(self._slot_sizes, dtype=np.int32)[candidates]
+            # Mostly "how much of the query is in the title", with the
+            # Jaccard similarity breaking ties in favour of shorter titles.
+            scores = matched / len(grams) + 0.5 * matched / (len(grams) + sizes - matched)
+
+            if len(candidates) > limit:
+                top = np.argpartition(-scores, limit)[:limit]
+            else:
+                top = np.arange(len(candidates))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            if is_cancelled is not None and is_cancelled():
+                return None
+            return [
+                (self._slot_ids[slot], self._slot_titles[slot])
+                for slot in candidates[top].tolist()
+            ]
+
+    # --- Internals (callers hold self._lock) ---
+
+    def _load(self, titles: Iterable[Tuple[int, str]]):
+        self._postings: Dict[str, array] = {}
+        self._slot_ids = array("q")
+        self._slot_sizes = array("i")
+        self._slot_titles: List[str] = []
+        self._alive = bytearray()
+        self._slot_of: Dict[int, int] = {}
+        self._dead = 0
+        for note_id, title in titles:
+            self._remove(note_id)
+            self._append(note_id, title)
+
+    def _append(self, note_id: int, title: str):
+        slot = len(self._slot_ids)
+        grams = title_trigrams(title)
+        postings = self._postings
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("i")
+            posting.append(slot)
+        self._slot_ids.append(note_id)
+        self._slot_sizes.append(len(grams))
+        self._slot_titles.append(title)
+        self._alive.append(1)
+        self._slot_of[note_id] = slot
+
+    def _remove(self, note_id: int):
+        slot = self._slot_of.pop(note_id, None)
+        if slot is not None:
+            self._alive[slot] = 0
+            self._dead += 1
+
+    def _alive_view(self) -> np.ndarray:
+        return np.frombuffer(self._alive, dtype=np.bool_)
+
+    def _maybe_compact(self):
+        if self._dead > _COMPACT_THRESHOLD and self._dead > len(self._slot_of):
+            live = sorted(self._slot_of.values())
+            self._load([(self._slot_ids[slot], self._slot_titles[slot]) for slot in live])
@@ -0,0 +1,126 @@
+# lib/import_report.py
+import os
+import sys
+import time
+import threading
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Optional, Tuple
+
+# Enable with `python lib/main.py --import-report` or NOTE_APP_IMPORT_REPORT=1.
+FLAG = "--import-report"
+ENV_VAR = "NOTE_APP_IMPORT_REPORT"
+
+
+def requested() -> bool:
+    return FLAG in sys.argv or os.environ.get(ENV_VAR, "") not in ("", "0")
+
+
+class _TimedLoader:
+    """Wraps a module's loader for the duration of its exec_module call."""
+
+    def __init__(self, loader, report: "ImportReport"):
+        self._loader = loader
+        self._report = report
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Hand the module its real loader back before it runs, so nothing
+        # downstream (importlib.resources, pkgutil) ever sees this wrapper.
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._report._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._report._exit(module.__name__)
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class ImportReport(MetaPathFinder):
+    """
+    Records how long every module takes to import, the same numbers
+    `python -X importtime` prints, but from inside the app:
+
+    - self: time spent executing the module body itself;
+    - cumulative: self plus the modules it imported for the first time.
+
+    `install()` puts the finder at the front of `sys.meta_path`; it finds
+    specs through the remaining finders and only wraps their loaders.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # name -> [self seconds, cumulative seconds]
+        self.timings: Dict[str, List[float]] = {}
+        self.order: List[str] = []
+
+    def install(self) -> "ImportReport":
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _stack(self) -> List[List]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name: str):
+        # [name, start, time spent in nested first-time imports]
+        self._stack().append([name, time.perf_counter(), 0.0])
+
+    def _exit(self, name: str):
+        stack = self._stack()
+        _, start, children = stack.pop()
+        cumulative = time.perf_counter() - start
+        if stack:
+            stack[-1][2] += cumulative
+        with self._lock:
+            if name not in self.timings:
+                self.order.append(name)
+            self.timings[name] = [cumulative - children, cumulative]
+
+    def snapshot(self) -> int:
+        """A marker for `format(since=...)`: the number of modules recorded so far."""
+        with self._lock:
+            return len(self.order)
+
+    def rows(self, since: int = 0) -> List[Tuple[str, float, float]]:
+        """`(module, self ms, cumulative ms)`, slowest self time first."""
+        with self._lock:
+            names = self.order[since:]
+            rows = [(name, self.timings[name][0] * 1000, self.timings[name][1] * 1000) for name in names]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows
+
+    def format(self, title: str, since: int = 0, limit: Optional[int] = 40) -> str:
+        rows = self.rows(since)
+        total = sum(row[1] for row in rows)
+        lines = [f"--- {title}: {len(rows)} modules, {total:.1f} ms ---", f"{'self ms':>9} {'cumul ms':>9}  module"]
+        for name, self_ms, cumulative_ms in rows[:limit]:
+            lines.append(f"{self_ms:9.1f} {cumulative_ms:9.1f}  {name}")
+        if limit is not None and len(rows) > limit:
+            lines.append(f"... {len(rows) - limit} more")
+        return "\n".join(lines)
@@ -7,11 +7,14 @@ from typing import Optional, Callable, List, Dict, Any
 # Add the project root directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Installed before anything heavy is imported; see import_report.py.
+import import_report
+_import_report = import_report.ImportReport().install() if import_report.requested() else None
+
 # import colors
 from constants.colors import *
 from constants.theme import initial_theme
 
-from screens.note_editor_screen import NoteEditorScreen
 from screens.dashboard_screen import DashboardScreen
 
 
@@ -28,6 +31,13 @@ from pythra import (
 )
 
 
+def build_note_editor(navigator):
+    # The editor screen (and the Markdown plugin behind it) is imported on
+    # first navigation instead of at startup.
+    from screens.note_editor_screen import NoteEditorScreen
+    return NoteEditorScreen(key=Key("note_page"), navigator=navigator)
+
+
 class HomePageState(State):
     def __init__(self):
         self.count = 0
@@ -56,9 +66,7 @@ class HomePageState(State):
                     )
                 ),
                 routes={
-                    "/settings": lambda navigator: NoteEditorScreen(
-                        key=Key("note_page"), navigator=navigator
-                    ),
+                    "/settings": build_note_editor,
                 },
             ),
         )
@@ -88,4 +96,9 @@ if __name__ == "__main__":
     app = Framework.instance()
     app.set_theme(initial_theme) # Set the initial theme
     app.set_root(Main(key=Key("home_page_wrapper")))
+    if _import_report is not None:
+        import atexit
+        print(_import_report.format("Startup imports"))
+        startup_mark = _import_report.snapshot()
+        atexit.register(lambda: print(_import_report.format("Imported after startup", since=startup_mark)))
     app.run()
@@ -46,6 +46,10 @@ from pythra import (
 )
 
 from lib.constants.colors import *
+from lib.ai.backends import DEFAULT_BACKEND, GenerationRequest, get_backend
+from lib.ai.engine import AiEngine
+from lib.ai.chunking import DEFAULT_CHUNK_WORDS, ChunkedJob, heading_levels, split_selection
+from lib.ai.result_cache import AiResultCache, cache_key
 import time
 
 labels = ['Funny', 'Serious', 'Professional', 'Casual', 'Poetic', 'Sarcastic', 'Friendly', 'Formal', 'Informal', 'Creative', 'Witty', 'Humorous', 'Playful', 'Quirky', 'Eccentric', 'Whimsical', 'Zany', 'Silly', 'Goofy', 'Jocular', 'Comical', 'Hilarious', 'Amusing', 'Entertaining', 'Droll', 'Facetious', 'Jesting', 'Jocular', 'Jocular', 'Jocular']
@@ -56,8 +60,6 @@ action_to_perform = {
     "action": ""
 }
 
-from PySide6.QtCore import QTimer
-
 class AiActionsControlsState(State):
     def __init__(self, editor=None):
         super().__init__()
@@ -69,50 +71,193 @@ class AiActionsControlsState(State):
             "model": "",
             "action": ""
         }
+        # The request in flight, the selection it was made for and the
+        # editor's Future for streaming its output into that selection.
+        self._job = None
+        self._job_selection = None
+        self._insertion = None
+        # Finished / total steps of a chunked (map-reduce) job; None otherwise.
+        self.progress = None
+        # Whether the current selection, mode and action have a cached result.
+        self.cache_hit = False
+
+    def initState(self):
+        widget = self.get_widget()
+        if widget and widget.editor:
+            self.editor = widget.editor
+            self.editor.add_listener(self._on_editor_event)
+            self._update_cache_hit()
+
+    def dispose(self):
+        self._cancel_generation()
+        if self.editor:
+            self.editor.remove_listener(self._on_editor_event)
+        super().dispose()
+
+    def _on_editor_event(self, cursor_state_json=None):
+        if cursor_state_json is None:
+            return
+        # A new selection makes the pending result meaningless: stop it.
+        if self._job is not None:
+            if self.editor.cursor_state.selection_text != self._job_selection:
+                self._cancel_generation()
+                self.setState()
+        else:
+            self._update_cache_hit()
+
+    def _cancel_generation(self):
+        job, insertion = self._job, self._insertion
+        self._job = None
+        self._insertion = None
+        self.is_loading = False
+        self.progress = None
+        if job is not None:
+            job.cancel()
+        if insertion is not None:
+            insertion.cancel()
 
     def setMode(self, new_value):
         print("Mode changed!: ", new_value)
         action_to_perform["model"] = new_value
         self.action_to_perform["model"] = new_value
+        self._update_cache_hit()
 
     def setAction(self, new_value):
         print("Action changed!: ", new_value)
         action_to_perform["action"] = new_value
         self.action_to_perform["action"] = new_value
+        self._update_cache_hit()
 
-    def _finish_generation(self):
+    def _request(self):
+        """The backend and the request for the current selection, mode and action."""
+        selection = self.editor.cursor_state.selection_text if self.editor else ""
+        request = GenerationRequest(
+            mode=self.action_to_perform["model"] or self.mode_controller.selectedValue,
+            action=self.action_to_perform["action"] or self.action_controller.selectedValue,
+            text=selection,
+        )
+        backend = get_backend(Framework.instance().config.get("ai_backend", DEFAULT_BACKEND))
+        return backend, request
+
+    def _update_cache_hit(self):
+        backend, request = self._request()
+        hit = bool(request.text.strip()) and AiResultCache.instance().contains(
+            cache_key(backend.id, request.mode, request.action, request.text)
+        )
+        if hit != self.cache_hit:
+            self.cache_hit = hit
+            self.setState()
+
+    def _finish_generation(self, job, key, insertion):
+        """Called on the UI thread once the streamed insertion ended, failed or was cancelled."""
+        if job is not self._job:
+            return
+        self._job = None
+        self._insertion = None
         self.is_loading = False
+        self.progress = None
         self.setState()
-        widget = self.get_widget()
-
-        if widget and widget.editor:
-            self.editor = widget.editor
+        if insertion.cancelled():
+            job.cancel()
+            return
+        if insertion.exception() is not None:
+            print(f"AI action failed: {insertion.exception()}")
+            return
+        AiResultCache.instance().put(key, job.text())
 
+        widget = self.get_widget()
         if widget and widget.onGenerate:
             widget.onGenerate()
 
-        
-        # Call editor's replace_selection_with_markdown with generated content
-        if self.editor:
-            # Restore the saved selection before replacing
-            # self.editor.run_javascript("restoreEditorSelection()")
-            generated_content = f"Generated: {self.action_to_perform.get('model', 'Unknown') or 'None'} mode: {self.action_to_perform.get('action', 'Unknown') or 'None'} action."
-            self.editor.replace_selection_with_markdown(generated_content)
-        
-        
-
     def generate(self):
         if self.is_loading:
             return
+        backend, request = self._request()
+        if not request.text.strip():
+            print("AI action: nothing selected.")
+            return
+
+        key = cache_key(backend.id, request.mode, request.action, request.text)
+        cached = AiResultCache.instance().get(key)
+        if cached is not None:
+            # Same text, mode and action as an earlier run: no generation.
+            self.editor.stream_markdown_into_selection(cached)
+            widget = self.get_widget()
+            if widget and widget.onGenerate:
+                widget.onGenerate()
+            return
+
+        print(f"Generating... {request}")
+        chunk_words = Framework.instance().config.get("ai_chunk_words", DEFAULT_CHUNK_WORDS)
+        if len(request.text.split()) > chunk_words:
+            chunks = split_selection(request.text, heading_levels(self.editor.content), chunk_words)
+            if len(chunks) > 1:
+                self._generate_chunked(backend, request, key, chunks)
+                return
 
-        print("Generating...")
-        print(action_to_perform)
-        
+        # The backend runs on the AI worker pool; its output is streamed into
+        # the saved selection as it arrives and replaces it in one undo step.
+        job = AiEngine.instance().submit_stream(backend, request)
+        self._job = job
+        self._job_selection = request.text
         self.is_loading = True
+        self._insertion = self.editor.stream_markdown_into_selection(job.chunks())
+        # The editor resolves the Future on the UI thread.
+        self._insertion.add_done_callback(lambda insertion: self._finish_generation(job, key, insertion))
         self.setState()
-        
-        # Simulate network request with QTimer to invoke callback on the main thread safely
-        QTimer.singleShot(3000, self._finish_generation)
+
+    def _generate_chunked(self, backend, request, key, chunks):
+        """
+        Map-reduce over a long selection (see lib/ai/chunking.py): the chunks
+        run on the AI worker pool, the progress indicator counts them, and
+        the reduced result replaces the selection in one undo step.
+        """
+        job = ChunkedJob(
+            AiEngine.instance(),
+            backend,
+            request,
+            chunks,
+            on_progress=lambda done, total: self._on_chunk_progress(job, done, total),
+            on_done=lambda result: self._on_chunked_done(job, key, result),
+            on_error=lambda error: self._on_chunked_error(job, error),
+        )
+        self._job = job
+        self._job_selection = request.text
+        self.is_loading = True
+        self.progress = (0, job.total)
+        self.setState()
+        job.start()
+
+    def _on_chunk_progress(self, job, done, total):
+        if job is self._job:
+            self.progress = (done, total)
+            self.setState()
+
+    def _on_chunked_done(self, job, key, result):
+        if job is not self._job:
+            return
+        self._insertion = self.editor.stream_markdown_into_selection(result)
+        self._insertion.add_done_callback(lambda insertion: self._finish_generation(job, key, insertion))
+
+    def _on_chunked_error(self, job, error):
+        if job is not self._job:
+            return
+        print(f"AI action failed: {error}")
+        self._cancel_generation()
+        self.setState()
+
+    def _build_progress_label(self):
+        # Shown next to the spinner while a chunked job runs.
+        return Container(
+            key=Key("ai_chunk_progress"),
+            visible=self.is_loading and self.progress is not None,
+            margin=EdgeInsets.only(right=6),
+            child=Text(
+                "{}/{}".format(*self.progress) if self.progress else "",
+                key=Key("ai_chunk_progress_txt"),
+                style=TextStyle(fontSize=12),
+            ),
+        )
 
     def _build_styled_dropdown(self, key_str, controller, items, on_changed):
         return Dropdown(
@@ -162,6 +307,18 @@ class AiActionsControlsState(State):
                             key=Key("ai_controls_sized_box_1"),
                         ),
                         self._build_styled_dropdown("ai_action_dropdown", self.action_controller, action_label, self.setAction),
+                        # Shown when Generate would reuse a cached result.
+                        Container(
+                            key=Key("ai_cache_hit_indicator"),
+                            visible=self.cache_hit,
+                            margin=EdgeInsets.only(left=8),
+                            child=Icon(
+                                Icons.bolt_rounded,
+                                key=Key("ai_cache_hit_icon"),
+                                size=20,
+                                color=AppColors.iconColor,
+                            ),
+                        ),
                         
                         Container(
                             key=Key("ai_controls_divider_container"),
@@ -179,6 +336,7 @@ class AiActionsControlsState(State):
                                 crossAxisAlignment=CrossAxisAlignment.CENTER,
                                 key=Key("generate_btn_inner_row"),
                                 children=[
+                                    self._build_progress_label(),
                                     ProgressIndicator(
                                         key=Key("home_page_progress_indicator"),
                                         controller=ProgressIndicatorController(
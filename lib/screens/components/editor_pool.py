@@ -0,0 +1,110 @@
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from lib.data.note_store import Note
+
+# Editors kept mounted by the note editor screen; `editor_pool_size` in
+# config.yaml overrides it.
+DEFAULT_POOL_SIZE = 3
+
+
+class EditorSlot:
+    """One pre-built editor: its controller, its MarkdownEditor widget and the note it holds."""
+
+    def __init__(self, index: int, controller, editor):
+        self.index = index
+        self.controller = controller
+        self.editor = editor
+        self.note_id = None
+        self.note: Optional[Note] = None
+        self.last_used = 0
+
+
+class EditorPool:
+    """
+    A fixed set of editors that are built and mounted once and re-targeted
+    to notes by swapping their content.
+
+    Opening a note that a slot already holds only makes that slot the
+    active one; nothing is rebuilt and no content is sent. Otherwise the
+    least recently used slot (never the active one, when there is a choice)
+    is flushed and loaded with the note through `set_content`. `prefetch`
+    does the loading ahead of time, e.g. while the pointer rests on a
+    note's open button, so the following open is a hit.
+    """
+
+    def __init__(self, size: int, make_slot: Callable[[int], Tuple[Any, Any]]):
+        self.slots: List[EditorSlot] = [EditorSlot(i, *make_slot(i)) for i in range(max(1, size))]
+        self.active = self.slots[0]
+        self._clock = 0
+        self.stats = {"hits": 0, "misses": 0, "prefetches": 0, "evictions": 0, "last_open_ms": 0.0}
+
+    def find(self, note_id) -> Optional[EditorSlot]:
+        for slot in self.slots:
+            if slot.note_id == note_id:
+                return slot
+        return None
+
+    def _touch(self, slot: EditorSlot):
+        self._clock += 1
+        slot.last_used = self._clock
+
+    def _victim(self) -> EditorSlot:
+        candidates = [slot for slot in self.slots if slot is not self.active] or self.slots
+        return min(candidates, key=lambda slot: (slot.note_id is not None, slot.last_used))
+
+    def _retarget(self, slot: EditorSlot, note: Note):
+        controller = slot.controller
+        if slot.note_id is not None:
+            self.stats["evictions"] += 1
+        # Persist whatever the previous note still has queued.
+        controller.flush_autosave()
+        controller.document_id = note.id
+        controller.content = note.body
+        controller.set_content(note.body)
+        slot.note_id = note.id
+        slot.note = note
+
+    def activate(self, note_id, load_note: Callable[[Any], Optional[Note]]) -> Optional[EditorSlot]:
+        """
+        Makes the slot holding `note_id` the active one, loading the note
+        into the least recently used slot first if no slot holds it.
+        Returns None if `load_note` finds no such note.
+        """
+        start = time.perf_counter()
+        slot = self.find(note_id)
+        if slot is not None:
+            self.stats["hits"] += 1
+        else:
+            note = load_note(note_id)
+            if not note:
+                return None
+            self.stats["misses"] += 1
+            slot = self._victim()
+            self._retarget(slot, note)
+        self.active = slot
+        self._touch(slot)
+        self.stats["last_open_ms"] = (time.perf_counter() - start) * 1000
+        return slot
+
+    def forget(self, note_id):
+        """Empties the slot holding `note_id` (e.g. after the note was deleted)."""
+        slot = self.find(note_id)
+        if slot is not None:
+            slot.controller.document_id = None
+            slot.note_id = None
+            slot.note = None
+            slot.last_used = 0
+
+    def prefetch(self, note_id, load_note: Callable[[Any], Optional[Note]]) -> bool:
+        """Loads `note_id` into an inactive slot. Returns False if it is already pooled or missing."""
+        if len(self.slots) < 2 or self.find(note_id) is not None:
+            return False
+        note = load_note(note_id)
+        if not note:
+            return False
+        slot = self._victim()
+        self._retarget(slot, note)
+        self._touch(slot)
+        self.stats["prefetches"] += 1
+        return True
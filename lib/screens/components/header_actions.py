@@ -1,15 +1,17 @@
 from pythra.base import Widget, Key
 from pythra.state import StatefulWidget, State
-from pythra.widgets import Row, IconButton, Icon, ButtonStyle, Image, AssetImage, SizedBox, MainAxisAlignment, CrossAxisAlignment
-from pythra.styles import Colors, BorderRadius, EdgeInsets
+from pythra.widgets import Row, IconButton, Icon, ButtonStyle, Image, AssetImage, SizedBox, MainAxisAlignment, CrossAxisAlignment, Container, TextField
+from pythra.styles import Colors, BorderRadius, EdgeInsets, InputDecoration
+from pythra.controllers import TextEditingController
 from pythra.icons import Icons
 from pythra.core import Framework
 from lib.constants.colors import AppColors
 from lib.constants.theme import AppThemes
 
 class HeaderActions(StatefulWidget):
-    def __init__(self, key: Key, onSave: callable = None, onAiChat: callable = None, onAccount: callable = None):
+    def __init__(self, key: Key, onSave: callable = None, onAiChat: callable = None, onAccount: callable = None, onSearch: callable = None):
         self.onSave = onSave
+        self.onSearch = onSearch
         self.onAiChat = onAiChat
         self.onAccount = onAccount
         super().__init__(key=key)
@@ -18,6 +20,16 @@ class HeaderActions(StatefulWidget):
         return HeaderActionsState()
 
 class HeaderActionsState(State):
+    def __init__(self):
+        super().__init__()
+        self.search_controller = TextEditingController()
+        self.search_controller.add_listener(self._on_search_changed)
+
+    def _on_search_changed(self):
+        # onSearch receives the query on every keystroke; an empty string clears the search.
+        if self.get_widget().onSearch:
+            self.get_widget().onSearch(self.search_controller.text)
+
     @property
     def is_dark(self):
         return Framework.instance().theme.brightness == 'dark'
@@ -34,6 +46,20 @@ class HeaderActionsState(State):
             mainAxisAlignment=MainAxisAlignment.END,
             crossAxisAlignment=CrossAxisAlignment.START,
             children=[
+                Container(
+                    key=Key("header_search_container"),
+                    width=320,
+                    child=TextField(
+                        key=Key("header_search_input"),
+                        controller=self.search_controller,
+                        leading=Icon(Icons.search_rounded, key=Key("header_search_ico")),
+                        decoration=InputDecoration(
+                            hintText="Search notes",
+                            filled=False,
+                        ),
+                    ),
+                ) if self.widget().onSearch else (),
+                SizedBox(width=12, key=Key("sixe_box_header_search")) if self.widget().onSearch else (),
                 IconButton(
                     key=Key("Header_btn_1"),
                     icon=Icon(
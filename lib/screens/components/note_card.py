@@ -38,18 +38,37 @@ class NoteCardState(State):
         self.on_open = None
         self.on_delete = None
         self.on_chat = None
+        # The subtree from the last build and the props it was built from.
+        self._built = None
+        self._built_props = None
 
     def initState(self):
-        self.base_key = self.get_widget().key.value
-        self.title = self.get_widget().title
-        self.note = self.get_widget().note
-        self.date = self.get_widget().date
-        self.color = self.get_widget().color
-        self.on_open = self.get_widget().on_open
-        self.on_delete = self.get_widget().on_delete
-        self.on_chat = self.get_widget().on_chat
+        self._copy_props(self.get_widget())
+
+    def didUpdateWidget(self, oldWidget, new_widget):
+        self._copy_props(new_widget)
+
+    def _copy_props(self, widget):
+        self.base_key = widget.key.value
+        self.title = widget.title
+        self.note = widget.note
+        self.date = widget.date
+        self.color = widget.color
+        self.on_open = widget.on_open
+        self.on_delete = widget.on_delete
+        self.on_chat = widget.on_chat
 
     def build(self) -> Widget:
+        # A card is ~30 widgets; rebuild them only when what they show changed.
+        # The callbacks are not compared: cards are keyed by note id and the
+        # callbacks only ever act on that note.
+        props = (self.base_key, self.title, self.note, self.date, self.color)
+        if self._built is None or props != self._built_props:
+            self._built = self._build_card()
+            self._built_props = props
+        return self._built
+
+    def _build_card(self) -> Widget:
         return Stack(
             key=Key(f"{self.base_key}_stack"),
             clipBehavior=ClipBehavior.NONE,
@@ -181,6 +200,8 @@ class NoteCardState(State):
                                         key=Key(f"{self.base_key}_open_icon"),
                                     ),
                                     onPressed=self.on_open,
+                                    # Hovering it prefetches the note; see virtual_grid.js.
+                                    cssClass="vgrid-hover-target",
                                     style=ButtonStyle(
                                         backgroundColor=AppColors.buttonBackgroundColor,
                                         hoverColor=AppColors.buttonHoverColor,
@@ -215,5 +236,8 @@ class NoteCard(StatefulWidget):
         self.on_chat = on_chat
         super().__init__(key)
 
+    def render_props(self):
+        return {"title": self.title, "note": self.note, "date": self.date, "color": self.color}
+
     def createState(self) -> NoteCardState:
         return NoteCardState()
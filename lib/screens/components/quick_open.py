@@ -0,0 +1,213 @@
+from typing import Callable, List
+
+from lib.constants.colors import *
+from lib.data.title_index import TitleIndex
+from plugins.markdown.js_queue import JsCommandQueue
+from pythra import (
+    Framework,
+    StatefulWidget,
+    State,
+    Column,
+    Key,
+    Widget,
+    Container,
+    Text,
+    Colors,
+    Center,
+    SizedBox,
+    CrossAxisAlignment,
+    EdgeInsets,
+    Icon,
+    Icons,
+    BorderRadius,
+    BoxDecoration,
+    TextStyle,
+    GestureDetector,
+    TextField,
+    TextEditingController,
+    InputDecoration,
+)
+
+_SHORTCUT_CALLBACK = "quick_open_shortcut"
+_shortcut_handlers: List[Callable[[str], bool]] = []
+_shortcut_installed = False
+
+# Ctrl+P / Cmd+P toggles the palette. Escape and Enter are only forwarded
+# while it is open, so normal typing in the editor never crosses the bridge.
+_SHORTCUT_JS = """
+(function () {
+    if (window._pythraQuickOpenInstalled) return;
+    window._pythraQuickOpenInstalled = true;
+    window._pythraQuickOpenVisible = false;
+    window.addEventListener('keydown', function (event) {
+        let action = null;
+        if ((event.ctrlKey || event.metaKey) && !event.altKey && !event.shiftKey && event.key.toLowerCase() === 'p') {
+            action = 'toggle';
+        } else if (window._pythraQuickOpenVisible && event.key === 'Escape') {
+            action = 'dismiss';
+        } else if (window._pythraQuickOpenVisible && event.key === 'Enter') {
+            action = 'accept';
+        }
+        if (action === null || typeof handleInput !== 'function') return;
+        event.preventDefault();
+        event.stopPropagation();
+        handleInput('%s', action);
+    }, true);
+})();
+""" % _SHORTCUT_CALLBACK
+
+
+def _dispatch_shortcut(action):
+    # The newest handler whose screen is on top of the navigator takes it.
+    for handler in reversed(_shortcut_handlers):
+        if handler(action):
+            return
+
+
+def _install_shortcut_script():
+    framework = Framework.instance()
+    window = framework.window
+    if window and (not hasattr(window, "is_document_ready") or window.is_document_ready()):
+        JsCommandQueue.for_window(framework, framework.id).run(_SHORTCUT_JS)
+        return
+    # Same wait the framework uses before its first reconciliation.
+    from PySide6.QtCore import QTimer
+    QTimer.singleShot(50, _install_shortcut_script)
+
+
+def register_quick_open_shortcut(handler: Callable[[str], bool]):
+    """
+    Routes the quick-open keys to `handler(action)`, where action is "toggle",
+    "dismiss" or "accept". A handler returns False when its screen is not the
+    visible one, and the key goes to the previously registered handler.
+    """
+    global _shortcut_installed
+    if handler not in _shortcut_handlers:
+        _shortcut_handlers.append(handler)
+    if not _shortcut_installed:
+        _shortcut_installed = True
+        Framework.instance().api.register_callback(_SHORTCUT_CALLBACK, _dispatch_shortcut)
+        _install_shortcut_script()
+
+
+def set_quick_open_visible(visible: bool):
+    """Tells the shortcut script whether Escape/Enter should reach Python."""
+    framework = Framework.instance()
+    if framework.window:
+        JsCommandQueue.for_window(framework, framework.id).run(
+            f"window._pythraQuickOpenVisible = {'true' if visible else 'false'};"
+        )
+
+
+class QuickOpen(StatefulWidget):
+    """
+    Ctrl+P palette that fuzzy-matches note titles as you type.
+
+    The parent owns visibility (show it inside a Positioned overlay) and
+    receives the chosen note id through `onSelect`.
+    """
+
+    def __init__(self, key: Key, onSelect: Callable[[int], None], onDismiss: Callable[[], None]):
+        self.onSelect = onSelect
+        self.onDismiss = onDismiss
+        super().__init__(key=key)
+
+    def createState(self):
+        return QuickOpenState()
+
+
+class QuickOpenState(State):
+    def __init__(self):
+        super().__init__()
+        self.query_controller = TextEditingController()
+        self.query_controller.add_listener(self._on_query_changed)
+        self.results = []
+        # Bumped on every keystroke; lookups for an older generation are
+        # cancelled and their results dropped, so stale keystrokes never render.
+        self._generation = 0
+
+    def _on_query_changed(self):
+        self._generation += 1
+        generation = self._generation
+        query = self.query_controller.text
+        if not query.strip():
+            self.results = []
+            self.setState()
+            return
+        self.runAsync(
+            lambda: TitleIndex.instance().search(
+                query, is_cancelled=lambda: generation != self._generation
+            ),
+            on_done=lambda results: self._show_results(generation, results),
+        )
+
+    def _show_results(self, generation, results):
+        if generation != self._generation or results is None:
+            return
+        self.results = results
+        self.setState()
+
+    def accept(self):
+        """Opens the best match (Enter)."""
+        if self.results:
+            self.select(self.results[0][0])
+
+    def select(self, note_id):
+        self.get_widget().onSelect(note_id)
+
+    def build(self) -> Widget:
+        return Container(
+            key=Key("quick_open_scrim"),
+            height="100vh",
+            width="100vw",
+            color=Colors.rgba(0, 0, 0, 0.35),
+            padding=EdgeInsets.only(top=96),
+            child=Center(
+                key=Key("quick_open_center"),
+                child=Container(
+                    key=Key("quick_open_box"),
+                    width=560,
+                    zAxisIndex=2000,
+                    padding=EdgeInsets.all(16),
+                    decoration=BoxDecoration(
+                        color=Colors.surface,
+                        borderRadius=BorderRadius.all(12),
+                    ),
+                    child=Column(
+                        key=Key("quick_open_column"),
+                        crossAxisAlignment=CrossAxisAlignment.STRETCH,
+                        children=[
+                            TextField(
+                                key=Key("quick_open_input"),
+                                controller=self.query_controller,
+                                leading=Icon(Icons.search_rounded, key=Key("quick_open_search_ico")),
+                                decoration=InputDecoration(
+                                    hintText="Go to note...",
+                                    filled=False,
+                                ),
+                            ),
+                            SizedBox(height=8, key=Key("quick_open_spacer")),
+                            *[
+                                GestureDetector(
+                                    key=Key(f"quick_open_result_{note_id}"),
+                                    onTap=lambda details, note_id=note_id: self.select(note_id),
+                                    child=Container(
+                                        key=Key(f"quick_open_result_{note_id}_container"),
+                                        padding=EdgeInsets.symmetric(vertical=8, horizontal=12),
+                                        decoration=BoxDecoration(
+                                            color=AppColors.buttonBackgroundColor if i == 0 else Colors.transparent,
+                                            borderRadius=BorderRadius.all(8),
+                                        ),
+                                        child=Text(
+                                            title,
+                                            key=Key(f"quick_open_result_{note_id}_title"),
+                                            style=TextStyle(fontSize=15, color=Colors.onSurface),
+                                        ),
+                                    ),
+                                ) for i, (note_id, title) in enumerate(self.results)
+                            ],
+                        ],
+                    ),
+                ),
+            ),
+        )
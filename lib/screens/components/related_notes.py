@@ -0,0 +1,139 @@
+from typing import Callable, Optional
+
+from lib.constants.colors import *
+from lib.ai.semantic_index import SemanticIndex
+from lib.data.note_store import NoteStore
+from pythra import (
+    StatefulWidget,
+    State,
+    Column,
+    Key,
+    Widget,
+    Container,
+    Text,
+    Colors,
+    SizedBox,
+    CrossAxisAlignment,
+    EdgeInsets,
+    BorderRadius,
+    BoxDecoration,
+    BorderSide,
+    TextStyle,
+    GestureDetector,
+)
+
+
+class RelatedNotesPanel(StatefulWidget):
+    """
+    Side panel listing the notes most similar to `note_id` (see
+    lib/ai/semantic_index.py). The parent owns visibility and receives the
+    chosen note id through `onSelect`.
+    """
+
+    def __init__(self, key: Key, note_id: Optional[int], onSelect: Callable[[int], None]):
+        self.note_id = note_id
+        self.onSelect = onSelect
+        super().__init__(key=key)
+
+    def createState(self):
+        return RelatedNotesPanelState()
+
+
+class RelatedNotesPanelState(State):
+    def __init__(self):
+        super().__init__()
+        self.note_id = None
+        self.results = []
+        self.loading = False
+        # Bumped per lookup; results for an earlier note are dropped.
+        self._generation = 0
+
+    def initState(self):
+        self.load(self.get_widget().note_id)
+
+    def didUpdateWidget(self, oldWidget, new_widget):
+        if new_widget.note_id != self.note_id:
+            self.load(new_widget.note_id)
+
+    def load(self, note_id):
+        self._generation += 1
+        generation = self._generation
+        self.note_id = note_id
+        self.results = []
+        if note_id is None:
+            # Clears a pending "loading" state; its results are dropped by generation.
+            self.loading = False
+            self.setState()
+            return
+        self.loading = True
+
+        def query():
+            hits = SemanticIndex.instance().related(note_id)
+            scores = dict(hits)
+            return [(note.id, note.title, scores[note.id]) for note in NoteStore.instance().get_metadata(scores)]
+
+        self.runAsync(query, on_done=lambda results: self._show_results(generation, results))
+
+    def _show_results(self, generation, results):
+        if generation != self._generation:
+            return
+        self.results = results
+        self.loading = False
+        self.setState()
+
+    def select(self, note_id):
+        self.get_widget().onSelect(note_id)
+
+    def build(self) -> Widget:
+        if self.loading:
+            placeholder = "Finding related notes..."
+        elif not self.results:
+            placeholder = "No related notes yet."
+        else:
+            placeholder = None
+        return Container(
+            key=Key("related_notes_box"),
+            width=280,
+            padding=EdgeInsets.all(16),
+            decoration=BoxDecoration(
+                color=Colors.surface,
+                borderRadius=BorderRadius.all(12),
+                border=BorderSide(width=1, color=Colors.adaptive(dark="#5a5a5a", light="#d3d3d3")),
+            ),
+            child=Column(
+                key=Key("related_notes_column"),
+                crossAxisAlignment=CrossAxisAlignment.STRETCH,
+                children=[
+                    Text(
+                        "Related notes",
+                        key=Key("related_notes_heading"),
+                        style=TextStyle(fontSize=16, fontWeight="bold", color=Colors.onSurface),
+                    ),
+                    SizedBox(height=8, key=Key("related_notes_spacer")),
+                    Text(
+                        placeholder,
+                        key=Key("related_notes_placeholder"),
+                        style=TextStyle(fontSize=13, color=AppColors.iconColor),
+                    ) if placeholder else SizedBox(key=Key("related_notes_placeholder"), height=0),
+                    *[
+                        GestureDetector(
+                            key=Key(f"related_note_{note_id}"),
+                            onTap=lambda details, note_id=note_id: self.select(note_id),
+                            child=Container(
+                                key=Key(f"related_note_{note_id}_container"),
+                                padding=EdgeInsets.symmetric(vertical=8, horizontal=12),
+                                decoration=BoxDecoration(
+                                    color=Colors.transparent,
+                                    borderRadius=BorderRadius.all(8),
+                                ),
+                                child=Text(
+                                    f"{title}  ·  {score:.0%}",
+                                    key=Key(f"related_note_{note_id}_title"),
+                                    style=TextStyle(fontSize=14, color=Colors.onSurface),
+                                ),
+                            ),
+                        ) for note_id, title, score in self.results
+                    ],
+                ],
+            ),
+        )
@@ -1,8 +1,15 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+
 from lib.constants.theme import AppThemes
-from .note_editor_screen import NoteEditorScreen
+from lib.data.note_store import NoteStore, DASHBOARD_PAGE_SIZE
+from lib.data.note_table import NoteTable, DEFAULT_PALETTE
 from .components.note_card import NoteCard
 from lib.constants.colors import *
 from lib.screens.components.header_actions import HeaderActions
+from lib.screens.components.quick_open import QuickOpen, register_quick_open_shortcut, set_quick_open_visible
 
 from pythra import (
     Framework,
@@ -37,14 +44,41 @@ from pythra import (
     Image,
     AssetImage,
     Navigator, PageRoute, NavigatorState,
-    GridView,
+    VirtualGridView,
+    VirtualGridController,
     GestureDetector,
     Padding,
     TextField,
     TextEditingController,
     InputDecoration,
+    dispatch_to_main,
 )
 
+# Cards pre-rendered with the grid (three rows); the rest are built on demand.
+GRID_INITIAL_ITEMS = 15
+# Pages of DASHBOARD_PAGE_SIZE notes kept for the grid's item builder.
+_MAX_CACHED_PAGES = 8
+# NoteCard instances kept for reuse; a reused card with unchanged props
+# returns its previous subtree instead of rebuilding it.
+_MAX_CACHED_CARDS = 256
+# Grid callback that virtual_grid.js calls when the pointer rests on a
+# card's open button (`<itemBuilderName>_hover`).
+_GRID_HOVER_CALLBACK = "vgrid_item_builder_notes_grid_hover"
+# The editor screen is imported and preloaded this long after the dashboard
+# is built, so neither delays its first paint.
+_EDITOR_PRELOAD_DELAY_MS = 500
+# Sort order the store's pages already come in; any other order or a color
+# filter is computed on the NoteTable.
+_DEFAULT_SORT = "updated_at"
+_SORT_LABELS = {"updated_at": "Modified", "created_at": "Created"}
+
+
+def _build_note_editor(navigator):
+    # Importing the editor screen loads the whole Markdown editor plugin.
+    from .note_editor_screen import NoteEditorScreen
+    return NoteEditorScreen(key=Key("note_page"), navigator=navigator)
+
+
 class DashboardScreen(StatefulWidget):
     def __init__(
         self,
@@ -72,37 +106,369 @@ class DashboardScreenState(State):
         self.title_controller = TextEditingController()
         self.note_controller = TextEditingController()
 
-        self.notes = [
-            {"title": "Design", "note": "Make the design looks okay...", "date": "20 Dec", "color": Colors.hex("#FFAB91")},
-            {"title": "Project", "note": "Finish the project documentation", "date": "21 Dec", "color": Colors.hex("#CE93D8")},
-            {"title": "Meeting", "note": "Sync with the team at 10am", "date": "22 Dec", "color": Colors.hex("#4DD0E1")},
-        ]
-        self.note_colors = [
-            Colors.hex("#FFAB91"), # Orange
-            Colors.hex("#CE93D8"), # Purple
-            Colors.hex("#4DD0E1"), # Cyan
-            Colors.hex("#FFF176"), # Yellow
-            Colors.hex("#80CBC4"), # Teal
-        ]
+        self.store = NoteStore.instance()
+        if self.store.count() == 0:
+            # First launch: seed the store with the sample notes (oldest first,
+            # so "Design" ends up at the top of the dashboard).
+            self.store.create_notes([
+                {"title": "Meeting", "snippet": "Sync with the team at 10am", "color": "#4DD0E1", "body": "<p>Sync with the team at 10am</p>"},
+                {"title": "Project", "snippet": "Finish the project documentation", "color": "#CE93D8", "body": "<p>Finish the project documentation</p>"},
+                {"title": "Design", "snippet": "Make the design looks okay...", "color": "#FFAB91", "body": "<p>Make the design looks okay...</p>"},
+            ])
+        self.search_query = ""
+        self.show_quick_open = False
+        self.quick_open = QuickOpen(
+            key=Key("dashboard_quick_open"),
+            onSelect=self.quick_open_note,
+            onDismiss=self.hide_quick_open,
+        )
+        # The grid asks for cards by index. Outside a search they are read
+        # from the store a page at a time, so memory and the per-setState
+        # work stay flat however many notes there are.
+        self.grid_controller = VirtualGridController()
+        self.search_results = None
+        self.note_count = 0
+        self._note_pages = OrderedDict()
+        self._cards = OrderedDict()
+        # Sorting by creation date or filtering by color selects the ids on
+        # the NoteTable (a worker-thread query); the pages are then read by id.
+        self.sort_by = _DEFAULT_SORT
+        self.color_filter = None
+        self.selection_ids = None
+        self.color_counts = {}
+        self._selection_generation = 0
+        # Semantic mode (the AI chat buttons): the grid shows the notes most
+        # similar to one note or, with `semantic_search` on, to the search
+        # text, ranked on the SemanticIndex off the UI thread.
+        self.semantic_search = False
+        self.semantic_results = None
+        self.semantic_label = None
+        self._semantic_generation = 0
+        # Notes edited in the editor are saved from the autosave thread; the
+        # store listener coalesces those changes into one grid refresh on the
+        # UI thread.
+        self._store_refresh_lock = threading.Lock()
+        self._store_refresh_pending = False
+        self._reload_notes()
+        # Orange, purple, cyan, yellow, teal.
+        self.note_colors = [Colors.hex(color) for color in DEFAULT_PALETTE]
 
     def initState(self):
         self.note_editor_route = PageRoute(
-            builder=lambda nav: NoteEditorScreen(
-                key=Key("note_page"), navigator=nav,
-            ),
+            builder=_build_note_editor,
             name="note_editor"
         )
-        print("🚀 Preloading NoteEditorScreen in background...")
-        self.navigator.preload(self.note_editor_route)
+        from PySide6.QtCore import QTimer
+        QTimer.singleShot(_EDITOR_PRELOAD_DELAY_MS, self._preload_note_editor)
+        register_quick_open_shortcut(self._on_quick_open_key)
+        framework = Framework.instance()
+        if framework.api:
+            framework.api.register_callback(_GRID_HOVER_CALLBACK, self._on_card_hover)
+        self.store.add_listener(self._on_store_change)
+        # Loads the NoteTable off the UI thread and fills in the color counts.
+        self._refresh_selection(reset_grid=False)
+
+    def dispose(self):
+        self.store.remove_listener(self._on_store_change)
+        super().dispose()
+
+    def _on_store_change(self, change, note_id, title):
+        # Creates and deletes come from this screen, which updates the grid
+        # itself; edits and renames come from the editor, on any thread.
+        if change not in ("modified", "renamed"):
+            return
+        with self._store_refresh_lock:
+            if self._store_refresh_pending:
+                return
+            self._store_refresh_pending = True
+        dispatch_to_main(self._apply_store_changes)
+
+    def _apply_store_changes(self):
+        with self._store_refresh_lock:
+            self._store_refresh_pending = False
+        # An edit moves the note to the top of the default order, so the
+        # cached pages and every visible card are re-read.
+        self._refresh_grid()
+        self.setState()
+
+    def _preload_note_editor(self):
+        # open_note may already have built it.
+        if self.note_editor_route.widget_instance is None:
+            print("🚀 Preloading NoteEditorScreen in background...")
+            self.navigator.preload(self.note_editor_route)
     
-    def open_note(self):
+    @staticmethod
+    def _format_date(timestamp: float) -> str:
+        if time.time() - timestamp < 60:
+            return "Now"
+        return time.strftime("%d %b", time.localtime(timestamp))
+
+    def _reload_notes(self):
+        """Re-reads the note count (or the ranked search hits) and drops cached pages."""
+        self._note_pages.clear()
+        if self.semantic_results is not None:
+            self.search_results = self.semantic_results
+            self.note_count = len(self.search_results)
+        elif self.search_query:
+            self.search_results = self.store.search(self.search_query)
+            self.note_count = len(self.search_results)
+        elif self.selection_ids is not None:
+            self.search_results = None
+            self.note_count = len(self.selection_ids)
+        else:
+            self.search_results = None
+            self.note_count = self.store.count()
+
+    def _note_at(self, index):
+        """The Note at grid position `index`, or None past the end."""
+        if self.search_results is not None:
+            return self.search_results[index] if index < len(self.search_results) else None
+        page, offset = divmod(index, DASHBOARD_PAGE_SIZE)
+        notes = self._note_pages.get(page)
+        if notes is None:
+            start = page * DASHBOARD_PAGE_SIZE
+            if self.selection_ids is not None:
+                notes = self.store.get_metadata(self.selection_ids[start:start + DASHBOARD_PAGE_SIZE].tolist())
+            else:
+                notes = self.store.list_notes(DASHBOARD_PAGE_SIZE, start)
+            self._note_pages[page] = notes
+            if len(self._note_pages) > _MAX_CACHED_PAGES:
+                self._note_pages.popitem(last=False)
+        else:
+            self._note_pages.move_to_end(page)
+        return notes[offset] if offset < len(notes) else None
+
+    def _index_of(self, note_id):
+        """Grid position of a note among the loaded pages, or None."""
+        if self.search_results is not None:
+            pages = [(0, self.search_results)]
+        else:
+            pages = [(page * DASHBOARD_PAGE_SIZE, notes) for page, notes in self._note_pages.items()]
+        for start, notes in pages:
+            for offset, note in enumerate(notes):
+                if note.id == note_id:
+                    return start + offset
+        return None
+
+    def _refresh_grid(self, method="reset", *args):
+        """
+        Reloads the notes and updates the grid engine. `insertItems` and
+        `removeItems` shift the engine's cached cards, so only the cards that
+        actually changed are fetched again; `reset` re-fetches all visible ones.
+        """
+        self._reload_notes()
+        if method == "reset":
+            args = (self.note_count,)
+        framework = Framework.instance()
+        if framework.window:
+            # Straight to the grid engine (render/js/virtual_grid.js); it is
+            # on the page whether or not an editor has been mounted.
+            framework.window.evaluate_js(
+                framework.id,
+                f"(function() {{ const grid = window._pythra_instances && window._pythra_instances['notes_grid_vgrid'];"
+                f" if (grid) grid.{method}(...{json.dumps(list(args))}); }})();",
+            )
+
+    def build_note_card(self, index):
+        """Item builder for the notes grid."""
+        note = self._note_at(index)
+        if note is None:
+            return SizedBox(key=Key(f"note_{index}_empty"), width=0, height=0)
+        props = {
+            "title": note.title,
+            "note": note.snippet,
+            "date": self._format_date(note.updated_at),
+            "color": Colors.hex(note.color),
+        }
+        card = self._cards.get(note.id)
+        if card is not None and card.render_props() == props:
+            self._cards.move_to_end(note.id)
+            return card
+        # Keyed by the note id, not the grid position, so inserting a note
+        # does not change the identity of every card after it.
+        card = self._cards[note.id] = NoteCard(
+            key=Key(f"note_{note.id}"),
+            on_open=lambda note_id=note.id: self.open_note(note_id),
+            on_delete=lambda note_id=note.id: self.delete_note(note_id),
+            on_chat=lambda note_id=note.id: self.chat_note(note_id),
+            **props,
+        )
+        if len(self._cards) > _MAX_CACHED_CARDS:
+            self._cards.popitem(last=False)
+        return card
+
+    def search_notes(self, query):
+        query = query.strip()
+        if query == self.search_query:
+            return
+        self.search_query = query
+        if self.semantic_search and query:
+            self._run_semantic(lambda index: index.search(query), f"Similar to \u201c{query}\u201d")
+            return
+        if self.semantic_results is not None:
+            self.semantic_results = None
+            self.semantic_label = None
+            self._refresh_grid()
+            self.setState()
+            return
+        self._refresh_grid()
+
+    # --- Sorting and color filter ---
+
+    def _refresh_selection(self, reset_grid=True):
+        """
+        Re-selects the note ids for the current sort order and color filter
+        on the NoteTable, and recounts the notes per color, on a worker
+        thread. A newer call supersedes a pending one.
+        """
+        self._selection_generation += 1
+        generation = self._selection_generation
+        sort_by, color = self.sort_by, self.color_filter
+
+        def query():
+            table = NoteTable.instance()
+            ids = None
+            if sort_by != _DEFAULT_SORT or color is not None:
+                ids = table.select(by=sort_by, descending=True, color=color)
+            return ids, table.count_by_color()
+
+        self.runAsync(query, on_done=lambda result: self._show_selection(generation, reset_grid, *result))
+
+    def _show_selection(self, generation, reset_grid, ids, counts):
+        if generation != self._selection_generation:
+            return
+        self.selection_ids = ids
+        self.color_counts = counts
+        if reset_grid:
+            self._refresh_grid()
+        self.setState()
+
+    def toggle_sort(self):
+        self.sort_by = "created_at" if self.sort_by == _DEFAULT_SORT else _DEFAULT_SORT
+        self._refresh_selection()
+        self.setState()
+
+    def set_color_filter(self, color):
+        self.color_filter = None if color == self.color_filter else color
+        self._refresh_selection()
+        self.setState()
+
+    def _editor_state(self):
+        """The note editor's state once the preloaded screen is built, else None."""
+        screen = self.note_editor_route.widget_instance
+        return screen.get_state() if screen is not None else None
+
+    def _on_card_hover(self, index):
+        note = self._note_at(int(index))
+        editor_state = self._editor_state()
+        if note is not None and editor_state is not None:
+            editor_state.prefetch_note(note.id)
+
+    def open_note(self, note_id):
+        editor_screen = self.note_editor_route.build(self.navigator)
+        editor_state = editor_screen.get_state()
+        if editor_state:
+            editor_state.open_note(note_id)
+        else:
+            # The preload has not finished yet; the state picks it up in initState.
+            editor_screen.note_id = note_id
         self.navigator.push(self.note_editor_route)
         
-    def delete_note(self):
-        print("Delete note clicked")
+    # --- Quick open (Ctrl+P) ---
+
+    def _on_quick_open_key(self, action):
+        if self.navigator.history[-1].widget_instance is not self.get_widget():
+            return False
+        if action == "toggle" and not self.show_quick_open:
+            self.show_quick_open_palette()
+        elif action in ("toggle", "dismiss"):
+            self.hide_quick_open()
+        elif action == "accept" and self.show_quick_open:
+            self.quick_open.get_state().accept()
+        return True
+
+    def show_quick_open_palette(self):
+        self.show_quick_open = True
+        set_quick_open_visible(True)
+        self.setState()
+
+    def hide_quick_open(self):
+        self.show_quick_open = False
+        set_quick_open_visible(False)
+        self.setState()
+
+    def quick_open_note(self, note_id):
+        self.hide_quick_open()
+        self.open_note(note_id)
+
+    def delete_note(self, note_id):
+        index = self._index_of(note_id)
+        self.store.delete_note(note_id)
+        self._cards.pop(note_id, None)
+        if self.semantic_results is not None:
+            self.semantic_results = [note for note in self.semantic_results if note.id != note_id]
+        editor_state = self._editor_state()
+        if editor_state is not None:
+            editor_state.forget_note(note_id)
+        if self.selection_ids is not None:
+            self._refresh_selection()
+            return
+        if index is None:
+            self._refresh_grid()
+        else:
+            self._refresh_grid("removeItems", index, 1)
+        self._refresh_selection(reset_grid=False)
         
-    def chat_note(self):
-        print("AI Chat note clicked")
+    # --- Semantic mode ---
+
+    def _run_semantic(self, query, label):
+        """
+        Ranks notes with `query(index)` on a worker thread and shows the hits
+        under `label`. The first query loads (or builds) the index.
+        """
+        self._semantic_generation += 1
+        generation = self._semantic_generation
+
+        def run():
+            # Only semantic mode needs the index; keep it off the startup path.
+            from lib.ai.semantic_index import SemanticIndex
+            hits = query(SemanticIndex.instance())
+            return self.store.get_metadata(note_id for note_id, _ in hits)
+
+        self.runAsync(run, on_done=lambda notes: self._show_semantic(generation, label, notes))
+
+    def _show_semantic(self, generation, label, notes):
+        if generation != self._semantic_generation:
+            return
+        self.semantic_results = notes
+        self.semantic_label = label
+        self._refresh_grid()
+        self.setState()
+
+    def clear_semantic(self):
+        self._semantic_generation += 1
+        self.semantic_search = False
+        self.semantic_results = None
+        self.semantic_label = None
+        self._refresh_grid()
+        self.setState()
+
+    def chat_note(self, note_id):
+        """Card AI button: shows the notes most related to this one."""
+        note = self.store.get_note(note_id)
+        if note is None:
+            return
+        self._run_semantic(
+            lambda index: [(note_id, 1.0)] + index.related(note_id),
+            f"Related to \u201c{note.title}\u201d",
+        )
+
+    def toggle_semantic_search(self):
+        """Header AI button: the search box ranks notes by meaning instead of keywords."""
+        self.semantic_search = not self.semantic_search
+        query, self.search_query = self.search_query, None
+        self.search_notes(query or "")
+        self.setState()
 
     def toggle_color_picker(self):
         self.show_color_picker = not self.show_color_picker
@@ -122,13 +488,20 @@ class DashboardScreenState(State):
         self.setState()
 
     def finalize_create_note(self):
-        new_note = {
-            "title": self.title_controller.text if self.title_controller.text else "New Note",
-            "note": self.note_controller.text if self.note_controller.text else "No content",
-            "date": "Now",
-            "color": self.selected_color if self.selected_color else Colors.white
-        }
-        self.notes.insert(0, new_note)
+        self.store.create_note(
+            title=self.title_controller.text if self.title_controller.text else "New Note",
+            snippet=self.note_controller.text if self.note_controller.text else "No content",
+            color=self.selected_color if self.selected_color else "#FFFFFF",
+        )
+        if self.selection_ids is not None:
+            self._refresh_selection()
+        else:
+            if self.search_query:
+                self._refresh_grid()
+            else:
+                # The new note is the most recently modified one: position 0.
+                self._refresh_grid("insertItems", 0, 1)
+            self._refresh_selection(reset_grid=False)
         self.show_create_dialog = False
         self.selected_color = None
         self.setState()
@@ -143,6 +516,62 @@ class DashboardScreenState(State):
         # Rebuild this row to update all icons (Sun/Moon, Sparkle, etc)
         self.setState()
 
+    def build_filter_row(self):
+        """Sort toggle and one chip per note color (with its note count) that filters the grid."""
+        chips = []
+        for i, color in enumerate(self.note_colors):
+            selected = color == self.color_filter
+            chips.append(
+                GestureDetector(
+                    key=Key(f"color_filter_btn_{i}"),
+                    onTap=lambda details, c=color: self.set_color_filter(c),
+                    child=Container(
+                        key=Key(f"color_filter_chip_{i}"),
+                        padding=EdgeInsets.symmetric(vertical=4, horizontal=12),
+                        margin=EdgeInsets.only(right=8),
+                        decoration=BoxDecoration(
+                            color=color,
+                            borderRadius=BorderRadius.circular(12),
+                            border=BorderSide(
+                                color=Colors.onSurface if selected else Colors.adaptive(dark="#5a5a5a", light="#d3d3d3"),
+                                width=2 if selected else 1,
+                            ),
+                        ),
+                        child=Text(
+                            str(self.color_counts.get(color, "")),
+                            key=Key(f"color_filter_count_{i}"),
+                            style=TextStyle(fontSize=12, color=Colors.black),
+                        ),
+                    ),
+                )
+            )
+        return Row(
+            key=Key("dashboard_filter_row"),
+            crossAxisAlignment=CrossAxisAlignment.CENTER,
+            children=[
+                ElevatedButton(
+                    key=Key("sort_toggle_btn"),
+                    child=Text(f"Sort: {_SORT_LABELS[self.sort_by]}", key=Key("sort_toggle_txt")),
+                    onPressed=self.toggle_sort,
+                    style=ButtonStyle(
+                        backgroundColor=AppColors.buttonBackgroundColor,
+                        foregroundColor=AppColors.buttonForegroundColor,
+                    ),
+                ),
+                SizedBox(key=Key("filter_row_spacer"), width=16),
+                *chips,
+                ElevatedButton(
+                    key=Key("semantic_clear_btn"),
+                    child=Text(f"{self.semantic_label or 'Semantic search'}  \u2715", key=Key("semantic_clear_txt")),
+                    onPressed=self.clear_semantic,
+                    style=ButtonStyle(
+                        backgroundColor=AppColors.buttonBackgroundColor,
+                        foregroundColor=AppColors.buttonForegroundColor,
+                    ),
+                ) if self.semantic_label or self.semantic_search else SizedBox(key=Key("semantic_clear_btn"), width=0),
+            ],
+        )
+
     def build(self):
         # Sidebar with Create Button and Color Picker
         sidebar = Container(
@@ -234,7 +663,9 @@ class DashboardScreenState(State):
                         children=[
                             HeaderActions(
                                 key=Key("dashboard_header"), 
-                                onAccount=lambda: print('on account')
+                                onAccount=lambda: print('on account'),
+                                onAiChat=self.toggle_semantic_search,
+                                onSearch=self.search_notes,
                             ),
                             SizedBox(key=Key("page_heading_sized_box"), height=24),
                             Text(
@@ -242,30 +673,26 @@ class DashboardScreenState(State):
                                 key=Key("DashBoard_Page_heading"), 
                                 style=TextStyle(fontSize=32, fontWeight="bold", color=Colors.onSurface)
                             ),
+                            SizedBox(key=Key("filter_row_sized_box"), height=12),
+                            self.build_filter_row(),
                             SizedBox(key=Key("main_sized_box"), height=24),
                             
                             # Grid View
                             Container(
                                 key=Key("grid_container"),
                                 height="85vh",
-                                child=GridView(
+                                # Only the visible rows (plus overscan) are in the DOM;
+                                # render/js/virtual_grid.js fetches cards on scroll.
+                                child=VirtualGridView(
                                     key=Key("notes_grid"),
+                                    controller=self.grid_controller,
+                                    itemCount=self.note_count,
+                                    itemBuilder=self.build_note_card,
                                     crossAxisCount=5,
                                     mainAxisSpacing=20,
                                     crossAxisSpacing=20,
                                     childAspectRatio=1.0,
-                                    children=[
-                                        NoteCard(
-                                            key=Key(f"note_{i}"),
-                                            title=note["title"],
-                                            note=note["note"],
-                                            date=note["date"],
-                                            color=note["color"],
-                                            on_open=self.open_note,
-                                            on_delete=self.delete_note,
-                                            on_chat=self.chat_note,
-                                        ) for i, note in enumerate(self.notes)
-                                    ],
+                                    initialItemCount=GRID_INITIAL_ITEMS,
                                 ),
                             ),
                         ],
@@ -359,6 +786,16 @@ class DashboardScreenState(State):
                             )
                         )
                     ] if self.show_create_dialog else []
-                )
+                ),
+                # Quick open overlay (Ctrl+P)
+                *(
+                    [
+                        Positioned(
+                            top=0, left=0, right=0, bottom=0,
+                            key=Key("quick_open_overlay"),
+                            child=self.quick_open,
+                        )
+                    ] if self.show_quick_open else []
+                ),
             ]
         )
@@ -8,16 +8,23 @@ from typing import Optional, Callable, List, Dict, Any
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath('note-app/lib'))))
 
 
+import time
+
 # import colors
 from lib.constants.colors import *
 from lib.constants.theme import AppThemes
 from lib.screens.components.header_actions import HeaderActions
 from lib.screens.components.ai_controls import AiActionsControls
+from lib.screens.components.quick_open import QuickOpen, register_quick_open_shortcut, set_quick_open_visible
+from lib.screens.components.editor_pool import EditorPool, DEFAULT_POOL_SIZE
+from lib.screens.components.related_notes import RelatedNotesPanel
+from lib.data.note_store import NoteStore
 
 from plugins.markdown.widget import MarkdownEditor
 from plugins.markdown.controller import MarkdownEditorController
+from plugins.markdown.autosave import AutosaveQueue
 from plugins.markdown.style import EditorStyle, EditorGridStyle, EditorContentStyle
-from plugins.markdown.utils.sys_font_loader import get_system_fonts_as_json
+from plugins.markdown.utils.sys_font_loader import FontCatalog
 
 # Welcome to your new Pythra App!
 from pythra import (
@@ -62,16 +69,10 @@ from pythra import (
     Navigator, PageRoute, NavigatorState,
 )
 
-formatted_fonts_json = get_system_fonts_as_json()
-# print(json.loads(formatted_fonts_json))
-fonts = json.loads(formatted_fonts_json)
-labels = []
-for font in fonts:
-    labels.append(font["label"])
-    if font["label"] == "Verdana":
-        print("val: ", font["val"])
-    # print(f"label: {labels.sort()}")
-    # print(f"Font-> label: {font['label']} val: {font['val']}")
+# Start from the cached font list (or the defaults on the very first run);
+# NoteEditorScreenState refreshes it in the background.
+fonts = FontCatalog.instance().fonts()
+labels = [font["label"] for font in fonts]
 
 
 show_font = True
@@ -80,9 +81,10 @@ show_font = True
 class NoteEditorScreenState(State):
     def __init__(self, navigator: NavigatorState):
         self.count = 0
-        self.editor = MarkdownEditorController(
-            initial_content="<h1>Welcome from Controller!</h1><p>Start writing your document here...</p>"
-        )
+        self.store = NoteStore.instance()
+        self.note_id = None
+        self.note = None
+        self.autosave = AutosaveQueue(writer=self.store.update_bodies, interval_ms=2000, idle_ms=500)
         self.d_controller = DropdownController(selectedValue=labels[0])
         # self.dropdown_controller = DerivedDropdownController(value='Agency FB',items=labels)
         # self.dropdown_theme = DerivedDropdownTheme(width=200)
@@ -105,19 +107,6 @@ class NoteEditorScreenState(State):
             ),
         )
 
-        self.markdown_editor = MarkdownEditor(
-            key=Key("markdow_editor_widget"),
-            controller=self.editor,
-            height="calc(100vh - 70px)",
-            width="100vw",
-            show_grid=True,
-            overlay=AiActionsControls(
-                key=Key("ai_controls_popup"),
-                editor=self.editor,
-                onGenerate=lambda: self.editor.hide_overlay()
-            ),
-        )
-
         # Define stable style
         self.editor_style = EditorStyle(
             focus_ring_color=Colors.transparent,
@@ -130,16 +119,140 @@ class NoteEditorScreenState(State):
             grid_background_color=Colors.adaptive(dark="#121212", light=Colors.transparent),
             content_text_color=Colors.adaptive(dark=Colors.lightgrey, light=Colors.grey),
         )
-        # Inject style immediately
-        self.markdown_editor.style = self.editor_style
+        # Pre-built editors that notes are swapped into; see editor_pool.py.
+        pool_size = Framework.instance().config.get("editor_pool_size", DEFAULT_POOL_SIZE)
+        self.editor_pool = EditorPool(pool_size, self._make_editor)
+
+        self.show_quick_open = False
+        # "Related notes" side panel, toggled by the header's AI button.
+        self.show_related = False
+        self.quick_open = QuickOpen(
+            key=Key("editor_quick_open"),
+            onSelect=self.quick_open_note,
+            onDismiss=self.hide_quick_open,
+        )
 
         super().__init__()
         self.navigator = navigator
 
+    def initState(self):
+        widget = self.get_widget()
+        if widget and widget.note_id is not None:
+            self._load_note(widget.note_id)
+        register_quick_open_shortcut(self._on_quick_open_key)
+        self.runAsync(FontCatalog.instance().refresh, on_done=self._on_fonts_refreshed)
+
+    def _on_fonts_refreshed(self, new_fonts):
+        # None means the font directories are unchanged since the cached scan.
+        if not new_fonts:
+            return
+        # Update in place; the dropdowns hold references to these lists.
+        fonts[:] = new_fonts
+        labels[:] = [font["label"] for font in new_fonts]
+        self.setState()
+
     @property
     def is_dark(self):
         return Framework.instance().theme.brightness == 'dark'
 
+    @property
+    def editor(self) -> MarkdownEditorController:
+        """The controller of the editor currently on screen."""
+        return self.editor_pool.active.controller
+
+    def _make_editor(self, index):
+        # Slot 0 keeps the keys the single editor used to have.
+        suffix = f"_{index}" if index else ""
+        controller = MarkdownEditorController(
+            initial_content="<h1>Welcome from Controller!</h1><p>Start writing your document here...</p>",
+            autosave=self.autosave,
+        )
+        editor = MarkdownEditor(
+            key=Key(f"markdow_editor_widget{suffix}"),
+            controller=controller,
+            height="calc(100vh - 70px)",
+            width="100vw",
+            show_grid=True,
+            overlay=AiActionsControls(
+                key=Key(f"ai_controls_popup{suffix}"),
+                editor=controller,
+                onGenerate=controller.hide_overlay,
+            ),
+        )
+        # Inject style immediately
+        editor.style = self.editor_style
+        return controller, editor
+
+    # --- Note persistence ---
+
+    def _load_note(self, note_id):
+        slot = self.editor_pool.activate(note_id, self.store.get_note)
+        if slot is None:
+            print(f"Warning: note {note_id} does not exist.")
+            return
+        self.note_id = note_id
+        self.note = slot.note
+
+    def open_note(self, note_id):
+        """Shows a note from the NoteStore, in the pooled editor that already holds it if any."""
+        self._load_note(note_id)
+        self.setState()
+
+    def prefetch_note(self, note_id):
+        """Loads a note into an idle pooled editor so that opening it next is instant."""
+        self.editor_pool.prefetch(note_id, self.store.get_note)
+
+    def forget_note(self, note_id):
+        self.editor_pool.forget(note_id)
+
+    def save_note(self):
+        if self.note_id is not None:
+            self.autosave.submit(self.note_id, self.editor.get_content())
+            self.autosave.flush()
+
+    def close_note(self):
+        self.save_note()
+        self.get_widget().navigator.pop()
+
+    # --- Related notes ---
+
+    def toggle_related_notes(self):
+        self.show_related = not self.show_related
+        self.setState()
+
+    def open_related_note(self, note_id):
+        self.save_note()
+        self.open_note(note_id)
+
+    # --- Quick open (Ctrl+P) ---
+
+    def _on_quick_open_key(self, action):
+        if self.navigator.history[-1].widget_instance is not self.get_widget():
+            return False
+        if action == "toggle" and not self.show_quick_open:
+            self.show_quick_open_palette()
+        elif action in ("toggle", "dismiss"):
+            self.hide_quick_open()
+        elif action == "accept" and self.show_quick_open:
+            self.quick_open.get_state().accept()
+        return True
+
+    def show_quick_open_palette(self):
+        self.show_quick_open = True
+        set_quick_open_visible(True)
+        self.setState()
+
+    def hide_quick_open(self):
+        self.show_quick_open = False
+        set_quick_open_visible(False)
+        self.setState()
+        self.editor.focus()
+
+    def quick_open_note(self, note_id):
+        self.show_quick_open = False
+        set_quick_open_visible(False)
+        self.open_note(note_id)
+
     # changeMode is now handled by ThemeToggleButton internally.
     # We still keep is_dark helper if needed for other logic, but rebuilds
     # will be triggered specifically by the child widgets.
@@ -250,7 +363,7 @@ class NoteEditorScreenState(State):
                                                                         "back_ico_1"
                                                                     ),
                                                                 ),
-                                                                onPressed=lambda: self.get_widget().navigator.pop(),
+                                                                onPressed=self.close_note,
                                                                 style=ButtonStyle(
                                                                     backgroundColor=AppColors.buttonBackgroundColor,
                                                                     hoverColor=AppColors.buttonHoverColor,
@@ -271,7 +384,7 @@ class NoteEditorScreenState(State):
                                                                 crossAxisAlignment=CrossAxisAlignment.START,
                                                                 children=[
                                                                     Text(
-                                                                        "Welcome",
+                                                                        self.note.title if self.note else "Welcome",
                                                                         key=Key(
                                                                             "file_name"
                                                                         ),
@@ -283,7 +396,11 @@ class NoteEditorScreenState(State):
                                                                         ),
                                                                     ),
                                                                     Text(
-                                                                        "first file",
+                                                                        (
+                                                                            time.strftime("%d %b %Y", time.localtime(self.note.updated_at))
+                                                                            if self.note
+                                                                            else "first file"
+                                                                        ),
                                                                         key=Key(
                                                                             "file_detail"
                                                                         ),
@@ -311,8 +428,8 @@ class NoteEditorScreenState(State):
                                                         children=[
                                                             HeaderActions(
                                                                 key=Key("header_actions"),
-                                                                onSave=self.incrementCounter,
-                                                                onAiChat=self.incrementCounter,
+                                                                onSave=self.save_note,
+                                                                onAiChat=self.toggle_related_notes,
                                                                 onAccount=self.incrementCounter,
                                                             )
                                                         ],
@@ -321,7 +438,17 @@ class NoteEditorScreenState(State):
                                             ],
                                         ),
                                     ),
-                                    self.markdown_editor,
+                                    # Every pooled editor stays mounted; only the
+                                    # active one is shown, so switching notes is a
+                                    # style patch instead of a new editor.
+                                    *[
+                                        Container(
+                                            key=Key(f"editor_slot_{slot.index}"),
+                                            visible=slot is self.editor_pool.active,
+                                            child=slot.editor,
+                                        )
+                                        for slot in self.editor_pool.slots
+                                    ],
                                 ]
                             ),
                         ),
@@ -654,6 +781,30 @@ class NoteEditorScreenState(State):
                                 ),
                             ),
                         ),
+                        # Related notes panel (header AI button)
+                        *(
+                            [
+                                Positioned(
+                                    top="80px", right="20px",
+                                    key=Key("related_notes_overlay"),
+                                    child=RelatedNotesPanel(
+                                        key=Key("related_notes_panel"),
+                                        note_id=self.note_id,
+                                        onSelect=self.open_related_note,
+                                    ),
+                                )
+                            ] if self.show_related else []
+                        ),
+                        # Quick open overlay (Ctrl+P)
+                        *(
+                            [
+                                Positioned(
+                                    top=0, left=0, right=0, bottom=0,
+                                    key=Key("quick_open_overlay"),
+                                    child=self.quick_open,
+                                )
+                            ] if self.show_quick_open else []
+                        ),
                     ],
                 ),
             ),
@@ -665,8 +816,10 @@ class NoteEditorScreen(StatefulWidget):
         self,
         key: Key,
         navigator: NavigatorState,
+        note_id: int = None,
     ):
         self.navigator = navigator
+        self.note_id = note_id
         super().__init__(key=key)
 
     def createState(self) -> NoteEditorScreenState:
@@ -3,11 +3,19 @@ PyThra Markdown Editor Plugin
 A WYSIWYG Markdown editor plugin for Pythra
 """
 
-from .widget import MarkdownEditor
-
 __version__ = "1.0.0"
 __all__ = ['MarkdownEditor']
 
+
+def __getattr__(name):
+    # The editor widget pulls in the whole editor (state, controller, export);
+    # import it on first use so `plugins.markdown.js_queue` and friends stay cheap.
+    if name == 'MarkdownEditor':
+        from .widget import MarkdownEditor
+        return MarkdownEditor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Plugin definition for Pythra framework
 plugin_definition = {
     'name': 'pythra-markdown-editor',
@@ -0,0 +1,134 @@
+# plugins/markdown/autosave.py
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Content as submitted: the HTML itself, or a callable producing it (see
+# BlockDocument.deferred_html), called when the batch is written.
+Content = Union[str, Callable[[], str]]
+
+
+class AutosaveQueue:
+    """
+    Write-behind queue for editor content.
+
+    `submit()` only records the latest content for a document and returns
+    immediately, so the UI thread never waits on disk I/O. A background thread
+    hands the pending documents to `writer` in one batch once the editor has
+    been idle for `idle_ms`, or at the latest `interval_ms` after the first
+    unsaved change. A crash therefore loses at most one `interval_ms` window.
+
+    `flush()` writes everything that is pending on the calling thread; call it
+    before the editor goes away (dispose, navigator pop, explicit save).
+
+    Content may be submitted as a callable; only the latest one per document
+    is called, on the writing thread, so joining a large note's HTML never
+    happens on the UI thread.
+
+    :param writer: Callable receiving a list of `(document_id, content)` pairs.
+    :param interval_ms: Upper bound on how long a change may stay unsaved.
+    :param idle_ms: Quiet period after which pending changes are written early.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Tuple[Any, str]]], None],
+        interval_ms: int = 2000,
+        idle_ms: int = 500,
+    ):
+        self._writer = writer
+        self._interval = interval_ms / 1000.0
+        self._idle = idle_ms / 1000.0
+
+        self._pending: Dict[Any, Content] = {}
+        self._first_update = 0.0
+        self._last_update = 0.0
+        self._closed = False
+
+        self._cond = threading.Condition()
+        # Held while a batch is taken *and* written, so a synchronous flush can
+        # never be overtaken by an older batch from the background thread.
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, document_id: Any, content: Content):
+        """Records the latest content for a document. Never blocks on I/O."""
+        with self._cond:
+            if self._closed:
+                return
+            now = time.monotonic()
+            if not self._pending:
+                self._first_update = now
+            self._pending[document_id] = content
+            self._last_update = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="markdown-autosave", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def has_pending(self) -> bool:
+        with self._cond:
+            return bool(self._pending)
+
+    def flush(self):
+        """Writes all pending content synchronously on the calling thread."""
+        with self._write_lock:
+            with self._cond:
+                batch = self._take()
+            self._write(batch)
+
+    def close(self):
+        """Flushes pending content and stops the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _take(self) -> List[Tuple[Any, Content]]:
+        batch = list(self._pending.items())
+        self._pending.clear()
+        return batch
+
+    def _write(self, batch: Iterable[Tuple[Any, Content]]):
+        batch = [
+            (document_id, content() if callable(content) else content)
+            for document_id, content in batch
+        ]
+        if not batch:
+            return
+        try:
+            self._writer(batch)
+        except Exception as e:
+            print(f"Warning: Autosave failed, will retry. Error: {e}")
+            # Re-queue what failed unless a newer version arrived meanwhile.
+            with self._cond:
+                now = time.monotonic()
+                if not self._pending:
+                    self._first_update = now
+                self._last_update = now
+                for document_id, content in batch:
+                    self._pending.setdefault(document_id, content)
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Coalesce until the editor goes idle or the window runs out.
+                while self._pending and not self._closed:
+                    due = min(self._last_update + self._idle, self._first_update + self._interval)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            with self._write_lock:
+                with self._cond:
+                    batch = self._take()
+                self._write(batch)
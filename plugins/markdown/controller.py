@@ -1,12 +1,17 @@
 # plugins/markdown/controller.py
-from typing import Optional, Callable, List, Dict, Any
+from typing import Optional, Callable, List, Dict, Any, Iterable
 import json
+from concurrent.futures import Future
+
+from .autosave import AutosaveQueue
+from .document import BlockDocument
+from .conversion import MarkdownConverter
+from .html_export import BlockMarkdownCache
 
 class EditorCursorState:
     """A dataclass to hold the formatting state at the cursor's position."""
 
     def __init__(self, data: Dict[str, Any]):
-        print("Data: ", data)
         self.is_bold = data.get('isBold', False)
         self.is_italic = data.get('isItalic', False)
         self.is_underline = data.get('isUnderline', False)
@@ -24,6 +29,8 @@ class EditorCursorState:
         # --- NEW: Selection State ---
         self.has_selection = data.get('hasSelection', False)
         self.selection_rect = data.get('selectionRect', None)
+        # Plain text of the selection ('' when collapsed), for the AI actions.
+        self.selection_text = data.get('selectionText', '')
 
     def __repr__(self):
         return f"<EditorCursorState bold={self.is_bold}, font={self.font_name}, color={self.font_color}, selection={self.has_selection}>"
@@ -50,13 +57,30 @@ class MarkdownEditorController:
         is called. You **SHOULD** call `setState()` after these methods.
     """
     
-    def __init__(self, initial_content: str = ""):
-        self.content = initial_content
+    def __init__(self, initial_content: str = "", autosave: Optional[AutosaveQueue] = None):
+        # Block-level mirror of the editor content, kept in sync by deltas from JS.
+        self.document = BlockDocument(initial_content)
+        # Markdown of each top-level block from the last export, keyed by its HTML.
+        self._markdown_export = BlockMarkdownCache()
         self._listeners: List[Callable] = []
         self._state_ref = None
         # --- NEW: Store the cursor state ---
         self.cursor_state = EditorCursorState({})
         self.new_state_data = None
+        # --- Write-behind persistence ---
+        # Content changes reported by the editor are handed to `autosave`
+        # under `document_id`. Both are optional; without them nothing is saved.
+        self.autosave = autosave
+        self.document_id = None
+
+    @property
+    def content(self) -> str:
+        """The editor's HTML, joined lazily from the block document."""
+        return self.document.html
+
+    @content.setter
+    def content(self, html: str):
+        self.document.reset(html)
 
     def run_javascript(self, js: str):
         """Run arbitrary JavaScript in the editor."""
@@ -65,7 +89,8 @@ class MarkdownEditorController:
 
     def hide_overlay(self):
         """Hides the AI controls overlay."""
-        self.run_javascript("window.hidePythraSelectionOverlay()")
+        if self._state_ref:
+            self._state_ref.hide_overlay()
 
     def add_listener(self, listener: Callable):
         """Subscribe to notifications from this controller."""
@@ -102,6 +127,22 @@ class MarkdownEditorController:
             # other widgets that might depend on the content.
             self._notify_listeners()
 
+    def _load_snapshot_from_js(self, snapshot: Dict[str, Any]):
+        """Internal method called when JS sends the full block list."""
+        self.document.load_snapshot(snapshot)
+        self._notify_listeners()
+
+    def _apply_delta_from_js(self, delta: Dict[str, Any]) -> bool:
+        """
+        Internal method called when JS sends changed blocks only. Returns
+        False if the document drifted and the editor must resend everything.
+        """
+        if not self.document.apply_delta(delta):
+            return False
+        if delta.get("changed") or delta.get("splice") is not None:
+            self._notify_listeners()
+        return True
+
     # --- NEW: Method to receive cursor state updates from JS ---
     def _update_cursor_state_from_js(self, state_json: str):
         """
@@ -119,6 +160,46 @@ class MarkdownEditorController:
         except json.JSONDecodeError:
             print("Warning: Could not decode cursor state from JS.")
 
+    def _apply_cursor_state(self, state_data: Dict[str, Any]):
+        """
+        Internal method called by the editor's state with the merged cursor
+        state, only when at least one field actually changed.
+        """
+        self.cursor_state = EditorCursorState(state_data)
+        self._notify_listeners(json.dumps(state_data))
+
+    def get_cursor_stats(self) -> Dict[str, int]:
+        """
+        Returns the Python-side counters of the cursor-state channel
+        (reports received/applied/unchanged, toolbar echoes sent/skipped).
+        """
+        if self._state_ref:
+            return dict(self._state_ref.cursor_channel.stats)
+        return {}
+
+    def get_conversion_stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters of the shared Markdown -> HTML cache."""
+        return MarkdownConverter.instance().stats()
+
+    def get_export_stats(self) -> Dict[str, int]:
+        """Returns how many blocks the Markdown export reused vs. converted."""
+        return dict(self._markdown_export.stats)
+
+    def _schedule_autosave(self):
+        """Queues the current content for a background write. Never blocks."""
+        if self.autosave is not None and self.document_id is not None:
+            # Joined on the autosave thread; `self.content` would join the
+            # whole note here on every delta.
+            self.autosave.submit(self.document_id, self.document.deferred_html())
+
+    def flush_autosave(self):
+        """
+        Synchronously writes any content still waiting in the autosave queue.
+        Call this before the editor goes away (e.g. before a navigator pop).
+        """
+        if self.autosave is not None:
+            self.autosave.flush()
+
     def get_content(self) -> str:
         """Gets the current HTML content from the controller."""
         return self.content
@@ -316,6 +397,38 @@ class MarkdownEditorController:
         if self._state_ref:
             self._state_ref.load_from_markdown(markdown_text)
 
+    def load_from_markdown_async(
+        self,
+        markdown_text: str,
+        on_progress: Optional[Callable[[float], None]] = None,
+    ) -> Future:
+        """
+        Imports Markdown without blocking the UI thread. Use this instead of
+        `load_from_markdown()` for large files.
+
+        The text is converted on a worker thread, section by section, and the
+        HTML is streamed into the editor in chunks while a progress badge is
+        shown over it. The editor is read-only until the import finishes.
+
+        Example usage:
+            future = editor.load_from_markdown_async(text, on_progress=print)
+            future.add_done_callback(lambda f: print("imported"))
+            ...
+            future.cancel()  # stops the import and restores the old content
+
+        `setState()` is not needed; the editor updates itself.
+
+        :param markdown_text: Raw Markdown content to import.
+        :param on_progress: Called on the UI thread with the imported share (0.0-1.0).
+        :return: A Future resolving to the imported HTML. It is already
+                 cancelled if the editor is not mounted.
+        """
+        if self._state_ref:
+            return self._state_ref.load_from_markdown_async(markdown_text, on_progress)
+        future = Future()
+        future.cancel()
+        return future
+
     def replace_selection_with_markdown(self, markdown_text: str):
         """
         Replaces the currently selected text in the editor with content
@@ -334,11 +447,49 @@ class MarkdownEditorController:
         if self._state_ref:
             self._state_ref.replace_selection_with_markdown(markdown_text)
 
+    def stream_markdown_into_selection(self, chunks: Iterable[str]) -> Future:
+        """
+        Replaces the saved selection with Markdown that arrives piece by
+        piece, e.g. from a generator yielding model output.
+
+        The chunks are consumed on a worker thread. Every finished top-level
+        block is converted to HTML as soon as it is complete and shown in a
+        read-only preview right after the selection; whatever arrived during
+        one event-loop turn goes to the page as one patch. When the iterator
+        is exhausted the selection is replaced by the whole result in a
+        single edit, so one undo removes it. The editor stays editable
+        throughout.
+
+        Example usage:
+            future = editor.stream_markdown_into_selection(chunks)
+            future.add_done_callback(lambda f: print("inserted"))
+            ...
+            future.cancel()  # drops the preview, keeps the selection
+
+        `setState()` is not needed; the editor updates itself.
+
+        :param chunks: Iterable of Markdown text pieces, split anywhere, or
+                       one `str` to insert the same way without streaming.
+        :return: A Future resolving to the inserted HTML. It is already
+                 cancelled if the editor is not mounted.
+        """
+        if self._state_ref:
+            return self._state_ref.stream_markdown_into_selection(chunks)
+        future = Future()
+        future.cancel()
+        return future
+
     def export_to_markdown(self) -> Optional[str]:
         """
         Gets the current editor content and converts it to Markdown.
         This is a read-only operation. `setState()` is not relevant here.
+
+        Markdown is cached per top-level block: after a small edit only the
+        changed blocks are converted again. Until the editor has sent its
+        first block snapshot the document is exported as a whole.
         """
-        if self._state_ref:
-            return self._state_ref.export_to_markdown()
-        return None
+        html_content = self.content
+        if not html_content:
+            return None
+        blocks = self.document.block_html() if self.document.synced else [html_content]
+        return self._markdown_export.export(blocks)
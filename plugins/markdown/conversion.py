@@ -0,0 +1,110 @@
+# plugins/markdown/conversion.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from .lazy import lazy_import
+
+# Imported on the first conversion rather than at startup.
+markdown = lazy_import("markdown")
+
+DEFAULT_EXTENSIONS = ('fenced_code', 'tables')
+
+
+class MarkdownConverter:
+    """
+    Markdown -> HTML conversion with reusable parsers and a result cache.
+
+    `markdown.markdown()` builds a new `Markdown` instance, and with it the
+    whole extension registry, on every call. This class keeps a small pool of
+    `markdown.Markdown` instances instead and `reset()`s them between
+    documents; each thread takes its own instance from the pool, so
+    conversions can run concurrently on worker threads.
+
+    Results are kept in an LRU keyed by a hash of the source text, bounded by
+    `max_entries`. Texts longer than `max_entry_chars` are converted but not
+    cached. `stats()` reports hits, misses and evictions.
+    """
+
+    _instance: Optional["MarkdownConverter"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "MarkdownConverter":
+        """Returns the shared converter used by the editor."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(
+        self,
+        extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+        max_entries: int = 256,
+        max_entry_chars: int = 256 * 1024,
+    ):
+        self.extensions = list(extensions)
+        self.max_entries = max_entries
+        self.max_entry_chars = max_entry_chars
+
+        self._lock = threading.Lock()
+        self._pool: List["markdown.Markdown"] = []
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "parsers_created": 0}
+
+    def to_html(self, text: str, cache: bool = True) -> str:
+        """
+        Converts `text` to HTML. Pass `cache=False` for one-off input (e.g. the
+        sections of an imported file) that should not evict the editor's entries.
+        """
+        if not cache:
+            return self._convert(text)
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return html
+            self._stats["misses"] += 1
+
+        html = self._convert(text)
+
+        if len(text) <= self.max_entry_chars:
+            with self._lock:
+                self._cache[key] = html
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return html
+
+    def _convert(self, text: str) -> str:
+        with self._lock:
+            parser = self._pool.pop() if self._pool else None
+            if parser is None:
+                self._stats["parsers_created"] += 1
+        if parser is None:
+            parser = markdown.Markdown(extensions=self.extensions)
+        try:
+            return parser.convert(text)
+        finally:
+            parser.reset()
+            with self._lock:
+                self._pool.append(parser)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._cache)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def markdown_to_html(text: str) -> str:
+    """Converts Markdown with the shared converter (fenced code and tables enabled)."""
+    return MarkdownConverter.instance().to_html(text)
@@ -0,0 +1,48 @@
+# plugins/markdown/cursor_channel.py
+from typing import Any, Dict
+
+
+class CursorStateChannel:
+    """
+    Python end of the cursor-state channel.
+
+    editor.js reports at most one cursor state per animation frame and only
+    the fields that changed since its previous report. This class merges
+    those partial reports into the full state and decides whether anything
+    actually changed, so listeners and the Python -> JS toolbar echo can be
+    skipped for no-op reports.
+
+    `stats` counts the traffic. Together with `cursorStats` on the JS editor
+    instance (events seen vs. reports sent) it shows how many round trips
+    the diffing and throttling saved.
+    """
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {}
+        self.stats: Dict[str, int] = {
+            "reports_received": 0,
+            "fields_received": 0,
+            "reports_applied": 0,
+            "reports_unchanged": 0,
+            "echoes_sent": 0,
+            "echoes_skipped": 0,
+        }
+
+    def merge(self, partial: Dict[str, Any]) -> Dict[str, Any]:
+        """Merges a partial report and returns only the fields that changed."""
+        self.stats["reports_received"] += 1
+        self.stats["fields_received"] += len(partial)
+        changed = {
+            name: value for name, value in partial.items()
+            if name not in self.state or self.state[name] != value
+        }
+        if changed:
+            self.state.update(changed)
+            self.stats["reports_applied"] += 1
+        else:
+            self.stats["reports_unchanged"] += 1
+        return changed
+
+    def reset(self):
+        """Forgets the merged state, e.g. when the editor is re-initialized."""
+        self.state = {}
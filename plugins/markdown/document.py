@@ -0,0 +1,107 @@
+# plugins/markdown/document.py
+import zlib
+from typing import Optional, Callable, Dict, List, Any
+
+
+def content_checksum(html: str) -> int:
+    """CRC-32 of the UTF-8 encoded HTML. Mirrors `_pythraCrc32` in editor.js."""
+    return zlib.crc32(html.encode("utf-8", "replace")) & 0xFFFFFFFF
+
+
+class BlockDocument:
+    """
+    Python-side model of the editor content, split into top-level blocks.
+
+    editor.js gives every top-level node of the editable element a stable id
+    and, after each typing pause, only sends the blocks that changed:
+
+        {"type": "full",  "seq": 1, "order": [ids], "blocks": {id: html}}
+        {"type": "delta", "seq": 2, "base": 1,
+         "splice": [start, delete_count, [ids]],   # only if the order changed
+         "changed": {id: html},
+         "checksum": 123456}                        # sent periodically
+
+    The joined HTML is only rebuilt when somebody reads `html`.
+    `apply_delta()` returns False whenever the model can no longer be trusted
+    (sequence gap, unknown block, checksum mismatch); the caller must then ask
+    the editor for a full resync.
+    """
+
+    def __init__(self, html: str = ""):
+        self.order: List[str] = []
+        self.blocks: Dict[str, str] = {}
+        self.seq = 0
+        # False until the first snapshot from the editor arrives (or after a
+        # programmatic reset). Deltas are rejected while unsynced.
+        self.synced = False
+        self._html: Optional[str] = html
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = "".join(self.block_html())
+        return self._html
+
+    def deferred_html(self) -> Callable[[], str]:
+        """
+        The current content as a callable that joins it when called, on any
+        thread. Only the block order and the block map are copied (not the
+        HTML), so this stays cheap on the UI thread however long the note is.
+        """
+        if self._html is not None:
+            html = self._html
+            return lambda: html
+        order, blocks = list(self.order), dict(self.blocks)
+        return lambda: "".join([blocks[block_id] for block_id in order])
+
+    def block_html(self) -> List[str]:
+        """The top-level blocks in document order (only meaningful while synced)."""
+        return [self.blocks[block_id] for block_id in self.order]
+
+    def reset(self, html: str):
+        """Replaces the content wholesale, e.g. after `set_content()` from Python."""
+        self.order = []
+        self.blocks = {}
+        self.synced = False
+        self._html = html
+
+    def load_snapshot(self, snapshot: Dict[str, Any]):
+        blocks = snapshot.get("blocks", {})
+        self.order = list(snapshot.get("order", []))
+        self.blocks = {block_id: blocks.get(block_id, "") for block_id in self.order}
+        self.seq = snapshot.get("seq", 0)
+        self.synced = True
+        self._html = None
+
+    def apply_delta(self, delta: Dict[str, Any]) -> bool:
+        if not self.synced or delta.get("base") != self.seq:
+            self.synced = False
+            return False
+
+        changed = delta.get("changed", {})
+        splice = delta.get("splice")
+        if splice is not None:
+            start, delete_count, inserted = splice
+            removed = self.order[start:start + delete_count]
+            self.order[start:start + delete_count] = inserted
+            kept = set(inserted)
+            for block_id in removed:
+                if block_id not in kept:
+                    self.blocks.pop(block_id, None)
+            for block_id in inserted:
+                if block_id not in self.blocks and block_id not in changed:
+                    self.synced = False
+                    return False
+
+        self.blocks.update(changed)
+        self.seq = delta.get("seq", self.seq + 1)
+        self._html = None
+
+        checksum = delta.get("checksum")
+        if checksum is not None and checksum != self.checksum():
+            self.synced = False
+            return False
+        return True
+
+    def checksum(self) -> int:
+        return content_checksum(self.html)
@@ -1,31 +1,67 @@
 # plugins/markdown/editor_state.py`
 import os
 import json
-from typing import Optional, Dict, Any
-
-import markdown
-from markdownify import markdownify as md
-
-from pythra import State, Container, Key, Framework
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Iterable
+
+
+from pythra import (
+    State,
+    Container,
+    Key,
+    Framework,
+    Stack,
+    Positioned,
+    Row,
+    Text,
+    TextStyle,
+    SizedBox,
+    Colors,
+    EdgeInsets,
+    BoxDecoration,
+    BorderRadius,
+    CrossAxisAlignment,
+    GestureDetector,
+    ProgressIndicator,
+    ProgressIndicatorController,
+    Loader,
+    LoaderStyle,
+    submit_task,
+)
 
 from .controller import MarkdownEditorController
+from .conversion import markdown_to_html
+from .cursor_channel import CursorStateChannel
+from .ipc_overlay import IpcStatsOverlay
+from .ipc_stats import IpcStats, instrument
+from .js_queue import JsCommandQueue
+from .markdown_import import MarkdownImport
+from .selection_stream import SelectionStream
 from .style import EditorStyle
 
-framework = Framework.instance()  # Placeholder for the framework reference
+
 class MarkdownEditorState(State):
     def __init__(self):
         super().__init__()
         # --- MODIFICATION: Start with None to indicate it's not yet initialized ---
         self._content: Optional[str] = None
         self._callback_name = None
+        self._delta_callback_name = None
         self._container_html_id = 'fw_id_8'  # Will store the actual framework-assigned ID
 
         # --- NEW: State variable for toolbar visibility ---
         self._controls_visible = True # Default to visible
         self._toggle_controls_callback_name = None
         self._state_change_callback_name = None
+        self.cursor_channel = CursorStateChannel()
         
         self._cached_js_init = None
+
+        # --- Background Markdown import (see load_from_markdown_async) ---
+        self._import: Optional[MarkdownImport] = None
+        self._import_indicator = ProgressIndicatorController(visible=True)
+        # --- Markdown streamed into the selection (see stream_markdown_into_selection) ---
+        self._selection_stream: Optional[SelectionStream] = None
        
     
     def _get_html_id_for_key(self, key: Key) -> str:
@@ -33,6 +69,7 @@ class MarkdownEditorState(State):
         Get the framework-assigned HTML ID for a widget with given key.
         Returns None if not found in the render map.
         """
+        framework = Framework.instance()
         if not framework or not framework.reconciler:
             return None
             
@@ -62,143 +99,102 @@ class MarkdownEditorState(State):
 
         # Register a callback for content-change events coming from JS
         self._callback_name = f"markdown_content_change_{widget.key.value}"
+        # Block-level deltas (see document.py); replaces full-content updates.
+        self._delta_callback_name = f"markdown_content_delta_{widget.key.value}"
 
         # --- NEW: Register the toggle controls callback ---
         self._toggle_controls_callback_name = f"markdown_toggle_controls_{widget.key.value}"
         self._state_change_callback_name = f"markdown_state_change_{widget.key.value}"
         
         # Register our callbacks with the framework's API
+        framework = Framework.instance()
         if framework and hasattr(framework, 'api') and framework.api:
-            framework.api.register_callback(self._callback_name, self._handle_content_change)
-            framework.api.register_callback('markdown_content_change_markdown_default', self._handle_content_change)
-            framework.api.register_callback(self._toggle_controls_callback_name, self._handle_toggle_controls) # Register the new handler
-            framework.api.register_callback(self._state_change_callback_name, self._handle_cursor_state_update)
+            # `instrument` returns the handler itself unless `Debug` is on.
+            on_content_change = instrument("markdown_content_change", self._handle_content_change)
+            framework.api.register_callback(self._callback_name, on_content_change)
+            framework.api.register_callback('markdown_content_change_markdown_default', on_content_change)
+            framework.api.register_callback(self._delta_callback_name, instrument("markdown_content_delta", self._handle_content_delta))
+            framework.api.register_callback(self._toggle_controls_callback_name, instrument("markdown_toggle_controls", self._handle_toggle_controls)) # Register the new handler
+            framework.api.register_callback(self._state_change_callback_name, instrument("markdown_state_change", self._handle_cursor_state_update))
         else:
             print('Warning: framework.api not available; callback registration delayed')
 
 
     def dispose(self):
         widget = self.get_widget()
+        if self._import is not None:
+            self._import.future.cancel()
+        if self._selection_stream is not None:
+            self._selection_stream.future.cancel()
         if widget and widget.controller:
+            widget.controller.flush_autosave()
             widget.controller._detach()
         super().dispose()
 
-    # Controller-facing methods called by MarkdownEditorController
-    def exec_command(self, command: str, value: Optional[str] = None):
-        """Ask the frontend to execute a command (e.g., bold, italic)."""
-        if not framework or not framework.window:
-            return
-
-        # Get the unique instance name for our component
-        instance_name = f"{self.get_widget().key.value}_PythraMarkdownEditor"
+    # --- JS command queue ---
 
-        # Safely escape the command and value for JS
-        command_js = json.dumps(command)
+    def _instance_name(self) -> str:
+        return f"{self.get_widget().key.value}_PythraMarkdownEditor"
 
-        # Execute command using the known framework-assigned ID
-        val_js = json.dumps(value) if value is not None else 'null'
-        print(val_js)
-        
-        js = f"""
-            (function(){{
-                const editorInstance = window._pythra_instances['{instance_name}'];
-                if (editorInstance && typeof editorInstance.execCommand === 'function') {{
-                    editorInstance.execCommand({command_js}, {val_js});
-                }} else {{
-                    console.error("Could not find editor instance '{instance_name}' to execute command.");
-                }}
-            }})()
+    def _js_queue(self) -> Optional[JsCommandQueue]:
         """
-
-        """ old logic
-            (function(){{
-                var editable = document.querySelector('.editor-inner-container');
-                if(editable) {{
-                    try {{
-                        document.execCommand('{command}', false, {val_js});
-                        console.log('Executing command: ', '{command}', false, {val_js});
-                    }} catch(e) {{
-                        console.warn('Editor command failed:', e);
-                    }}
-                }}
-            }})()
+        Returns the command queue for this editor's window. Everything sent to
+        the page in one event-loop turn is flushed as a single evaluate_js call.
         """
+        framework = Framework.instance()
+        if not framework or not framework.window:
+            return None
         window_id = getattr(self, '_window_id', framework.id)
-        framework.window.evaluate_js(window_id, js)
+        return JsCommandQueue.for_window(framework, window_id)
+
+    # Controller-facing methods called by MarkdownEditorController
+    def exec_command(self, command: str, value: Optional[str] = None):
+        """Ask the frontend to execute a command (e.g., bold, italic)."""
+        queue = self._js_queue()
+        if queue:
+            queue.call(self._instance_name(), 'execCommand', command, value)
 
     # --- ADD THIS NEW METHOD ---
     def run_javascript(self, js: str):
         """Run arbitrary JavaScript in the context of this widget."""
-        if hasattr(self, '_window_id') and framework and framework.window:
-            framework.window.evaluate_js(self._window_id, js)
-        elif framework and framework.window:
-            framework.window.evaluate_js(framework.id, js)
+        queue = self._js_queue()
+        if queue:
+            queue.run(js)
 
     def restore_selection_and_exec(self, command: str, value: Optional[str] = None):
-        if not framework or not framework.window:
+        queue = self._js_queue()
+        if not queue:
             return
-
-        instance_name = f"{self.get_widget().key.value}_PythraMarkdownEditor"
-        command_js = json.dumps(command)
-        val_js = json.dumps(value) if value is not None else 'null'
-
-        js = f"""
-            (function(){{
-                if (typeof restoreEditorSelection === 'function') {{
-                    restoreEditorSelection();
-                }}
-                const editorInstance = window._pythra_instances['{instance_name}'];
-                if (editorInstance) {{
-                    editorInstance.execCommand({command_js}, {val_js});
-                }}
-            }})()
-        """
-        
-        window_id = getattr(self, '_window_id', framework.id)
-        framework.window.evaluate_js(window_id, js)
+        queue.call(self._instance_name(), 'restoreSelection')
+        queue.call(self._instance_name(), 'execCommand', command, value)
 
     def set_content(self, html: str):
+        framework = Framework.instance()
         if not self._container_html_id or not framework or not framework.window:
             return
 
         widget = self.get_widget()
         if not widget:
             return
-            
-        html_js = json.dumps(html)
-        container_id = self._container_html_id
-        
-        js = f"""
-            (function(){{
-                console.log('Setting editor content');
-                    var editable = document.querySelector('.editor-inner-container');
-                    if(editable) editable.innerHTML = {html_js};
-            }})()
-        """
-        window_id = getattr(self, '_window_id', framework.id)
-        framework.window.evaluate_js(window_id, js)
+
+        # setContent also resets the block ids; the next change sends a full snapshot.
+        self._js_queue().call(self._instance_name(), 'setContent', html)
         widget.controller.content = html
+        # Keep the memoized init options in step so a remount (e.g. after a
+        # navigator pop/push) starts from the programmatically loaded content.
+        self._content = html
+        if self._cached_js_init is not None:
+            self._cached_js_init["options"]["initialContent"] = html
 
     def replace_selection(self, html: str):
-        if not framework or not framework.window:
-            return
+        queue = self._js_queue()
+        if queue:
+            queue.call(self._instance_name(), 'replaceSelection', html)
 
-        instance_name = f"{self.get_widget().key.value}_PythraMarkdownEditor"
-        html_js = json.dumps(html)
-
-        js = f"""
-            (function(){{
-                const editorInstance = window._pythra_instances['{instance_name}'];
-                
-                if (editorInstance && typeof window.replaceEditorSelection === 'function') {{
-                    console.log('Replacing selection with HTML content:', {html_js});
-                    window.replaceEditorSelection({html_js});
-                }}
-            }})()
-        """
-        
-        window_id = getattr(self, '_window_id', framework.id)
-        framework.window.evaluate_js(window_id, js)
+    def hide_overlay(self):
+        queue = self._js_queue()
+        if queue:
+            queue.call(self._instance_name(), 'hideSelectionOverlay')
 
     def get_content(self) -> str:
         widget = self.get_widget()
@@ -208,11 +204,9 @@ class MarkdownEditorState(State):
 
 
     def focus(self):
-        js = "(function(){var ed=document.getElementById('editor'); if(ed) ed.focus(); })()"
-        if hasattr(self, '_window_id'):
-            framework.window.evaluate_js(self._window_id, js)
-        else:
-            framework.window.evaluate_js(framework.id, js)
+        queue = self._js_queue()
+        if queue:
+            queue.call(self._instance_name(), 'focus')
 
     # API callback invoked from JS when content changes
     def _handle_content_change(self, new_content):
@@ -221,27 +215,68 @@ class MarkdownEditorState(State):
             return
         try:
             widget.controller.content = new_content
-            print("New Content: ", new_content)
+            widget.controller._schedule_autosave()
         except Exception:
             pass
 
+    def _handle_content_delta(self, payload: str):
+        """
+        API callback for block-level content updates from JS. Applies the
+        patch to the controller's document and asks JS for a full snapshot
+        whenever the two sides have drifted apart.
+        """
+        widget = self.get_widget()
+        if not widget:
+            return
+        try:
+            message = json.loads(payload)
+        except (TypeError, json.JSONDecodeError):
+            print("Warning: Could not decode content delta from JS.")
+            self.request_full_sync()
+            return
+
+        if message.get("type") == "full":
+            widget.controller._load_snapshot_from_js(message)
+        elif not widget.controller._apply_delta_from_js(message):
+            self.request_full_sync()
+            return
+        widget.controller._schedule_autosave()
+
+    def request_full_sync(self):
+        """Asks the JS editor to resend all blocks (drift recovery)."""
+        queue = self._js_queue()
+        if queue and self.get_widget():
+            queue.call(self._instance_name(), 'sendFullSync')
+
     def _handle_cursor_state_update(self, state_json: str):
         """
         Internal method to handle cursor state updates from JS.
-        It updates the controller and also calls the new JS function to sync external UI.
+
+        JS only sends the fields that changed since its last report (at most
+        once per animation frame). They are merged into the full state; if
+        nothing really changed, the controller, its listeners and the
+        Python -> JS toolbar echo are all skipped.
         """
-        # This part updates the Python controller (which is correct)
+        try:
+            partial = json.loads(state_json)
+        except (TypeError, json.JSONDecodeError):
+            print("Warning: Could not decode cursor state from JS.")
+            return
+
+        changed = self.cursor_channel.merge(partial)
+        if not changed:
+            self.cursor_channel.stats["echoes_skipped"] += 1
+            return
+
         widget = self.get_widget()
         if widget and widget.controller:
-            widget.controller._update_cursor_state_from_js(state_json)
+            widget.controller._apply_cursor_state(self.cursor_channel.state)
 
-        # --- NEW LOGIC ---
-        # Now, send a command back to JS to update the external toolbar.
-        # We pass the raw JSON string directly to the new JS function.
-        js_command = f"if (typeof syncExternalToolbarState === 'function') {{ syncExternalToolbarState({state_json}); }}"
-        
-        window_id = getattr(self, '_window_id', framework.id)
-        framework.window.evaluate_js(window_id, js_command)
+        # Send the merged state back to JS to update the external toolbar.
+        queue = self._js_queue()
+        if queue:
+            queue.call(None, 'syncExternalToolbarState', dict(self.cursor_channel.state))
+            self.cursor_channel.stats["echoes_sent"] += 1
 
     # --- NEW: Handler for the toggle event from JavaScript ---
     def _handle_toggle_controls(self, is_visible: bool):
@@ -261,7 +296,7 @@ class MarkdownEditorState(State):
         if not widget:
             return
         # 1. Convert the Markdown to HTML.
-        html_content = markdown.markdown(markdown_text, extensions=['fenced_code', 'tables'])
+        html_content = markdown_to_html(markdown_text)
         
         # 2. Update the state's source of truth.
         widget.controller.content = html_content
@@ -271,6 +306,89 @@ class MarkdownEditorState(State):
         # print("Loading HTML content into editor: ", widget.controller.content)
         # self.setState()
 
+    def load_from_markdown_async(
+        self,
+        markdown_text: str,
+        on_progress: Optional[Callable[[float], None]] = None,
+    ) -> Future:
+        """
+        Converts Markdown on a worker thread and streams the HTML into the
+        editor one chunk per event-loop turn. Returns a Future for the full
+        HTML; cancelling it stops the import and restores the previous
+        content. Starting a new import cancels the running one.
+        """
+        widget = self.get_widget()
+        queue = self._js_queue()
+        if not widget or not queue:
+            future = Future()
+            future.cancel()
+            return future
+        if self._import is not None:
+            self._import.future.cancel()
+
+        job = MarkdownImport(markdown_text)
+        self._import = job
+        previous_html = widget.controller.content
+        queue.call(self._instance_name(), 'beginStreamedContent')
+        submit_task(job.run)
+        self.setState()
+        self._pump_import(job, previous_html, on_progress)
+        return job.future
+
+    def cancel_import(self):
+        """Cancels the running Markdown import, if any."""
+        if self._import is not None:
+            self._import.future.cancel()
+
+    def _pump_import(self, job: MarkdownImport, previous_html: str, on_progress):
+        """Streams at most one ready chunk of `job` into the editor, then reschedules itself."""
+        if job is not self._import:
+            return
+        widget = self.get_widget()
+        queue = self._js_queue()
+        if not widget or not queue:
+            job.future.cancel()
+            return
+
+        if job.cancelled or job.error is not None:
+            # Put back what the editor showed before the import started.
+            queue.call(self._instance_name(), 'setContent', previous_html)
+            queue.call(self._instance_name(), 'endStreamedContent')
+            if job.error is not None and not job.cancelled:
+                job.future.set_exception(job.error)
+            self._end_import()
+            return
+
+        previous_percent = int(job.progress * 100)
+        chunk = job.next_chunk()
+        if chunk is not None:
+            html, progress = chunk
+            queue.call(self._instance_name(), 'appendContent', html)
+            if on_progress:
+                on_progress(progress)
+            if int(progress * 100) != previous_percent:
+                self.setState()
+        elif job.exhausted:
+            html = job.html()
+            queue.call(self._instance_name(), 'endStreamedContent')
+            # Same bookkeeping as set_content(), without resending the HTML.
+            widget.controller.content = html
+            self._content = html
+            if self._cached_js_init is not None:
+                self._cached_js_init["options"]["initialContent"] = html
+            widget.controller._schedule_autosave()
+            job.future.set_result(html)
+            self._end_import()
+            return
+
+        # Let the page lay out the chunk (and the user scroll) before the next one.
+        from PySide6.QtCore import QTimer
+        QTimer.singleShot(16, lambda: self._pump_import(job, previous_html, on_progress))
+
+    def _end_import(self):
+        self._import = None
+        self.setState()
+
     def replace_selection_with_markdown(self, markdown_text: str):
         """
         Converts Markdown to HTML and replaces the editor's content.
@@ -279,26 +397,95 @@ class MarkdownEditorState(State):
         if not widget:
             return
         # 1. Convert the Markdown to HTML.
-        html_content = markdown.markdown(markdown_text, extensions=['fenced_code', 'tables'])
-        # 2. Replace the editor's content.
+        html_content = markdown_to_html(markdown_text)
+        # 2. Replace the editor's content. The block delta the editor sends
+        #    back updates the controller's document; resetting it here would
+        #    force a full resync on the next edit.
         self.replace_selection(html_content)
 
-        # 3. Update the state's source of truth.
-        widget.controller.content = widget.controller.get_content()
-        # self.setState()
 
+    def stream_markdown_into_selection(self, chunks: Iterable[str]) -> Future:
+        """
+        Replaces the saved selection with Markdown that arrives in chunks.
+        Finished blocks are converted on a worker thread and previewed after
+        the selection as they come in; the selection is replaced once, when
+        the stream ends. Returns a Future for the full HTML; cancelling it
+        removes the preview and leaves the selection untouched.
+
+        A `str` is complete already: it is converted right away and replaces
+        the selection in the same event-loop turn.
+        """
+        widget = self.get_widget()
+        queue = self._js_queue()
+        if not widget or not queue:
+            future = Future()
+            future.cancel()
+            return future
+        if self._selection_stream is not None:
+            # beginSelectionStream below drops its preview in the page.
+            self._selection_stream.future.cancel()
+            self._selection_stream = None
+
+        if isinstance(chunks, str):
+            html = markdown_to_html(chunks)
+            queue.call(self._instance_name(), 'beginSelectionStream')
+            queue.call(self._instance_name(), 'endSelectionStream', html)
+            future = Future()
+            future.set_result(html)
+            return future
+
+        job = SelectionStream(chunks)
+        self._selection_stream = job
+        queue.call(self._instance_name(), 'beginSelectionStream')
+        submit_task(job.run)
+        self._pump_selection_stream(job)
+        return job.future
+
+    def _pump_selection_stream(self, job: SelectionStream):
+        """Sends the HTML `job` converted since the last turn as one patch, then reschedules itself."""
+        if job is not self._selection_stream:
+            return
+        widget = self.get_widget()
+        queue = self._js_queue()
+        if not widget or not queue:
+            job.future.cancel()
+            self._selection_stream = None
+            return
+
+        if job.cancelled or job.error is not None:
+            queue.call(self._instance_name(), 'cancelSelectionStream')
+            if job.error is not None and not job.cancelled:
+                job.future.set_exception(job.error)
+            self._selection_stream = None
+            return
+
+        # Read before draining: HTML queued after this check is sent next turn.
+        finished = job.finished
+        html = job.drain()
+        if finished:
+            # One insertHTML command in JS: the result is a single undo step.
+            # Its input event syncs the controller's document as usual.
+            queue.call(self._instance_name(), 'endSelectionStream', job.html())
+            self._selection_stream = None
+            job.future.set_result(job.html())
+            return
+        if html:
+            queue.call(self._instance_name(), 'appendSelectionStream', html)
+
+        from PySide6.QtCore import QTimer
+        QTimer.singleShot(16, lambda: self._pump_selection_stream(job))
 
     def export_to_markdown(self) -> Optional[str]:
         """
-        Converts the editor's current HTML content to Markdown using 'markdownify'.
+        Converts the editor's current HTML content to Markdown. The editor's own
+        tag set takes a single-pass fast path; anything else goes through
+        'markdownify'. Unchanged blocks are served from the controller's
+        per-block cache.
         """
-        # Get the current, up-to-the-second content from our state.
-        html_content = self.get_content()
-        if html_content:
-            # The 'heading_style="ATX"' option creates clean '#' style headings.
-            markdown_text = md(html_content, heading_style="ATX")
-            return markdown_text
-        return None
+        widget = self.get_widget()
+        if not widget:
+            return None
+        return widget.controller.export_to_markdown()
 
     def build(self):
         widget = self.get_widget()
@@ -319,6 +506,7 @@ class MarkdownEditorState(State):
                 "instance_name": f"{widget.key.value}_PythraMarkdownEditor",
                 "options": {
                     'callback': self._callback_name,
+                    'deltaCallback': self._delta_callback_name,
                     'instanceId': f"{widget.key.value}_PythraMarkdownEditor",
                     "showControls": widget.show_controls,
                     # USE STABLE CONTENT
@@ -338,8 +526,9 @@ class MarkdownEditorState(State):
             js_init=self._cached_js_init,
         )
 
+        children = [editor_container]
+
         if widget.overlay:
-            from pythra import Stack, Positioned
             # Create a separate, stable container for the overlay that JS can move
             overlay_container = Container(
                 key=Key(f"{widget.key.value}_overlay_wrapper"),
@@ -347,21 +536,78 @@ class MarkdownEditorState(State):
                 js_init={
                     "engine": "PythraSelectionOverlay", 
                     "instance_name": f"{widget.key.value}_overlay",
-                     # No options needed initially; JS will just grab the element
-                     "options": {} 
+                     # The editor this overlay belongs to; several pooled editors may be mounted.
+                     "options": {"editorInstance": self._instance_name()}
                 },
                 child=widget.overlay,
                 # Start hidden or letting JS handle display
             )
             
-            return Stack(
-                children=[
-                    editor_container,
-                    Positioned(
-                        left="0", top="-200px",
-                        child=overlay_container
-                    )
-                ]
+            children.append(
+                Positioned(
+                    left="0", top="-200px",
+                    child=overlay_container
+                )
             )
 
-        return editor_container
+        if self._import is not None:
+            children.append(
+                Positioned(
+                    key=Key(f"{widget.key.value}_import_progress_pos"),
+                    right="16px", bottom="16px",
+                    child=self._build_import_progress(widget.key.value),
+                )
+            )
+
+        if IpcStats.active() is not None:
+            children.append(
+                Positioned(
+                    key=Key(f"{widget.key.value}_ipc_stats_pos"),
+                    left="16px", bottom="16px",
+                    child=IpcStatsOverlay(key=Key(f"{widget.key.value}_ipc_stats")),
+                )
+            )
+
+        # Always a Stack, so showing the import badge never remounts the editor.
+        return Stack(children=children)
+
+    def _build_import_progress(self, prefix: str):
+        percent = int(self._import.progress * 100)
+        return Container(
+            key=Key(f"{prefix}_import_progress"),
+            padding=EdgeInsets.symmetric(vertical=8, horizontal=12),
+            decoration=BoxDecoration(
+                color=Colors.surface,
+                borderRadius=BorderRadius.all(8),
+            ),
+            child=Row(
+                key=Key(f"{prefix}_import_progress_row"),
+                crossAxisAlignment=CrossAxisAlignment.CENTER,
+                children=[
+                    ProgressIndicator(
+                        key=Key(f"{prefix}_import_progress_indicator"),
+                        controller=self._import_indicator,
+                        style=LoaderStyle.LOADER_BARS_1,
+                        loader=Loader.BARS,
+                        size=16,
+                        primary_color=Colors.adaptive(light=Colors.black, dark=Colors.white),
+                    ),
+                    SizedBox(width=8, key=Key(f"{prefix}_import_progress_gap")),
+                    Text(
+                        f"Importing... {percent}%",
+                        key=Key(f"{prefix}_import_progress_text"),
+                        style=TextStyle(fontSize=13, color=Colors.onSurface),
+                    ),
+                    SizedBox(width=12, key=Key(f"{prefix}_import_progress_gap_2")),
+                    GestureDetector(
+                        key=Key(f"{prefix}_import_cancel"),
+                        onTap=lambda details: self.cancel_import(),
+                        child=Text(
+                            "Cancel",
+                            key=Key(f"{prefix}_import_cancel_text"),
+                            style=TextStyle(fontSize=13, color=Colors.primary),
+                        ),
+                    ),
+                ],
+            ),
+        )
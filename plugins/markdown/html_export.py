@@ -0,0 +1,467 @@
+# plugins/markdown/html_export.py
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .lazy import lazy_import
+
+# Only needed for markup the fast path does not handle.
+markdownify = lazy_import("markdownify")
+
+# Tags whose markup is dropped but whose text is kept (underline and font
+# changes have no Markdown equivalent).
+_TRANSPARENT_TAGS = {"span", "font", "u", "ins", "small", "big", "tbody", "thead", "tfoot", "colgroup", "col"}
+_INLINE_MARKS = {"b": "**", "strong": "**", "i": "*", "em": "*", "s": "~~", "strike": "~~", "del": "~~"}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_PARAGRAPH_TAGS = {"p", "div"}
+_VOID_TAGS = {"br", "img", "hr", "col", "wbr"}
+
+_SPACE_RE = re.compile(r"[ \t\n\r\f]+")
+_ESCAPE_RE = re.compile(r"([\\`*_\[\]])")
+# Line starts that Markdown would read as a heading, quote, list or rule.
+_LINE_START_RE = re.compile(r"^(#|>|[-+](?=\s)|=+\s*$|-+\s*$|(\d+)(?=[.)]\s))")
+
+
+class _Unsupported(Exception):
+    """Raised for markup outside the editor's tag set; triggers the fallback."""
+
+
+def _escape(text: str) -> str:
+    text = text.replace("&", "&amp;").replace("<", "&lt;")
+    return _ESCAPE_RE.sub(r"\\\1", text)
+
+
+def _escape_line_start(line: str) -> str:
+    match = _LINE_START_RE.match(line)
+    if not match:
+        return line
+    if match.group(2):
+        # "1. text" -> "1\. text"
+        end = len(match.group(2))
+        return line[:end] + "\\" + line[end:]
+    if line.startswith("="):
+        # "=" has no backslash escape in Markdown; an entity keeps it literal.
+        return "&#61;" + line[1:]
+    return "\\" + line
+
+
+class _Frame:
+    """An open inline element collecting its rendered children."""
+
+    __slots__ = ("tag", "parts", "attrs")
+
+    def __init__(self, tag: Optional[str], attrs=None):
+        self.tag = tag
+        self.parts: List[str] = []
+        self.attrs = attrs or {}
+
+
+class FastMarkdownExporter(HTMLParser):
+    """
+    Single-pass HTML -> Markdown converter for the markup the editor produces.
+
+    Handles the `execCommand` output (b/i/u/strike/font/span, h1-h6, p/div,
+    ul/ol, img, a, br) and what `load_from_markdown` emits (pre/code,
+    tables, blockquote, hr, em/strong). Markup outside that set raises
+    `_Unsupported`; use `html_to_markdown()`, which falls back to
+    markdownify in that case.
+
+    Blocks are written as soon as they close, so memory stays proportional
+    to the largest block rather than to the document. Output follows what
+    markdownify produces with `heading_style="ATX"` except that nested lists
+    are indented by four spaces, which Python-Markdown needs to read them
+    back as nested.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out: List[str] = []
+        self._inline: List[_Frame] = [_Frame(None)]
+        # Open lists: [ordered, next_number]
+        self._lists: List[List] = []
+        self._quote_depth = 0
+        self._in_li_text = False
+        self._heading: Optional[int] = None
+        self._pre: Optional[List[str]] = None
+        self._pre_lang = ""
+        self._code_depth = 0
+        # Table being collected as rows of cell texts; `_table_header` is set
+        # when the first row is made of <th> cells.
+        self._table: Optional[List[List[str]]] = None
+        self._table_header = False
+        self._tight = False
+        # Quote depth of the last emitted block.
+        self._emitted_depth = 0
+
+    # --- Output helpers ---
+
+    def _prefix(self, first_line: bool) -> str:
+        quote = "> " * self._quote_depth
+        if not self._lists:
+            return quote
+        indent = "    " * (len(self._lists) - 1)
+        if first_line and self._in_li_text:
+            ordered, number = self._lists[-1]
+            marker = f"{number}. " if ordered else "* "
+            return quote + indent + marker
+        return quote + indent + "    "
+
+    def _emit(self, lines: List[str], tight: bool = False):
+        """Writes a finished block. `tight` blocks (list items) are not separated by a blank line."""
+        if self.out:
+            if tight and self._tight:
+                self.out.append("\n")
+            else:
+                # Entering a quote, the blank line belongs to the outer level;
+                # a ">" there would continue the preceding list or paragraph.
+                blank = ("> " * min(self._quote_depth, self._emitted_depth)).rstrip()
+                self.out.append("\n" + blank + "\n")
+        for i, line in enumerate(lines):
+            if i:
+                self.out.append("\n")
+            self.out.append(self._prefix(first_line=(i == 0)) + line)
+        self._tight = tight
+        self._emitted_depth = self._quote_depth
+
+    def _take_inline(self) -> str:
+        # Close any inline element the HTML left open at a block boundary.
+        while len(self._inline) > 1:
+            self._close_inline(self._inline[-1].tag)
+        frame = self._inline[0]
+        text = "".join(frame.parts)
+        frame.parts = []
+        return text
+
+    def _flush_paragraph(self):
+        text = self._take_inline()
+        lines = [_SPACE_RE.sub(" ", line).strip() for line in text.split("\n")]
+        while lines and not lines[-1]:
+            lines.pop()
+        while lines and not lines[0]:
+            lines.pop(0)
+        if not lines:
+            if self._in_li_text:
+                self._emit([""], tight=True)
+                self._in_li_text = False
+            return
+        if self._heading:
+            self._emit(["#" * self._heading + " " + " ".join(line for line in lines if line)])
+            return
+        lines = [_escape_line_start(line) for line in lines]
+        # <br> becomes a hard line break.
+        lines = [line + "  " for line in lines[:-1]] + [lines[-1]]
+        if self._in_li_text:
+            self._emit(lines, tight=True)
+            self._in_li_text = False
+        else:
+            self._emit(lines)
+
+    def _write(self, text: str):
+        self._inline[-1].parts.append(text)
+
+    def _close_inline(self, tag: str):
+        if len(self._inline) < 2 or self._inline[-1].tag != tag:
+            raise _Unsupported(f"unbalanced </{tag}>")
+        frame = self._inline.pop()
+        inner = "".join(frame.parts)
+        if tag == "a":
+            href = frame.attrs.get("href") or ""
+            title = frame.attrs.get("title")
+            text = _SPACE_RE.sub(" ", inner).strip()
+            if not href:
+                self._write(inner)
+                return
+            title_part = f' "{title}"' if title else ""
+            self._write(f"[{text}]({href}{title_part})")
+            return
+        if tag == "code":
+            code = _SPACE_RE.sub(" ", inner)
+            fence = "`"
+            while fence in code:
+                fence += "`"
+            pad = " " if code.startswith("`") or code.endswith("`") else ""
+            self._write(f"{fence}{pad}{code}{pad}{fence}")
+            return
+        mark = _INLINE_MARKS[tag]
+        stripped = inner.strip()
+        if not stripped:
+            self._write(inner)
+            return
+        lead = " " if inner[:1].isspace() else ""
+        trail = " " if inner[-1:].isspace() else ""
+        self._write(f"{lead}{mark}{stripped}{mark}{trail}")
+
+    def _start_block(self):
+        if self._pre is not None or self._table is not None:
+            raise _Unsupported("block inside pre/table")
+        self._flush_paragraph()
+
+    # --- HTMLParser callbacks ---
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._pre is not None:
+            if tag == "code":
+                classes = (attrs.get("class") or "").split()
+                for cls in classes:
+                    if cls.startswith("language-"):
+                        self._pre_lang = cls[len("language-"):]
+                return
+            raise _Unsupported(f"<{tag}> inside <pre>")
+
+        if self._table is not None:
+            if tag == "tr":
+                self._table.append([])
+                return
+            if tag in ("td", "th"):
+                if tag == "th" and len(self._table) == 1:
+                    self._table_header = True
+                self._inline = [_Frame(None)]
+                return
+            if tag in ("thead", "tbody", "tfoot"):
+                return
+
+        if tag in _TRANSPARENT_TAGS:
+            return
+        if tag in _INLINE_MARKS or tag in ("a", "code"):
+            if tag == "code":
+                self._code_depth += 1
+            self._inline.append(_Frame(tag, attrs))
+            return
+        if tag == "br":
+            self._write("\n")
+            return
+        if tag == "img":
+            alt = _escape(attrs.get("alt") or "")
+            title = attrs.get("title")
+            title_part = f' "{title}"' if title else ""
+            self._write(f"![{alt}]({attrs.get('src') or ''}{title_part})")
+            return
+        if tag == "wbr":
+            return
+
+        if tag in _PARAGRAPH_TAGS:
+            # A list item's first paragraph goes on the marker line; later
+            # ones are flushed as indented continuation paragraphs.
+            if self._in_li_text and tag == "p" and not self._inline[0].parts:
+                return
+            self._start_block()
+            return
+        if tag in _HEADINGS:
+            self._start_block()
+            self._heading = _HEADINGS[tag]
+            return
+        if tag in ("ul", "ol"):
+            self._start_block()
+            start = attrs.get("start")
+            self._lists.append([tag == "ol", int(start) if start and start.isdigit() else 1])
+            return
+        if tag == "li":
+            if not self._lists:
+                raise _Unsupported("<li> outside a list")
+            self._start_block()
+            self._in_li_text = True
+            return
+        if tag == "blockquote":
+            self._start_block()
+            self._quote_depth += 1
+            self._tight = False
+            return
+        if tag == "pre":
+            self._start_block()
+            self._pre = []
+            self._pre_lang = ""
+            return
+        if tag == "hr":
+            self._start_block()
+            self._emit(["---"])
+            return
+        if tag == "table":
+            self._start_block()
+            self._table = []
+            self._table_header = False
+            return
+        raise _Unsupported(f"<{tag}>")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS:
+            return
+        if self._pre is not None:
+            if tag == "code":
+                return
+            if tag != "pre":
+                raise _Unsupported(f"</{tag}> inside <pre>")
+            code = "".join(self._pre)
+            if code.endswith("\n"):
+                code = code[:-1]
+            fence = "```"
+            while fence in code:
+                fence += "`"
+            self._pre = None
+            self._emit([fence + self._pre_lang] + code.split("\n") + [fence])
+            return
+
+        if self._table is not None:
+            if tag in ("td", "th"):
+                text = _SPACE_RE.sub(" ", self._take_inline()).strip().replace("|", "\\|")
+                if not self._table:
+                    self._table.append([])
+                self._table[-1].append(text)
+                return
+            if tag == "table":
+                rows, self._table = [r for r in self._table if r], None
+                if rows:
+                    width = max(len(row) for row in rows)
+                    rows = [row + [""] * (width - len(row)) for row in rows]
+                    if not self._table_header:
+                        rows.insert(0, [""] * width)
+                    lines = ["| " + " | ".join(rows[0]) + " |", "| " + " | ".join(["---"] * width) + " |"]
+                    lines += ["| " + " | ".join(row) + " |" for row in rows[1:]]
+                    self._emit(lines)
+                return
+            if tag in ("tr", "thead", "tbody", "tfoot"):
+                return
+
+        if tag in _TRANSPARENT_TAGS:
+            return
+        if tag in _INLINE_MARKS or tag in ("a", "code"):
+            if tag == "code":
+                self._code_depth -= 1
+            self._close_inline(tag)
+            return
+        if tag in _PARAGRAPH_TAGS:
+            self._flush_paragraph()
+            return
+        if tag in _HEADINGS:
+            self._flush_paragraph()
+            self._heading = None
+            return
+        if tag == "li":
+            self._flush_paragraph()
+            self._in_li_text = False
+            if self._lists:
+                self._lists[-1][1] += 1
+            return
+        if tag in ("ul", "ol"):
+            self._flush_paragraph()
+            if self._lists:
+                self._lists.pop()
+            if not self._lists:
+                self._tight = False
+            return
+        if tag == "blockquote":
+            self._flush_paragraph()
+            self._quote_depth = max(0, self._quote_depth - 1)
+            self._tight = False
+            return
+        raise _Unsupported(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self._pre is not None:
+            self._pre.append(data)
+            return
+        if self._code_depth:
+            self._write(data)
+            return
+        if self._table is None and not self._inline[-1].parts and not self._inline[0].parts and not data.strip():
+            # Whitespace between blocks.
+            return
+        self._write(_escape(_SPACE_RE.sub(" ", data)))
+
+    def close(self) -> str:
+        super().close()
+        if self._pre is not None or self._table is not None:
+            raise _Unsupported("unterminated block")
+        self._flush_paragraph()
+        return "".join(self.out)
+
+
+def fast_html_to_markdown(html: str, chunk_size: int = 64 * 1024) -> Tuple[bool, str]:
+    """
+    Runs only the fast path. Returns `(True, markdown)`, or `(False, "")` if
+    the HTML contains markup the fast path does not handle.
+    """
+    exporter = FastMarkdownExporter()
+    try:
+        for start in range(0, len(html), chunk_size):
+            exporter.feed(html[start:start + chunk_size])
+        return True, exporter.close()
+    except _Unsupported:
+        return False, ""
+
+
+def html_to_markdown(html: str) -> str:
+    """Exports editor HTML as Markdown, falling back to markdownify for unknown markup."""
+    ok, markdown_text = fast_html_to_markdown(html)
+    if ok:
+        return markdown_text
+    return markdownify.markdownify(html, heading_style="ATX")
+
+
+# Top-level nodes that start a block of their own. Everything else (text,
+# <b>, <font>, <br>, ...) flows into the same paragraph as its neighbours.
+_BLOCK_START_RE = re.compile(r"<(?:p|div|h[1-6]|ul|ol|pre|table|blockquote|hr)[\s/>]", re.IGNORECASE)
+_MISSING = object()
+
+
+def group_blocks(blocks: Iterable[str]) -> List[str]:
+    """
+    Groups top-level editor nodes into independently exportable segments:
+    each block element on its own, consecutive inline nodes joined.
+    """
+    segments: List[str] = []
+    run: List[str] = []
+    for block in blocks:
+        if _BLOCK_START_RE.match(block):
+            if run:
+                segments.append("".join(run))
+                run = []
+            segments.append(block)
+        else:
+            run.append(block)
+    if run:
+        segments.append("".join(run))
+    return segments
+
+
+class BlockMarkdownCache:
+    """
+    Incremental Markdown export keyed by the HTML of each top-level segment.
+
+    `export()` reuses the Markdown of every segment whose HTML has not
+    changed since the previous export and converts only the rest, so
+    repeated exports cost in proportion to the edit, not the document.
+    Segments are exported on their own and joined with blank lines, which
+    is what a whole-document export produces between top-level blocks.
+    Entries for segments that disappeared are dropped on each export.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, str] = {}
+        self.stats: Dict[str, int] = {"segments_reused": 0, "segments_converted": 0}
+
+    def export(self, blocks: Iterable[str]) -> str:
+        cache: Dict[str, str] = {}
+        parts: List[str] = []
+        for segment in group_blocks(blocks):
+            markdown_text = cache.get(segment, _MISSING)
+            if markdown_text is _MISSING:
+                markdown_text = self._cache.get(segment, _MISSING)
+            if markdown_text is _MISSING:
+                markdown_text = html_to_markdown(segment).strip("\n")
+                self.stats["segments_converted"] += 1
+            else:
+                self.stats["segments_reused"] += 1
+            cache[segment] = markdown_text
+            if markdown_text.strip():
+                parts.append(markdown_text)
+        self._cache = cache
+        return "\n\n".join(parts)
+
+    def clear(self):
+        self._cache = {}
@@ -0,0 +1,115 @@
+# plugins/markdown/ipc_overlay.py
+import os
+
+from pythra import (
+    StatefulWidget,
+    State,
+    Key,
+    Container,
+    Column,
+    Text,
+    TextStyle,
+    SizedBox,
+    Colors,
+    EdgeInsets,
+    BoxDecoration,
+    BorderRadius,
+    CrossAxisAlignment,
+    GestureDetector,
+)
+
+from .ipc_stats import IpcStats, summary_lines
+
+# How often the overlay re-reads the counters.
+REFRESH_MS = 1000
+EXPORT_FILE = "ipc_stats.json"
+
+
+class IpcStatsOverlay(StatefulWidget):
+    """
+    Debug overlay with the bridge counters of `IpcStats`, one line per
+    channel, and an "Export JSON" link. Only built when `Debug` is on.
+    """
+
+    def __init__(self, key: Key):
+        super().__init__(key=key)
+
+    def createState(self):
+        return IpcStatsOverlayState()
+
+
+class IpcStatsOverlayState(State):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.exported_to = None
+        self._timer = None
+        self._calls = 0
+
+    def initState(self):
+        from PySide6.QtCore import QTimer
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._refresh)
+        self._timer.start(REFRESH_MS)
+
+    def dispose(self):
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        super().dispose()
+
+    def _refresh(self):
+        stats = IpcStats.active()
+        if stats is None:
+            return
+        snapshot = stats.snapshot()
+        calls = sum(channel["count"] for channel in snapshot["channels"].values())
+        # Rebuilding goes through the bridge too; skip it when nothing moved.
+        if calls == self._calls:
+            return
+        self._calls = calls
+        self.lines = summary_lines(snapshot)
+        self.setState()
+
+    def export(self):
+        stats = IpcStats.active()
+        if stats is None:
+            return
+        self.exported_to = os.path.abspath(stats.export(EXPORT_FILE))
+        print(f"IPC stats exported to {self.exported_to}")
+        self.setState()
+
+    def build(self):
+        prefix = self.get_widget().key.value
+        lines = self.lines or ["No bridge traffic yet."]
+        return Container(
+            key=Key(f"{prefix}_box"),
+            padding=EdgeInsets.symmetric(vertical=8, horizontal=12),
+            decoration=BoxDecoration(
+                color=Colors.surface,
+                borderRadius=BorderRadius.all(8),
+            ),
+            child=Column(
+                key=Key(f"{prefix}_column"),
+                crossAxisAlignment=CrossAxisAlignment.START,
+                children=[
+                    *[
+                        Text(
+                            line,
+                            key=Key(f"{prefix}_line_{index}"),
+                            style=TextStyle(fontSize=11, fontFamily="monospace", color=Colors.onSurface),
+                        ) for index, line in enumerate(lines)
+                    ],
+                    SizedBox(height=4, key=Key(f"{prefix}_gap")),
+                    GestureDetector(
+                        key=Key(f"{prefix}_export"),
+                        onTap=lambda details: self.export(),
+                        child=Text(
+                            f"Exported to {self.exported_to}" if self.exported_to else "Export JSON",
+                            key=Key(f"{prefix}_export_text"),
+                            style=TextStyle(fontSize=11, color=Colors.primary),
+                        ),
+                    ),
+                ],
+            ),
+        )
@@ -0,0 +1,181 @@
+# plugins/markdown/ipc_stats.py
+import json
+import time
+import bisect
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Channel of every JsCommandQueue flush.
+EVALUATE_JS = "evaluate_js"
+
+
+def _payload_bytes(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8", "replace"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(json.dumps(value))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+class ChannelStats:
+    """Counters of one channel: calls, payload bytes and a latency histogram."""
+
+    __slots__ = ("count", "bytes", "max_bytes", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.max_bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, payload_bytes: int, elapsed_ms: float):
+        self.count += 1
+        self.bytes += payload_bytes
+        self.max_bytes = max(self.max_bytes, payload_bytes)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile_ms(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the `fraction` quantile (max latency for the open bucket)."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile_ms(0.5),
+            "p95_ms": self.percentile_ms(0.95),
+            "max_ms": self.max_ms,
+            "histogram": {
+                **{f"<={bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)},
+                f">{LATENCY_BUCKETS_MS[-1]}ms": self.histogram[-1],
+            },
+        }
+
+
+class IpcStats:
+    """
+    Traffic counters for the Python <-> WebEngine bridge of the editor.
+
+    Two kinds of channels are recorded:
+    - `evaluate_js`: every JsCommandQueue flush. Bytes are the script sent;
+      latency is how long `evaluate_js` blocked the UI thread (the script
+      itself runs asynchronously in the page).
+    - callbacks registered with `framework.api`, one channel per family
+      (`markdown_content_change`, `markdown_content_delta`,
+      `markdown_state_change`, `markdown_toggle_controls`): bytes are the
+      arguments received from JS; latency is the Python handler's run time.
+
+    Recording is only switched on with `Debug: true` in config.yaml. When it
+    is off, `active()` returns None, `instrument()` returns the handler
+    itself and JsCommandQueue skips the timing, so there is nothing left to
+    pay at runtime.
+    """
+
+    _instance: Optional["IpcStats"] = None
+    _instance_lock = threading.Lock()
+    _enabled: Optional[bool] = None
+
+    @classmethod
+    def active(cls) -> Optional["IpcStats"]:
+        """The app-wide recorder, or None when `Debug` is off."""
+        if cls._enabled is None:
+            try:
+                from pythra import Framework
+                cls._enabled = bool(Framework.instance().config.get("Debug", False))
+            except Exception:
+                # No framework (scripts, benchmarks): off, but ask again next time.
+                return None
+        if not cls._enabled:
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.channels: Dict[str, ChannelStats] = {}
+        self.started = time.time()
+
+    def record(self, channel: str, payload_bytes: int, elapsed_ms: float):
+        with self._lock:
+            stats = self.channels.get(channel)
+            if stats is None:
+                stats = self.channels[channel] = ChannelStats()
+            stats.record(payload_bytes, elapsed_ms)
+
+    def time_call(self, channel: str, payload_bytes: int, fn: Callable, *args):
+        """Calls `fn(*args)` and records it on `channel`."""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.record(channel, payload_bytes, (time.perf_counter() - start) * 1000)
+
+    def wrap(self, channel: str, handler: Callable) -> Callable:
+        """`handler`, recording each call (arguments as payload) on `channel`."""
+        def instrumented(*args):
+            return self.time_call(channel, sum(_payload_bytes(arg) for arg in args), handler, *args)
+        instrumented.__wrapped__ = handler
+        return instrumented
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started": self.started,
+                "elapsed_s": time.time() - self.started,
+                "channels": {name: stats.to_dict() for name, stats in sorted(self.channels.items())},
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def export(self, path: str) -> str:
+        """Writes the JSON snapshot to `path` and returns the path."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.channels = {}
+            self.started = time.time()
+
+
+def instrument(channel: str, handler: Callable) -> Callable:
+    """Wraps a bridge callback for recording, or returns it untouched when recording is off."""
+    stats = IpcStats.active()
+    return handler if stats is None else stats.wrap(channel, handler)
+
+
+def summary_lines(snapshot: Dict[str, Any]) -> List[str]:
+    """One human-readable line per channel, for the debug overlay."""
+    lines = []
+    for name, stats in snapshot["channels"].items():
+        lines.append(
+            f"{name}: {stats['count']}x, {stats['bytes'] / 1024:.1f} KB, "
+            f"p50 {stats['p50_ms']:g} ms, p95 {stats['p95_ms']:g} ms, max {stats['max_ms']:.1f} ms"
+        )
+    return lines
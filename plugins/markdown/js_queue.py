@@ -0,0 +1,107 @@
+# plugins/markdown/js_queue.py
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .ipc_stats import EVALUATE_JS, IpcStats
+
+
+def _schedule_next_turn(callback: Callable[[], None]):
+    """Runs `callback` once the current Qt event-loop turn has finished."""
+    try:
+        from PySide6.QtCore import QTimer
+    except ImportError:
+        callback()
+        return
+    QTimer.singleShot(0, callback)
+
+
+class JsCommandQueue:
+    """
+    Per-window queue of editor commands, flushed as one `evaluate_js` call.
+
+    Commands issued during the same event-loop turn (for example restore
+    selection + focus + execCommand) are collected and sent together at the
+    end of the turn. Structured commands go through `pythraEditorDispatch`,
+    a small dispatcher defined in editor.js, so the payload is plain JSON
+    instead of a freshly formatted script per call. Raw scripts (from
+    `run_javascript`) are appended in order.
+
+    Commands must be enqueued from the UI thread.
+    """
+
+    _queues: Dict[Any, "JsCommandQueue"] = {}
+    _queues_lock = threading.Lock()
+
+    @classmethod
+    def for_window(cls, framework, window_id) -> "JsCommandQueue":
+        with cls._queues_lock:
+            queue = cls._queues.get(window_id)
+            if queue is None or queue._framework is not framework:
+                queue = cls(framework, window_id)
+                cls._queues[window_id] = queue
+            return queue
+
+    def __init__(self, framework, window_id, schedule: Callable[[Callable[[], None]], None] = _schedule_next_turn):
+        self._framework = framework
+        self._window_id = window_id
+        self._schedule = schedule
+        self._lock = threading.Lock()
+        # Entries are ("call", [instance_name, method, args]) or ("raw", script).
+        self._pending: List[Tuple[str, Any]] = []
+        self._flush_scheduled = False
+        # Bridge traffic recorder; None unless `Debug` is on (see ipc_stats.py).
+        self._stats = IpcStats.active()
+
+    def call(self, instance_name: Optional[str], method: str, *args):
+        """
+        Queues `window._pythra_instances[instance_name][method](*args)`, or the
+        global editor helper `window[method](*args)` when `instance_name` is None.
+        """
+        self._enqueue(("call", [instance_name, method, list(args)]))
+
+    def run(self, script: str):
+        """Queues a raw JavaScript snippet."""
+        if script:
+            self._enqueue(("raw", script))
+
+    def _enqueue(self, entry: Tuple[str, Any]):
+        with self._lock:
+            self._pending.append(entry)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._schedule(self.flush)
+
+    def build_payload(self, entries: List[Tuple[str, Any]]) -> str:
+        parts: List[str] = []
+        calls: List[Any] = []
+        for kind, value in entries:
+            if kind == "call":
+                calls.append(value)
+                continue
+            if calls:
+                parts.append(f"window.pythraEditorDispatch({json.dumps(calls)});")
+                calls = []
+            # Terminate raw snippets so two IIFEs never parse as one call expression.
+            parts.append(f"{value}\n;")
+        if calls:
+            parts.append(f"window.pythraEditorDispatch({json.dumps(calls)});")
+        return "\n".join(parts)
+
+    def flush(self):
+        """Sends everything queued so far in a single `evaluate_js` call."""
+        with self._lock:
+            entries = self._pending
+            self._pending = []
+            self._flush_scheduled = False
+        if not entries:
+            return
+        window = getattr(self._framework, "window", None)
+        if not window:
+            return
+        payload = self.build_payload(entries)
+        if self._stats is None:
+            window.evaluate_js(self._window_id, payload)
+        else:
+            self._stats.time_call(EVALUATE_JS, len(payload.encode("utf-8", "replace")), window.evaluate_js, self._window_id, payload)
@@ -0,0 +1,45 @@
+# plugins/markdown/lazy.py
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    """
+    Stands in for a module that is only imported on first attribute access.
+
+    `markdown = lazy_import("markdown")` at module level costs nothing; the
+    real import happens the first time `markdown.Markdown` is looked up, on
+    whichever thread gets there first.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns a proxy for module `name` that imports it on first use."""
+    return LazyModule(name)
@@ -0,0 +1,158 @@
+# plugins/markdown/markdown_import.py
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, List, Optional, Tuple
+
+from .conversion import MarkdownConverter
+
+# Markdown characters converted per section; each section becomes one chunk
+# of HTML streamed into the editor.
+DEFAULT_SECTION_CHARS = 128 * 1024
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# Lines that continue the previous block even after a blank line (indented
+# code or list content, list items, quotes, tables, raw HTML).
+_CONTINUATION_RE = re.compile(r"^(?:[ \t]|[-*+][ \t]|\d+[.)][ \t]|>|\||<)")
+_REFERENCE_RE = re.compile(r"^ {0,3}\[[^\]\n]+\]:[ \t]*\S.*$", re.MULTILINE)
+
+
+class BlockBoundaryScanner:
+    """
+    Reads Markdown line by line and tells where a new top-level block may
+    start: after a blank line, on a line that does not continue the previous
+    block, outside fenced code. Shared by `split_markdown` and the streaming
+    buffer in selection_stream.py.
+    """
+
+    __slots__ = ("fence", "previous_blank")
+
+    def __init__(self):
+        self.fence: Optional[str] = None
+        self.previous_blank = False
+
+    def starts_block(self, line: str) -> bool:
+        """Consumes `line` (with its line ending); True if a section may end just before it."""
+        stripped = line.strip()
+        starts = (
+            self.fence is None
+            and self.previous_blank
+            and bool(stripped)
+            and not _CONTINUATION_RE.match(line)
+        )
+        match = _FENCE_RE.match(line)
+        if match:
+            marker = match.group(1)
+            if self.fence is None:
+                self.fence = marker
+            elif marker[0] == self.fence[0] and len(marker) >= len(self.fence) and not line.strip(" \t\r\n`~"):
+                self.fence = None
+        self.previous_blank = not stripped
+        return starts
+
+
+def split_markdown(text: str, section_chars: int = DEFAULT_SECTION_CHARS) -> List[str]:
+    """
+    Splits Markdown into sections of roughly `section_chars` that convert to
+    the same HTML separately as they do together.
+
+    A section only ends before a blank line followed by a line that starts a
+    new top-level block, never inside a fenced code block, a list, a quote
+    or a table.
+    """
+    if len(text) <= section_chars:
+        return [text]
+
+    sections: List[str] = []
+    current: List[str] = []
+    size = 0
+    scanner = BlockBoundaryScanner()
+    for line in text.splitlines(keepends=True):
+        if scanner.starts_block(line) and size >= section_chars:
+            sections.append("".join(current))
+            current = []
+            size = 0
+        current.append(line)
+        size += len(line)
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+class MarkdownImport:
+    """
+    One background Markdown -> HTML import.
+
+    `run()` executes on a worker thread: it converts the text section by
+    section and queues every resulting HTML chunk together with the share of
+    the source converted so far. The UI thread drains the queue with
+    `next_chunk()` and streams the chunks into the editor.
+
+    `future` resolves to the complete HTML. Cancelling it stops the worker
+    before its next section.
+    """
+
+    def __init__(
+        self,
+        markdown_text: str,
+        section_chars: int = DEFAULT_SECTION_CHARS,
+        convert: Optional[Callable[[str], str]] = None,
+    ):
+        self.markdown_text = markdown_text
+        self.section_chars = section_chars
+        self._convert = convert or (lambda text: MarkdownConverter.instance().to_html(text, cache=False))
+        self.future: Future = Future()
+
+        self._chunks: Deque[Tuple[str, float]] = deque()
+        self._finished = threading.Event()
+        self.error: Optional[BaseException] = None
+        # HTML chunks already handed to the UI thread, in order.
+        self.html_parts: List[str] = []
+        self.progress = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.cancelled()
+
+    def run(self):
+        """Converts all sections. Worker thread only."""
+        try:
+            text = self.markdown_text
+            sections = split_markdown(text, self.section_chars)
+            # Reference-style link definitions may sit in any section.
+            references = ""
+            if len(sections) > 1:
+                references = "\n".join(_REFERENCE_RE.findall(text))
+                if references:
+                    references = "\n\n" + references + "\n"
+            total = max(1, len(text))
+            converted = 0
+            for section in sections:
+                if self.cancelled:
+                    return
+                html = self._convert(section + references if references else section)
+                converted += len(section)
+                self._chunks.append((html, converted / total))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    def next_chunk(self) -> Optional[Tuple[str, float]]:
+        """Returns the next `(html, progress)` pair, or None if none is ready."""
+        try:
+            html, progress = self._chunks.popleft()
+        except IndexError:
+            return None
+        self.html_parts.append(html)
+        self.progress = progress
+        return html, progress
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the worker has stopped and every chunk has been taken."""
+        return self._finished.is_set() and not self._chunks
+
+    def html(self) -> str:
+        return "\n".join(self.html_parts)
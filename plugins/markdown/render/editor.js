@@ -1,4 +1,8 @@
 // PythraMarkdownEditor - A full-featured, themeable, and memory-safe WYSIWYG Editor Engine
+
+// Longest selection text reported to Python with the cursor state.
+const SELECTION_TEXT_LIMIT = 200000;
+
 class PythraMarkdownEditor {
     constructor(elementOrId, options = {}) {
         if (typeof elementOrId === 'string') {
@@ -20,6 +24,25 @@ class PythraMarkdownEditor {
         this._changeHandler = null;
         this._feedbackHandler = null;
 
+        // --- Block-level delta sync (see plugins/markdown/document.py) ---
+        this._blockIds = new WeakMap();   // top-level node -> stable block id
+        this._nextBlockId = 0;
+        this._syncedOrder = null;         // ids last reported to Python; null = send a full snapshot
+        this._syncedBlocks = null;        // id -> html last reported to Python
+        this._syncSeq = 0;
+        this._deltasSinceChecksum = 0;
+        this._lastChecksumTime = 0;
+
+        // --- Cursor-state channel: one diffed report per animation frame ---
+        this._cursorFrame = null;
+        this._lastCursorState = null;
+        this.cursorStats = { events: 0, framesCoalesced: 0, reportsSent: 0, unchangedSkipped: 0 };
+
+        // Selection being replaced by streamed HTML (see beginSelectionStream).
+        this._selectionStream = null;
+        // Last selection made in this editor; every pooled editor keeps its own.
+        this._savedSelection = null;
+
         if (this.container) {
             this.container.style.width = this.options.width || (this.options.style?.defaults?.width || '100%');
             this.container.style.height = this.options.height || (this.options.style?.defaults?.height || 'auto');
@@ -44,8 +67,9 @@ class PythraMarkdownEditor {
                     // Check if the current selection is inside ANY known editor instance
                     for (const key in allInstances) {
                         if (allInstances[key] && allInstances[key].editorElement && allInstances[key].editorElement.contains(selection.anchorNode)) {
-                            // This is a valid selection inside our editor, save it globally.
-                            window._pythraSavedSelection = currentRange;
+                            // This is a valid selection inside one of our editors, save it there.
+                            allInstances[key]._savedSelection = currentRange;
+                            window._pythraActiveEditor = allInstances[key];
                             console.log("current range: ", currentRange);
                             return; // Found the active editor
                         }
@@ -101,7 +125,7 @@ class PythraMarkdownEditor {
 
     init() {
         let controlPanel = this.container.querySelector('.control-panel');
-        let editorEl = this.container.querySelector('[contenteditable="true"]');
+        let editorEl = this.container.querySelector('[contenteditable]');
 
         this.container.classList.add('pythra-editor-wrapper');
 
@@ -214,20 +238,135 @@ class PythraMarkdownEditor {
         this._changeHandler = () => {
             clearTimeout(this._changeTimer);
             this._changeTimer = setTimeout(() => {
-                const content = this.editorElement.innerHTML;
-                if (typeof handleInput === 'function' && this.options.callback) {
-                    handleInput(this.options.callback, content);
+                if (typeof handleInput !== 'function') return;
+                if (this.options.deltaCallback) {
+                    this._sendDelta();
+                } else if (this.options.callback) {
+                    handleInput(this.options.callback, this.editorElement.innerHTML);
                 }
             }, 180);
         };
         this.editorElement.addEventListener('input', this._changeHandler);
     }
 
+    // --- Block-level delta protocol ---
+
+    _blockIdFor(node) {
+        let id = this._blockIds.get(node);
+        if (!id) {
+            id = (this._nextBlockId++).toString(36);
+            this._blockIds.set(node, id);
+        }
+        return id;
+    }
+
+    // Serializes one top-level node exactly like innerHTML does, so that the
+    // joined blocks on the Python side equal editorElement.innerHTML.
+    _serializeBlock(node) {
+        if (node.nodeType === Node.ELEMENT_NODE) return node.outerHTML;
+        if (node.nodeType === Node.TEXT_NODE) {
+            return node.data.replace(/&/g, '&amp;').replace(/\u00a0/g, '&nbsp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+        }
+        if (node.nodeType === Node.COMMENT_NODE) return `<!--${node.data}-->`;
+        return '';
+    }
+
+    _collectBlocks() {
+        const order = [];
+        const blocks = new Map();
+        for (const node of this.editorElement.childNodes) {
+            const id = this._blockIdFor(node);
+            order.push(id);
+            blocks.set(id, this._serializeBlock(node));
+        }
+        return { order, blocks };
+    }
+
+    sendFullSync() {
+        if (!this.editorElement || typeof handleInput !== 'function' || !this.options.deltaCallback) return;
+        const { order, blocks } = this._collectBlocks();
+        this._syncedOrder = order;
+        this._syncedBlocks = blocks;
+        this._syncSeq += 1;
+        this._deltasSinceChecksum = 0;
+        this._lastChecksumTime = Date.now();
+        handleInput(this.options.deltaCallback, JSON.stringify({
+            type: 'full',
+            seq: this._syncSeq,
+            order: order,
+            blocks: Object.fromEntries(blocks),
+        }));
+    }
+
+    _sendDelta() {
+        if (!this._syncedOrder) {
+            this.sendFullSync();
+            return;
+        }
+        const { order, blocks } = this._collectBlocks();
+        const oldOrder = this._syncedOrder;
+
+        const changed = {};
+        let hasChanges = false;
+        for (const [id, html] of blocks) {
+            if (this._syncedBlocks.get(id) !== html) {
+                changed[id] = html;
+                hasChanges = true;
+            }
+        }
+
+        // Describe an order change as a single splice around the common prefix/suffix.
+        let splice = null;
+        let start = 0;
+        while (start < order.length && start < oldOrder.length && order[start] === oldOrder[start]) start++;
+        if (start < order.length || start < oldOrder.length) {
+            let oldEnd = oldOrder.length;
+            let newEnd = order.length;
+            while (oldEnd > start && newEnd > start && oldOrder[oldEnd - 1] === order[newEnd - 1]) {
+                oldEnd--;
+                newEnd--;
+            }
+            splice = [start, oldEnd - start, order.slice(start, newEnd)];
+        }
+
+        if (!hasChanges && !splice) return;
+
+        const message = { type: 'delta', seq: this._syncSeq + 1, base: this._syncSeq, changed: changed };
+        if (splice) message.splice = splice;
+
+        this._deltasSinceChecksum += 1;
+        const now = Date.now();
+        if (this._deltasSinceChecksum >= 20 || now - this._lastChecksumTime > 10000) {
+            message.checksum = _pythraCrc32(this.editorElement.innerHTML);
+            this._deltasSinceChecksum = 0;
+            this._lastChecksumTime = now;
+        }
+
+        this._syncSeq += 1;
+        this._syncedOrder = order;
+        this._syncedBlocks = blocks;
+        handleInput(this.options.deltaCallback, JSON.stringify(message));
+    }
+
+    _resetBlockSync() {
+        this._blockIds = new WeakMap();
+        this._syncedOrder = null;
+        this._syncedBlocks = null;
+    }
+
     _setupVisualFeedbackHandlers() {
         if (!this.editorElement) return;
         this._feedbackHandler = () => {
-            this.updateButtonStates();
-            this.reportCursorState();
+            this.cursorStats.events += 1;
+            if (this._cursorFrame !== null) {
+                this.cursorStats.framesCoalesced += 1;
+                return;
+            }
+            this._cursorFrame = requestAnimationFrame(() => {
+                this._cursorFrame = null;
+                this.updateButtonStates();
+                this.reportCursorState();
+            });
         };
         ['keyup', 'mouseup', 'focus', 'click'].forEach(eventType => {
             this.editorElement.addEventListener(eventType, this._feedbackHandler);
@@ -264,6 +403,9 @@ class PythraMarkdownEditor {
             // We might need to adjust them based on the window/screen context in Python,
             // or just pass them as is if the Python UI overlay is also screen-relative (which it often is in these frameworks).
             state.hasSelection = true;
+            // Sent (like every field) only when it changed; the AI actions
+            // work on it and cancel a running request when it changes.
+            state.selectionText = selection.toString().slice(0, SELECTION_TEXT_LIMIT);
             state.selectionRect = {
                 top: rect.top,
                 bottom: rect.bottom,
@@ -274,8 +416,8 @@ class PythraMarkdownEditor {
             };
 
             // --- NEW: Update Overlay Position via JS ---
-            if (window._pythraOverlay) {
-                const overlay = window._pythraOverlay;
+            const overlay = this._overlay();
+            if (overlay) {
                 overlay.style.display = 'block';
                 // Position above the selection
                 // We assume the overlay has position: absolute or fixed
@@ -295,18 +437,37 @@ class PythraMarkdownEditor {
 
         } else {
             state.hasSelection = false;
+            state.selectionText = '';
             state.selectionRect = null;
 
             // Hide overlay
-            if (window._pythraOverlay) {
-                window._pythraOverlay.style.display = 'none';
+            this.hideSelectionOverlay();
+        }
+
+        // Only send the fields that changed since the last report; skip the
+        // IPC hop entirely when nothing did.
+        const last = this._lastCursorState;
+        const changed = {};
+        let hasChanges = false;
+        for (const name in state) {
+            const value = state[name];
+            const previous = last ? last[name] : undefined;
+            const same = (value !== null && typeof value === 'object')
+                ? JSON.stringify(value) === JSON.stringify(previous)
+                : value === previous;
+            if (!last || !same) {
+                changed[name] = value;
+                hasChanges = true;
             }
         }
+        if (!hasChanges) {
+            this.cursorStats.unchangedSkipped += 1;
+            return;
+        }
+        this._lastCursorState = state;
+        this.cursorStats.reportsSent += 1;
 
-        // Send this entire state object to Python in a single call.
-        // We reuse handleInput, but the value is now a JSON string of the state object.
-        // console.log("cusorState: ", state);
-        handleInput(this.options.onStateChangeCallback, JSON.stringify(state));
+        handleInput(this.options.onStateChangeCallback, JSON.stringify(changed));
         syncExternalToolbarState(state);
     }
 
@@ -319,6 +480,7 @@ class PythraMarkdownEditor {
             .pythra-editor-wrapper [contenteditable]{color:var(--pe-content-text);font-family:var(--pe-content-font);font-size:var(--pe-content-font-size);line-height:var(--pe-content-line-height);padding:var(--pe-content-padding);flex-grow:1;min-height:150px;border-top:1px solid var(--pe-border-color);outline:none;overflow-y:auto;}
             .pythra-editor-wrapper [contenteditable]:focus{border-color:var(--pe-accent-color) !important;box-shadow:0 0 0 var(--pe-focus-ring-width) var(--pe-focus-ring-color)}
             .pythra-editor-wrapper [contenteditable]:empty:before{content:"Start writing...";color:var(--pe-content-placeholder);font-style:italic}
+            .pythra-ai-stream{display:block;opacity:0.6;border-left:2px solid var(--pe-accent-color);padding-left:8px;margin:4px 0}
             .pythra-editor-wrapper .pythra-toggle-button{flex-shrink:0;width:100%;padding:0.75rem;font-size:1rem;font-weight:600;color:white;background-color:var(--pe-accent-color);border:none;border-radius:var(--pe-border-radius) var(--pe-border-radius) 0 0;cursor:pointer;transition:background-color 0.2s ease;}
             .pythra-editor-wrapper .pythra-toggle-button:hover{background-color:var(--pe-accent-hover)}
             .control-panel{flex-shrink:0;background:var(--pe-toolbar-bg);padding:1rem;display:flex;flex-direction:column;gap:1rem;transition:all 0.3s ease-in-out;max-height:1000px;opacity:1;overflow:hidden;}
@@ -357,10 +519,97 @@ class PythraMarkdownEditor {
         this.updateButtonStates();
     }
 
-    setContent(html) { if (this.editorElement) this.editorElement.innerHTML = html; }
+    setContent(html) {
+        if (!this.editorElement) return;
+        this.editorElement.innerHTML = html;
+        // The saved range pointed into the old content (e.g. a pooled editor re-targeted by a prefetch).
+        this._savedSelection = null;
+        // Python already knows this content; the next edit sends a fresh snapshot.
+        this._resetBlockSync();
+    }
     getContent() { return this.editorElement ? this.editorElement.innerHTML : ''; }
+
+    // Streamed import: Python clears the editor, appends the HTML in chunks
+    // (one per event-loop turn, so the page stays responsive) and ends the
+    // stream. The editor is read-only in between.
+    beginStreamedContent() {
+        if (!this.editorElement) return;
+        this.editorElement.innerHTML = '';
+        this._savedSelection = null;
+        this.editorElement.contentEditable = 'false';
+        this._resetBlockSync();
+    }
+    appendContent(html) {
+        if (this.editorElement) this.editorElement.insertAdjacentHTML('beforeend', html);
+    }
+    endStreamedContent() {
+        if (!this.editorElement) return;
+        this.editorElement.contentEditable = 'true';
+        this._resetBlockSync();
+    }
+    // Streamed replacement of the selection (AI output). Python appends the
+    // converted blocks to a read-only preview placed after the selection and
+    // ends the stream with the full HTML, which replaces the selection in
+    // one insertHTML command: a single undo step. The editor stays editable
+    // meanwhile; the Range is live and follows the user's edits.
+    beginSelectionStream() {
+        if (!this.editorElement) return;
+        this.cancelSelectionStream();
+        let range;
+        const saved = this._savedSelection;
+        if (saved && this.editorElement.contains(saved.commonAncestorContainer)) {
+            range = saved.cloneRange();
+        } else {
+            range = document.createRange();
+            range.selectNodeContents(this.editorElement);
+            range.collapse(false);
+        }
+        const preview = document.createElement('span');
+        preview.className = 'pythra-ai-stream';
+        preview.contentEditable = 'false';
+        const end = range.cloneRange();
+        end.collapse(false);
+        // Inserting at the range's end leaves the range itself unchanged.
+        end.insertNode(preview);
+        this._selectionStream = { range, preview };
+    }
+    appendSelectionStream(html) {
+        const stream = this._selectionStream;
+        if (stream) stream.preview.insertAdjacentHTML('beforeend', html);
+    }
+    endSelectionStream(html) {
+        const stream = this._selectionStream;
+        if (!stream) return;
+        this._selectionStream = null;
+        stream.preview.remove();
+        this.editorElement.focus();
+        const selection = window.getSelection();
+        selection.removeAllRanges();
+        selection.addRange(stream.range);
+        document.execCommand('insertHTML', false, html);
+    }
+    cancelSelectionStream() {
+        const stream = this._selectionStream;
+        if (!stream) return;
+        this._selectionStream = null;
+        stream.preview.remove();
+    }
+
     focus() { if (this.editorElement) this.editorElement.focus(); }
 
+    // Selection helpers, keyed by editor like every other command: with
+    // several pooled editors mounted, each has its own saved selection and
+    // its own AI overlay (registered under this editor's instanceId).
+    _overlay() {
+        return (window._pythraOverlays && window._pythraOverlays[this.options.instanceId]) || null;
+    }
+    restoreSelection() { restoreEditorSelection(this); }
+    replaceSelection(html) { replaceEditorSelection(html, this); }
+    hideSelectionOverlay() {
+        const overlay = this._overlay();
+        if (overlay) overlay.style.display = 'none';
+    }
+
     destroy() {
         console.log(`🔥 Destroying PythraMarkdownEditor instance: ${this.options.instanceId}`);
         if (this.editorElement && this._changeHandler) {
@@ -374,8 +623,36 @@ class PythraMarkdownEditor {
         if (this.imageResizer) {
             this.imageResizer.destroy();
         }
+        if (this._cursorFrame !== null) {
+            cancelAnimationFrame(this._cursorFrame);
+            this._cursorFrame = null;
+        }
         clearTimeout(this._changeTimer);
+        this.cancelSelectionStream();
+        this._resetBlockSync();
+        this._savedSelection = null;
+        if (window._pythraActiveEditor === this) window._pythraActiveEditor = null;
+    }
+}
+
+// CRC-32 over the UTF-8 bytes of a string. Mirrors content_checksum() in document.py.
+const _pythraCrcTable = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+function _pythraCrc32(str) {
+    const bytes = new TextEncoder().encode(str);
+    let crc = 0xFFFFFFFF;
+    for (let i = 0; i < bytes.length; i++) {
+        crc = _pythraCrcTable[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
     }
+    return (crc ^ 0xFFFFFFFF) >>> 0;
 }
 
 // --- NEW: JS-Controlled Overlay Logic ---
@@ -389,8 +666,9 @@ class PythraSelectionOverlay {
         }
 
         if (this.container) {
-            // Save to global scope for the editor to access
-            window._pythraOverlay = this.container;
+            // Registered under the editor it belongs to (see PythraMarkdownEditor._overlay).
+            window._pythraOverlays = window._pythraOverlays || {};
+            window._pythraOverlays[options.editorInstance] = this.container;
 
             // Initial style: hidden and absolute
             this.container.style.position = 'absolute';
@@ -415,8 +693,9 @@ document.addEventListener("DOMContentLoaded", () => {
 });
 
 // --- NEW: Global function to restore the saved selection ---
-function restoreEditorSelection() {
-    const savedRange = window._pythraSavedSelection;
+// `editor` defaults to the editor that last had a selection.
+function restoreEditorSelection(editor = window._pythraActiveEditor) {
+    const savedRange = editor ? editor._savedSelection : null;
     if (savedRange) {
         const selection = window.getSelection();
         selection.removeAllRanges();
@@ -430,9 +709,9 @@ function restoreEditorSelection() {
 window.restoreEditorSelection = restoreEditorSelection;
 
 // --- NEW: Global function to hide the overlay ---
-window.hidePythraSelectionOverlay = function () {
-    if (window._pythraOverlay) {
-        window._pythraOverlay.style.display = 'none';
+window.hidePythraSelectionOverlay = function (editor = window._pythraActiveEditor) {
+    if (editor) {
+        editor.hideSelectionOverlay();
         console.log('Overlay hidden');
     }
 };
@@ -512,8 +791,8 @@ window.syncExternalToolbarState = syncExternalToolbarState;
 /**
  * Replace the current selection (or saved selection) with the provided HTML.
  * - If there's an active selection, it will be replaced.
- * - If there's no active selection but a saved selection exists (`window._pythraSavedSelection`), that will be used.
- * - If no selection can be found, the HTML will be appended to the first `.editor-inner-container` found.
+ * - If there's no active selection but `editor` has a saved selection, that will be used.
+ * - If no selection can be found, the HTML will be appended to `editor` (or the first `.editor-inner-container` found).
  * 
  * SMART INLINE HANDLING:
  * - If replacing text within an inline context (e.g., within a <p>), and the replacement
@@ -523,23 +802,29 @@ window.syncExternalToolbarState = syncExternalToolbarState;
  * 
  * After inserting, an `input` event is dispatched on the affected editor to notify change handlers.
  * @param {string} newHtml - The HTML string to insert in place of the selection.
+ * @param {PythraMarkdownEditor} [editor] - The editor to insert into; defaults to the one that last had a selection.
  */
-function replaceEditorSelection(newHtml) {
+function replaceEditorSelection(newHtml, editor = window._pythraActiveEditor) {
     if (!newHtml) return;
-    restoreEditorSelection();
+    restoreEditorSelection(editor);
 
     let selection = window.getSelection();
     let range = null;
+    const saved = editor ? editor._savedSelection : null;
 
     if (selection && selection.rangeCount > 0) {
         range = selection.getRangeAt(0);
-    } else if (window._pythraSavedSelection) {
+    } else if (saved) {
         try {
-            range = window._pythraSavedSelection.cloneRange ? window._pythraSavedSelection.cloneRange() : window._pythraSavedSelection;
+            range = saved.cloneRange ? saved.cloneRange() : saved;
         } catch (e) {
-            range = window._pythraSavedSelection;
+            range = saved;
         }
     }
+    // A live selection in another editor is not ours to replace.
+    if (range && editor && editor.editorElement && !editor.editorElement.contains(range.commonAncestorContainer)) {
+        range = null;
+    }
 
     // Helper to dispatch input on closest editor container
     function dispatchInputFromNode(node) {
@@ -555,13 +840,13 @@ function replaceEditorSelection(newHtml) {
     }
 
     if (!range) {
-        // Fallback: append to first editor
-        const editor = document.querySelector('.editor-inner-container[contenteditable="true"]');
-        if (editor) {
+        // Fallback: append to the editor (or the first one on the page)
+        const target = (editor && editor.editorElement) || document.querySelector('.editor-inner-container[contenteditable="true"]');
+        if (target) {
             try {
                 const frag = document.createRange().createContextualFragment(newHtml);
-                editor.appendChild(frag);
-                dispatchInputFromNode(editor);
+                target.appendChild(frag);
+                dispatchInputFromNode(target);
             } catch (e) {
                 console.error('replaceEditorSelection fallback append error:', e);
             }
@@ -641,4 +926,37 @@ function replaceEditorSelection(newHtml) {
     }
 }
 
-window.replaceEditorSelection = replaceEditorSelection;
\ No newline at end of file
+window.replaceEditorSelection = replaceEditorSelection;
+// Global helpers that Python may call by name through the command queue.
+const _pythraEditorGlobals = {
+    restoreEditorSelection,
+    replaceEditorSelection,
+    syncExternalToolbarState,
+    hidePythraSelectionOverlay: window.hidePythraSelectionOverlay,
+};
+
+/**
+ * Runs a batch of commands queued by plugins/markdown/js_queue.py.
+ * Each command is [instanceName, method, args]; a null instanceName calls one
+ * of the global helpers above instead of an editor instance method.
+ */
+window.pythraEditorDispatch = function (commands) {
+    for (const [instanceName, method, args] of commands) {
+        try {
+            if (instanceName === null) {
+                const fn = _pythraEditorGlobals[method];
+                if (fn) fn(...args);
+                else console.warn(`pythraEditorDispatch: unknown helper '${method}'`);
+                continue;
+            }
+            const instance = window._pythra_instances && window._pythra_instances[instanceName];
+            if (instance && typeof instance[method] === 'function') {
+                instance[method](...args);
+            } else {
+                console.warn(`pythraEditorDispatch: could not find '${instanceName}.${method}'`);
+            }
+        } catch (err) {
+            console.error(`pythraEditorDispatch: ${method} failed:`, err);
+        }
+    }
+};
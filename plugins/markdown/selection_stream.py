@@ -0,0 +1,133 @@
+# plugins/markdown/selection_stream.py
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Iterable, List, Optional
+
+from .conversion import MarkdownConverter
+from .markdown_import import BlockBoundaryScanner
+
+
+class MarkdownBlockBuffer:
+    """
+    Collects Markdown that arrives in arbitrary pieces and hands out the
+    top-level blocks that are finished.
+
+    A block is finished once a blank line is followed by a complete line
+    that starts a new block (see `BlockBoundaryScanner`); until then more
+    text may still extend it (another list item, the rest of a code fence).
+    Only whole lines are considered, so a half-received "- item" is never
+    mistaken for a paragraph.
+
+    Every line is scanned once, when its newline arrives, so a long block
+    delivered in small pieces costs time linear in its length.
+    """
+
+    def __init__(self):
+        self._scanner = BlockBoundaryScanner()
+        # Complete lines not handed out yet, and the pieces of the line after them.
+        self._lines: List[str] = []
+        self._partial: List[str] = []
+
+    def feed(self, text: str) -> str:
+        """Adds `text` and returns the Markdown of the blocks it finished ('' if none)."""
+        pieces = text.split("\n")
+        if len(pieces) == 1:
+            if text:
+                self._partial.append(text)
+            return ""
+        self._partial.append(pieces[0])
+        pieces[0] = "".join(self._partial)
+        self._partial = [pieces[-1]] if pieces[-1] else []
+
+        cut = 0
+        for piece in pieces[:-1]:
+            line = piece + "\n"
+            if self._scanner.starts_block(line) and self._lines:
+                cut = len(self._lines)
+            self._lines.append(line)
+        if not cut:
+            return ""
+        finished = "".join(self._lines[:cut])
+        del self._lines[:cut]
+        return finished
+
+    def close(self) -> str:
+        """Returns whatever is left; the stream has ended."""
+        rest = "".join(self._lines) + "".join(self._partial)
+        self._scanner = BlockBoundaryScanner()
+        self._lines = []
+        self._partial = []
+        return rest
+
+
+class SelectionStream:
+    """
+    Streams Markdown from an iterator of text chunks into the editor's
+    selection.
+
+    `run()` executes on a worker thread: it pulls the chunks, converts every
+    finished top-level block to HTML and queues it. The UI thread takes all
+    queued HTML at once with `drain()`, so each event-loop turn sends at
+    most one patch to the page however fast the chunks arrive.
+
+    `future` resolves to the complete HTML. Cancelling it stops the worker
+    at its next chunk.
+    """
+
+    def __init__(self, chunks: Iterable[str], convert: Optional[Callable[[str], str]] = None):
+        self.chunks = chunks
+        self._convert = convert or (lambda text: MarkdownConverter.instance().to_html(text, cache=False))
+        self.future: Future = Future()
+
+        self._html: Deque[str] = deque()
+        self._finished = threading.Event()
+        self.error: Optional[BaseException] = None
+        # HTML already handed to the UI thread, in order.
+        self.html_parts: List[str] = []
+        self.markdown_parts: List[str] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.cancelled()
+
+    @property
+    def finished(self) -> bool:
+        """True once the worker has stopped (the queue may still hold HTML)."""
+        return self._finished.is_set()
+
+    def run(self):
+        """Consumes the chunks. Worker thread only."""
+        buffer = MarkdownBlockBuffer()
+        try:
+            for chunk in self.chunks:
+                if self.cancelled:
+                    return
+                self.markdown_parts.append(chunk)
+                blocks = buffer.feed(chunk)
+                if blocks.strip():
+                    self._html.append(self._convert(blocks))
+            rest = buffer.close()
+            if rest.strip() and not self.cancelled:
+                self._html.append(self._convert(rest))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    def drain(self) -> str:
+        """Returns the HTML queued since the last call ('' if none)."""
+        parts = []
+        while True:
+            try:
+                parts.append(self._html.popleft())
+            except IndexError:
+                break
+        self.html_parts.extend(parts)
+        return "\n".join(parts)
+
+    def html(self) -> str:
+        return "\n".join(self.html_parts)
+
+    def markdown(self) -> str:
+        return "".join(self.markdown_parts)
@@ -0,0 +1,173 @@
+# plugins/markdown/utils/font_scanner.py
+"""
+Reads font family names straight from the `name` table of TrueType/OpenType
+files (.ttf, .otf and .ttc collections), without matplotlib or FreeType.
+
+Files are memory-mapped, so only the header, the table directory and the
+name records are paged in. Large font sets are spread over a process pool.
+
+This module is the pool's worker entry point and imports nothing but the
+standard library. A spawned worker still re-imports the launching script as
+`__mp_main__` (lib/main.py in the app, with its top-level imports), so each
+worker costs far more to start than the scan of a typical font set.
+"""
+import os
+import mmap
+import struct
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Set
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Below this many files the process pool costs more than it saves. Reading
+# 2000 files serially takes ~100ms, less than starting one spawned worker that
+# re-imports lib/main.py; bench_font_scan.py prints the serial-vs-pool
+# crossover on a given machine.
+PARALLEL_THRESHOLD = 4096
+# Files handed to a worker per task; keeps inter-process traffic low.
+BATCH_SIZE = 64
+
+# name IDs in the order FreeType picks a family name from.
+_WWS_FAMILY = 21
+_TYPOGRAPHIC_FAMILY = 16
+_FONT_FAMILY = 1
+# OS/2 fsSelection bit 8: the font is already WWS-conformant, so FreeType
+# skips name ID 21.
+_FS_SELECTION_WWS = 1 << 8
+
+_TABLE_RECORD = struct.Struct(">4sIII")
+_NAME_RECORD = struct.Struct(">HHHHHH")
+
+
+def find_font_files(directories: Iterable[str]) -> List[str]:
+    """All font files below `directories`, sorted, without duplicates."""
+    found: Set[str] = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.lower().endswith(FONT_EXTENSIONS):
+                    found.add(os.path.join(root, name))
+    return sorted(found)
+
+
+def _record_rank(platform_id: int, encoding_id: int, language_id: int) -> Optional[int]:
+    """Lower is better; None for records that cannot be decoded."""
+    if platform_id == 3 and encoding_id in (0, 1, 10):
+        return 0 if language_id == 0x409 else 1
+    if platform_id == 0:
+        return 2
+    if platform_id == 1 and encoding_id == 0:
+        return 3 if language_id == 0 else 4
+    return None
+
+
+def _decode(data: bytes, platform_id: int) -> str:
+    if platform_id == 1:
+        return data.decode("mac_roman", errors="replace")
+    return data.decode("utf-16-be", errors="replace")
+
+
+def _family_name(buf, font_offset: int) -> Optional[str]:
+    """Family name of the sfnt font whose table directory starts at `font_offset`."""
+    num_tables = struct.unpack_from(">H", buf, font_offset + 4)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = _TABLE_RECORD.unpack_from(buf, font_offset + 12 + i * 16)
+        tables[tag] = (offset, length)
+
+    name_table = tables.get(b"name")
+    if name_table is None:
+        return None
+    base = name_table[0]
+    _, count, string_offset = struct.unpack_from(">HHH", buf, base)
+
+    wanted = [_TYPOGRAPHIC_FAMILY, _FONT_FAMILY]
+    os2 = tables.get(b"OS/2")
+    if os2 is None or os2[1] < 64 or not struct.unpack_from(">H", buf, os2[0] + 62)[0] & _FS_SELECTION_WWS:
+        wanted.insert(0, _WWS_FAMILY)
+
+    # name ID -> (rank, platform ID, offset, length) of the best record.
+    best = {}
+    for i in range(count):
+        platform_id, encoding_id, language_id, name_id, length, offset = _NAME_RECORD.unpack_from(
+            buf, base + 6 + i * 12
+        )
+        if name_id not in wanted or not length:
+            continue
+        rank = _record_rank(platform_id, encoding_id, language_id)
+        if rank is not None and (name_id not in best or rank < best[name_id][0]):
+            best[name_id] = (rank, platform_id, offset, length)
+
+    start = base + string_offset
+    for name_id in wanted:
+        if name_id in best:
+            _, platform_id, offset, length = best[name_id]
+            name = _decode(bytes(buf[start + offset:start + offset + length]), platform_id).strip("\x00 ")
+            if name:
+                return name
+    return None
+
+
+def read_family_names(path: str) -> List[str]:
+    """
+    Family names of the fonts in one file (several for a .ttc collection).
+    Unreadable or malformed files yield an empty list.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] == b"ttcf":
+                num_fonts = struct.unpack_from(">I", buf, 8)[0]
+                offsets = struct.unpack_from(f">{num_fonts}I", buf, 12)
+            else:
+                offsets = (0,)
+            names = []
+            for offset in offsets:
+                name = _family_name(buf, offset)
+                if name:
+                    names.append(name)
+            return names
+    except (OSError, ValueError, struct.error):
+        # Empty files cannot be mapped (ValueError); truncated tables raise struct.error.
+        return []
+
+
+def _read_batch(paths: List[str]) -> List[str]:
+    """Worker task: the family names of a batch of files."""
+    names: List[str] = []
+    for path in paths:
+        names.extend(read_family_names(path))
+    return names
+
+
+def scan_font_names(
+    directories: Iterable[str],
+    max_workers: Optional[int] = None,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+) -> List[str]:
+    """
+    Sorted unique family names of every font below `directories`. Uses a
+    process pool when there are more than `parallel_threshold` files.
+
+    The pool always spawns its workers: the caller is usually a worker
+    thread of the multi-threaded Qt process, which must not be forked.
+    """
+    paths = find_font_files(directories)
+    batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+
+    names: Set[str] = set()
+    if len(paths) > parallel_threshold and max_workers != 1:
+        try:
+            workers = min(max_workers or os.cpu_count() or 1, len(batches))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                for batch_names in executor.map(_read_batch, batches):
+                    names.update(batch_names)
+            return sorted(names)
+        except (OSError, RuntimeError) as e:
+            # No process support (sandboxed or frozen builds); BrokenProcessPool is a RuntimeError.
+            print(f"Warning: Font scan process pool unavailable, scanning serially: {e}")
+            names.clear()
+
+    for batch in batches:
+        names.update(_read_batch(batch))
+    return sorted(names)
@@ -1,46 +1,215 @@
+import os
+import sys
 import json
-from matplotlib import font_manager
+import threading
+from typing import Any, Dict, List, Optional
+
+from . import font_scanner
+
+# Common, high-priority fonts placed at the top of the list.
+# The "System Default" uses a robust CSS font stack.
+DEFAULT_FONTS = [
+    { "label": "System Default", "val": '-apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif' },
+    { "label": "Arial", "val": "Arial, sans-serif" },
+    { "label": "Verdana", "val": "Verdana, sans-serif" },
+    { "label": "Times New Roman", "val": "'Times New Roman', serif" },
+    { "label": "Georgia", "val": "Georgia, serif" },
+    { "label": "Courier New", "val": "'Courier New', monospace" },
+]
+
+# Bump when the cached format or the way names are read changes.
+_CACHE_VERSION = 2
+
+
+def default_cache_path() -> str:
+    """Per-user cache location for the font catalog."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "pythra-markdown", "font_catalog.json")
+
+
+def font_directories() -> List[str]:
+    """The platform's system and per-user font directories that exist."""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        candidates = [
+            os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+            os.path.join(os.environ.get("LOCALAPPDATA", home), "Microsoft", "Windows", "Fonts"),
+        ]
+    elif sys.platform == "darwin":
+        candidates = [
+            "/Library/Fonts",
+            "/System/Library/Fonts",
+            "/Network/Library/Fonts",
+            os.path.join(home, "Library", "Fonts"),
+        ]
+    else:
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+        candidates = [
+            "/usr/share/fonts",
+            "/usr/local/share/fonts",
+            "/usr/X11R6/lib/X11/fonts",
+            os.path.join(home, ".fonts"),
+            os.path.join(data_home, "fonts"),
+        ]
+    return [path for path in candidates if os.path.isdir(path)]
+
+
+def directory_signature(directories: List[str]) -> List[List[Any]]:
+    """
+    `[path, mtime_ns]` for every font directory and all of its subdirectories.
+    Adding or removing a font changes the mtime of the directory holding it,
+    so an unchanged signature means an unchanged font set. Only directories
+    are stat'ed, never the font files themselves.
+    """
+    signature = []
+    pending = list(directories)
+    while pending:
+        path = pending.pop()
+        try:
+            signature.append([path, os.stat(path).st_mtime_ns])
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+        except OSError:
+            continue
+    signature.sort()
+    return signature
+
+
+def scan_font_names() -> List[str]:
+    """Reads the family name of every installed TTF/OTF/TTC font from its name table."""
+    return font_scanner.scan_font_names(font_directories())
+
+
+def build_font_list(font_names: List[str]) -> List[Dict[str, str]]:
+    """The defaults first, then every system font that is not already among them."""
+    final_font_list = list(DEFAULT_FONTS)
+    default_labels = {font['label'] for font in DEFAULT_FONTS}
+    for name in font_names:
+        if name not in default_labels:
+            final_font_list.append({"label": name, "val": name})
+    return final_font_list
+
+
+class FontCatalog:
+    """
+    The system font list, persisted between runs.
+
+    The catalog is stored together with the signature (path and mtime) of
+    every font directory it was built from. `fonts()` returns the stored
+    list without touching the font files, so the editor can start with it
+    immediately. `refresh()` compares the signature with the directories on
+    disk and rescans only when they changed; call it from a worker thread.
+    """
+
+    _instance: Optional["FontCatalog"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "FontCatalog":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, cache_path: Optional[str] = None, directories: Optional[List[str]] = None):
+        self.cache_path = cache_path or default_cache_path()
+        self._directories = directories
+        self._lock = threading.Lock()
+        self._signature: Optional[List[List[Any]]] = None
+        self._fonts: Optional[List[Dict[str, str]]] = None
+        self._read_cache()
+
+    @property
+    def directories(self) -> List[str]:
+        return self._directories if self._directories is not None else font_directories()
+
+    def fonts(self) -> List[Dict[str, str]]:
+        """The cached font list, or just the defaults before the first scan. Never scans."""
+        with self._lock:
+            return list(self._fonts) if self._fonts is not None else list(DEFAULT_FONTS)
+
+    @property
+    def is_cached(self) -> bool:
+        with self._lock:
+            return self._fonts is not None
+
+    def refresh(self, force: bool = False) -> Optional[List[Dict[str, str]]]:
+        """
+        Rescans the fonts if the font directories changed since the cached
+        scan (or `force` is set) and stores the result. Returns the new list,
+        or None if the cached one is still current. Blocking.
+        """
+        directories = self.directories
+        signature = directory_signature(directories)
+        with self._lock:
+            if not force and self._fonts is not None and signature == self._signature:
+                return None
+            previous = self._fonts
+
+        try:
+            # The directories the signature was taken from, not the system ones.
+            font_names = font_scanner.scan_font_names(directories)
+        except Exception as e:
+            print(f"Warning: Could not get system fonts. Falling back to defaults. Error: {e}")
+            font_names = []
+        fonts = build_font_list(font_names)
+
+        with self._lock:
+            self._signature = signature
+            self._fonts = fonts
+        self._write_cache(signature, fonts)
+        return None if fonts == previous else list(fonts)
+
+    def load(self) -> List[Dict[str, str]]:
+        """The current font list: the cache if it is still valid, otherwise a fresh scan."""
+        fonts = self.refresh()
+        return fonts if fonts is not None else self.fonts()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != _CACHE_VERSION:
+            return
+        fonts = data.get("fonts")
+        signature = data.get("directories")
+        if isinstance(fonts, list) and isinstance(signature, list):
+            self._fonts = fonts
+            self._signature = signature
+
+    def _write_cache(self, signature, fonts):
+        data = {"version": _CACHE_VERSION, "directories": signature, "fonts": fonts}
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write the font cache {self.cache_path}: {e}")
+
 
 def get_system_fonts_as_json():
     """
     Finds all unique system font families and formats them into a JSON string
     suitable for a dropdown, with common fonts placed at the top.
+
+    The result comes from the persistent FontCatalog; the font files are only
+    scanned when the font directories changed since the last run.
     
     Returns:
         str: A JSON string representing a list of font dictionaries.
     """
-    
-    # 1. Define a list of common, high-priority fonts.
-    # The "System Default" uses a robust CSS font stack.
-    default_fonts = [
-        { "label": "System Default", "val": '-apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif' },
-        { "label": "Arial", "val": "Arial, sans-serif" },
-        { "label": "Verdana", "val": "Verdana, sans-serif" },
-        { "label": "Times New Roman", "val": "'Times New Roman', serif" },
-        { "label": "Georgia", "val": "Georgia, serif" },
-        { "label": "Courier New", "val": "'Courier New', monospace" },
-    ]
-    
-    # 2. Get all unique font family names from the system.
-    # We use a set to automatically handle duplicates.
-    try:
-        font_paths = font_manager.findSystemFonts(fontpaths=None, fontext='ttf')
-        font_names = sorted({font_manager.FontProperties(fname=fname).get_name() for fname in font_paths})
-    except Exception as e:
-        print(f"Warning: Could not get system fonts. Falling back to defaults. Error: {e}")
-        font_names = []
-
-    # 3. Combine the lists.
-    # Start with our defaults, then add unique system fonts that aren't already in the default list.
-    final_font_list = list(default_fonts)
-    default_labels = {font['label'] for font in default_fonts}
-    
-    for name in font_names:
-        if name not in default_labels:
-            final_font_list.append({"label": name, "val": name})
-            
-    # 4. Convert the final list to a JSON string.
-    return json.dumps(final_font_list, indent=2)
+    return json.dumps(FontCatalog.instance().load(), indent=2)
 
 # --- Main execution ---
 if __name__ == "__main__":
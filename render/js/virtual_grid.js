@@ -0,0 +1,379 @@
+/**
+ * PythraVirtualGrid: A client-side engine for virtual grid scrolling.
+ *
+ * The 2D counterpart of PythraVirtualList, using the same model: Python
+ * pre-renders the first items, the rest are fetched on demand through
+ * `pywebview.build_list_item`, and fetched HTML is cached by index.
+ *
+ * Only the visible rows plus `overscanRows` above and below exist in the
+ * DOM. Item elements are keyed by index, so scrolling by one row only
+ * fills the row that came into view; every other element keeps its
+ * content and is merely repositioned. Scroll events are coalesced to one
+ * render per animation frame. Inserting or removing items only shifts
+ * the cache (insertItems/removeItems), so a new note costs one fetch.
+ *
+ * Resting the pointer on an element with the `vgrid-hover-target` class
+ * for `hoverDelay` ms reports the item's index to the Python callback
+ * `<itemBuilderName>_hover`, if one is registered (the dashboard prefetches
+ * the note a click would open).
+ *
+ * Options: itemCount, crossAxisCount, childAspectRatio, mainAxisSpacing,
+ * crossAxisSpacing, itemBuilderName, initialItems, overscanRows (default 2),
+ * maxCachedItems (default 600), hoverDelay (default 120).
+ */
+export class PythraVirtualGrid {
+    constructor(elementId, options) {
+        this.container = document.getElementById(elementId);
+        if (!this.container) {
+            console.error(`VirtualGrid Error: Container element #${elementId} not found.`);
+            return;
+        }
+
+        this.options = options;
+        this.itemCount = options.itemCount || 0;
+        this.crossAxisCount = Math.max(1, options.crossAxisCount || 2);
+        this.overscanRows = options.overscanRows ?? 2;
+        this.maxCachedItems = options.maxCachedItems || 600;
+
+        this.simplebar = new SimpleBar(this.container, this.options.simplebarOptions || {});
+        this.scrollEl = this.simplebar.getScrollElement();
+        this.scrollEl.style.overflowX = 'hidden';
+        this.contentEl = this.simplebar.getContentElement();
+        this.contentEl.style.position = 'relative';
+
+        // index -> { html, css, js }; a Map keeps insertion order, which
+        // doubles as LRU order (entries are re-inserted on use).
+        this.itemCache = new Map();
+        this.elementsByIndex = new Map();
+        this.freeElements = [];
+        // index -> token of the in-flight request; a response whose token
+        // is no longer current (after reset/refreshItems) is dropped.
+        this.pendingFetches = new Map();
+        this.injectedCss = new Set();
+
+        if (this.options.initialItems) {
+            for (const index in this.options.initialItems) {
+                this._storeItem(Number(index), this.options.initialItems[index]);
+            }
+        }
+
+        this.sizer = document.createElement('div');
+        this.sizer.style.position = 'absolute';
+        this.sizer.style.top = '0';
+        this.sizer.style.left = '0';
+        this.sizer.style.width = '1px';
+        this.contentEl.appendChild(this.sizer);
+
+        this.itemWidth = 0;
+        this.itemHeight = 0;
+        this.rowHeight = 0;
+        this.updateLayoutMetrics();
+
+        this._frame = null;
+        this._onScroll = () => {
+            if (this._frame !== null) return;
+            this._frame = requestAnimationFrame(() => {
+                this._frame = null;
+                this.render();
+            });
+        };
+        this.scrollEl.addEventListener('scroll', this._onScroll, { passive: true });
+
+        this.hoverDelay = options.hoverDelay ?? 120;
+        this._hoverTimer = null;
+        this._hoverIndex = null;
+        this._onPointerOver = event => {
+            const target = event.target.closest && event.target.closest('.vgrid-hover-target');
+            const itemEl = target && target.closest('[data-index]');
+            if (!itemEl || !this.contentEl.contains(itemEl)) return;
+            const index = Number(itemEl.dataset.index);
+            if (index === this._hoverIndex) return;
+            this._cancelHover();
+            this._hoverIndex = index;
+            this._hoverTimer = setTimeout(() => {
+                this._hoverTimer = null;
+                this._reportHover(index);
+            }, this.hoverDelay);
+        };
+        this._onPointerOut = event => {
+            const target = event.target.closest && event.target.closest('.vgrid-hover-target');
+            if (target && !target.contains(event.relatedTarget)) this._cancelHover();
+        };
+        this.contentEl.addEventListener('pointerover', this._onPointerOver);
+        this.contentEl.addEventListener('pointerout', this._onPointerOut);
+
+        this._resizeObserver = new ResizeObserver(() => {
+            if (this.updateLayoutMetrics()) this._layoutAll();
+            this.render();
+        });
+        this._resizeObserver.observe(this.scrollEl);
+
+        this.render();
+    }
+
+    /** Recomputes item and row sizes. Returns true if they changed. */
+    updateLayoutMetrics() {
+        const containerWidth = this.scrollEl.clientWidth;
+        if (containerWidth === 0) return false;
+
+        const mainAxisSpacing = this.options.mainAxisSpacing || 0;
+        const crossAxisSpacing = this.options.crossAxisSpacing || 0;
+        const childAspectRatio = this.options.childAspectRatio || 1.0;
+
+        const itemWidth = (containerWidth - crossAxisSpacing * (this.crossAxisCount - 1)) / this.crossAxisCount;
+        if (itemWidth === this.itemWidth) return false;
+
+        this.itemWidth = itemWidth;
+        this.itemHeight = itemWidth / childAspectRatio;
+        this.rowHeight = this.itemHeight + mainAxisSpacing;
+        this.updateSizerHeight();
+        return true;
+    }
+
+    updateSizerHeight() {
+        const rowCount = Math.ceil(this.itemCount / this.crossAxisCount);
+        const totalHeight = Math.max(0, rowCount * this.rowHeight - (this.options.mainAxisSpacing || 0));
+        this.sizer.style.height = `${totalHeight}px`;
+    }
+
+    attachEventListeners(element) {
+        const clickableElements = element.querySelectorAll('[onclick]');
+        clickableElements.forEach(clickable => {
+            const onclickAttr = clickable.getAttribute('onclick');
+            const match = onclickAttr && onclickAttr.match(/handleClick\('([^']+)'\)/);
+
+            if (match && match[1]) {
+                const callbackName = match[1];
+                clickable.removeAttribute('onclick');
+                clickable.addEventListener('click', () => {
+                    if (window.pywebview && typeof handleClick === 'function') {
+                        handleClick(callbackName);
+                    }
+                });
+            }
+        });
+    }
+
+    _storeItem(index, itemData) {
+        const entry = { html: itemData.html, css: itemData.css || '', js: itemData.js || '' };
+        this.itemCache.delete(index);
+        this.itemCache.set(index, entry);
+        if (entry.css && !this.injectedCss.has(entry.css)) {
+            this.injectedCss.add(entry.css);
+            const styleSheet = document.getElementById('dynamic-styles');
+            if (styleSheet) styleSheet.textContent += `\n${entry.css}`;
+        }
+        // Evict the least recently used entries that are not on screen.
+        if (this.itemCache.size > this.maxCachedItems) {
+            for (const cachedIndex of this.itemCache.keys()) {
+                if (this.itemCache.size <= this.maxCachedItems) break;
+                if (!this.elementsByIndex.has(cachedIndex)) this.itemCache.delete(cachedIndex);
+            }
+        }
+        return entry;
+    }
+
+    _fill(el, index) {
+        const entry = this.itemCache.get(index);
+        if (!entry) {
+            el.innerHTML = '';
+            this._fetch(index);
+            return;
+        }
+        // Touch for LRU order.
+        this.itemCache.delete(index);
+        this.itemCache.set(index, entry);
+        el.innerHTML = entry.html;
+        this.attachEventListeners(el);
+        if (entry.js) {
+            try {
+                new Function(entry.js)();
+            } catch (e) {
+                console.error(`Error initializing virtual grid item ${index}:`, e);
+            }
+        }
+    }
+
+    _fetch(index) {
+        if (this.pendingFetches.has(index) || !window.pywebview || !this.options.itemBuilderName) return;
+        const token = {};
+        this.pendingFetches.set(index, token);
+        window.pywebview.build_list_item(this.options.itemBuilderName, index)
+            .then(response => {
+                if (this.pendingFetches.get(index) !== token) return;
+                this.pendingFetches.delete(index);
+                this._storeItem(index, response);
+                const el = this.elementsByIndex.get(index);
+                if (el) this._fill(el, index);
+            })
+            .catch(e => {
+                if (this.pendingFetches.get(index) === token) this.pendingFetches.delete(index);
+                console.error(`Error building virtual grid item ${index}:`, e);
+            });
+    }
+
+    _cancelHover() {
+        if (this._hoverTimer !== null) clearTimeout(this._hoverTimer);
+        this._hoverTimer = null;
+        this._hoverIndex = null;
+    }
+
+    _reportHover(index) {
+        if (!window.pywebview || !this.options.itemBuilderName || index >= this.itemCount) return;
+        window.pywebview.on_pressed(`${this.options.itemBuilderName}_hover`, index)
+            .catch(e => console.error(`Error reporting hover on virtual grid item ${index}:`, e));
+    }
+
+    _position(el, index) {
+        const row = Math.floor(index / this.crossAxisCount);
+        const column = index % this.crossAxisCount;
+        const left = column * (this.itemWidth + (this.options.crossAxisSpacing || 0));
+        el.style.width = `${this.itemWidth}px`;
+        el.style.height = `${this.itemHeight}px`;
+        el.style.transform = `translate(${left}px, ${row * this.rowHeight}px)`;
+    }
+
+    _layoutAll() {
+        for (const [index, el] of this.elementsByIndex) this._position(el, index);
+    }
+
+    render() {
+        if (this.rowHeight === 0 && !this.updateLayoutMetrics()) return;
+
+        const scrollTop = this.scrollEl.scrollTop;
+        const viewportHeight = this.scrollEl.clientHeight;
+        const lastRow = Math.ceil(this.itemCount / this.crossAxisCount) - 1;
+        const startRow = Math.max(0, Math.floor(scrollTop / this.rowHeight) - this.overscanRows);
+        const endRow = Math.min(lastRow, Math.ceil((scrollTop + viewportHeight) / this.rowHeight) + this.overscanRows);
+        const first = startRow * this.crossAxisCount;
+        const last = Math.min(this.itemCount - 1, (endRow + 1) * this.crossAxisCount - 1);
+
+        // Release elements that scrolled out of range.
+        for (const [index, el] of this.elementsByIndex) {
+            if (index < first || index > last) {
+                this.elementsByIndex.delete(index);
+                el.style.display = 'none';
+                this.freeElements.push(el);
+            }
+        }
+
+        for (let index = first; index <= last; index++) {
+            if (this.elementsByIndex.has(index)) continue;
+            let el = this.freeElements.pop();
+            if (!el) {
+                el = document.createElement('div');
+                el.style.position = 'absolute';
+                el.style.top = '0';
+                el.style.left = '0';
+                el.style.contain = 'layout paint';
+                this.contentEl.appendChild(el);
+            }
+            el.style.display = 'block';
+            el.dataset.index = index;
+            this.elementsByIndex.set(index, el);
+            this._position(el, index);
+            this._fill(el, index);
+        }
+    }
+
+    /**
+     * Called from Python when the data set changed (items added, removed or
+     * reordered). Drops every cached item and re-renders the visible range.
+     */
+    reset(itemCount) {
+        if (typeof itemCount === 'number') {
+            this.itemCount = itemCount;
+            this.options.itemCount = itemCount;
+        }
+        this.itemCache.clear();
+        this.pendingFetches.clear();
+        this._cancelHover();
+        for (const [index, el] of this.elementsByIndex) {
+            el.style.display = 'none';
+            this.freeElements.push(el);
+        }
+        this.elementsByIndex.clear();
+        this.updateSizerHeight();
+        this.render();
+    }
+
+    /** `count` items were inserted before `index`; cached items after it move down. */
+    insertItems(index, count = 1) {
+        this._shift(index, count);
+    }
+
+    /** `count` items starting at `index` were removed; later items move up. */
+    removeItems(index, count = 1) {
+        this._shift(index, -count);
+    }
+
+    _shift(index, delta) {
+        const removedEnd = delta < 0 ? index - delta : index;
+        const move = i => (i >= removedEnd ? i + delta : i);
+        const isRemoved = i => i >= index && i < removedEnd;
+
+        const cache = new Map();
+        for (const [i, entry] of this.itemCache) {
+            if (!isRemoved(i)) cache.set(move(i), entry);
+        }
+        this.itemCache = cache;
+
+        const elements = new Map();
+        for (const [i, el] of this.elementsByIndex) {
+            if (isRemoved(i)) {
+                el.style.display = 'none';
+                this.freeElements.push(el);
+            } else {
+                el.dataset.index = move(i);
+                elements.set(move(i), el);
+            }
+        }
+        this.elementsByIndex = elements;
+        // In-flight responses and a pending hover belong to the old indices.
+        this.pendingFetches.clear();
+        this._cancelHover();
+
+        this.itemCount = Math.max(0, this.itemCount + delta);
+        this.options.itemCount = this.itemCount;
+        this.updateSizerHeight();
+        for (const [i, el] of this.elementsByIndex) {
+            if (i >= this.itemCount) {
+                this.elementsByIndex.delete(i);
+                el.style.display = 'none';
+                this.freeElements.push(el);
+                continue;
+            }
+            this._position(el, i);
+            if (!this.itemCache.has(i)) this._fill(el, i);
+        }
+        this.render();
+    }
+
+    refresh() {
+        this.reset();
+    }
+
+    refreshItems(indices) {
+        if (!Array.isArray(indices)) return;
+        indices.forEach(index => {
+            this.itemCache.delete(index);
+            this.pendingFetches.delete(index);
+            const el = this.elementsByIndex.get(index);
+            if (el) this._fill(el, index);
+        });
+    }
+
+    destroy() {
+        this.scrollEl.removeEventListener('scroll', this._onScroll);
+        this.contentEl.removeEventListener('pointerover', this._onPointerOver);
+        this.contentEl.removeEventListener('pointerout', this._onPointerOut);
+        this._cancelHover();
+        if (this._frame !== null) cancelAnimationFrame(this._frame);
+        if (this._resizeObserver) this._resizeObserver.disconnect();
+        if (this.simplebar && typeof this.simplebar.unMount === 'function') {
+            this.simplebar.unMount();
+        }
+    }
+}
+
+window.PythraVirtualGrid = PythraVirtualGrid;